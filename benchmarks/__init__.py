@@ -0,0 +1,3 @@
+""" The benchmarks of single features of mutorch, run from the root of the repository as python -m benchmarks.<name>.
+They share their helpers with the benchmark suite of mutorch/bench.py.
+"""
@@ -0,0 +1,40 @@
+""" Benchmark of the peak memory of a training step over a whole batch against the same batch split into micro-batches.
+
+Usage: python -m benchmarks.accumulate [--batch-size 256] [--width 64]
+"""
+import random
+import argparse
+
+import mutorch
+from mutorch import nn, losses
+from mutorch.bench import random_tensor, peak_memory
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--width', type=int, default=64)
+    args = parser.parse_args()
+
+    random.seed(0)
+    model = nn.Sequential(
+                nn.Linear(input_size=args.width, output_size=args.width, activation=nn.Tanh()),
+                nn.Linear(input_size=args.width, output_size=args.width, activation=nn.Tanh()),
+                nn.Linear(input_size=args.width, output_size=1, activation=nn.Sigmoid())
+            )
+    loss_fn = losses.MSELoss()
+    x = random_tensor(args.batch_size, args.width, requires_grad=True)
+    y = mutorch.Tensor([[float(i % 2)] for i in range(args.batch_size)], storage='array')
+    rows = x.data, y.data
+
+    print(f'{"micro-batches":<16}{"peak [KiB]":>14}')
+    for n in (1, 2, 4, 8):
+        size = args.batch_size // n
+        micro_batches = [(mutorch.Tensor(rows[0][i:i + size], storage='array'),
+                          mutorch.Tensor(rows[1][i:i + size], storage='array'))
+                         for i in range(0, args.batch_size, size)]
+        model.zero_grad()
+        peak = peak_memory(lambda: model.accumulate(micro_batches, loss_fn))
+        print(f'{n:<16}{peak / 1024:>14.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+""" Benchmark of the compute backends on array-backed tensors: a matmul, an elementwise chain and an MLP training step.
+
+Usage: python -m benchmarks.backends [--width 256] [--batch-size 64]
+Backends whose dependencies are not installed are skipped.
+"""
+import random
+import argparse
+
+import mutorch
+from mutorch import nn, losses, optim
+from mutorch.bench import random_tensor, timed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--width', type=int, default=256)
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    random.seed(0)
+    a, b = random_tensor(args.width, args.width, requires_grad=True), random_tensor(args.width, args.width, requires_grad=True)
+    x = random_tensor(args.batch_size, args.width, requires_grad=True)
+    y = random_tensor(args.batch_size, 1, requires_grad=True)
+    model = nn.Sequential(
+                nn.Linear(input_size=args.width, output_size=args.width, activation=nn.Tanh()),
+                nn.Linear(input_size=args.width, output_size=1, activation=nn.Sigmoid())
+            )
+    optimizer = optim.Adam(model.parameters(), lr=0.01)
+    loss_fn = losses.MSELoss()
+
+    def elementwise():
+        ((a * b + a).tanh() / 2 - b.sigmoid()).sum().backward()
+
+    def train_step():
+        optimizer.zero_grad()
+        loss_fn(model(x), y).backward()
+        optimizer.step()
+
+    print(f'{"backend":<10}{"matmul [ms]":>14}{"elementwise [ms]":>18}{"train step [ms]":>18}')
+    for backend in ('python', 'numpy'):
+        try:
+            mutorch.set_backend(backend)
+        except ImportError:
+            print(f'{backend:<10}{"not installed":>14}')
+            continue
+        print(f'{backend:<10}{timed(lambda: (a @ b).sum().backward()) * 1e3:>14.1f}'
+              f'{timed(elementwise) * 1e3:>18.1f}{timed(train_step) * 1e3:>18.1f}')
+    mutorch.set_backend('python')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+""" Benchmark of the backward pass, showing that its cost grows linearly with the graph size.
+
+Usage: python -m benchmarks.backward
+"""
+import time
+
+import mutorch
+from mutorch import nn
+
+def diamond_chain(depth):
+    """ A chain of diamonds: every intermediate node feeds two consumers.
+    Walking every path of this graph visits 2 ** depth nodes.
+    """
+    x = mutorch.Node(0.5, name='x')
+    out = x
+    for _ in range(depth):
+        a = out * 0.5
+        b = out * 0.25
+        out = (a + b).tanh()
+    return out
+
+def mlp(width):
+    """ A forward pass through a two-layer MLP, where every input and hidden activation is shared by all neurons.
+    It is made of Neurons, as Linear layers record one tape entry per layer instead of a graph of nodes.
+    """
+    hidden = [nn.Neuron(width) for _ in range(width)]
+    output = nn.Neuron(width)
+    x = mutorch.Tensor([[0.01 * (i + j) for j in range(width)] for i in range(4)])
+    out = mutorch.Tensor([[nn.Sigmoid()(output.forward([nn.Tanh()(n.forward(row)) for n in hidden]))]
+                          for row in x.data])
+    return out.sum().data[0][0]
+
+def time_backward(root, repeats=3):
+    """ Best-of-n backward time of a graph, in seconds. """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        # the graph is backpropagated through once per repeat
+        root.backward(retain_graph=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    print(f'{"graph":<20}{"nodes":>10}{"backward [ms]":>16}{"us / node":>12}')
+    for depth in (250, 500, 1000, 2000, 4000):
+        root = diamond_chain(depth)
+        num_nodes = len(root._build_node_graph())
+        t = time_backward(root)
+        print(f'{"diamond " + str(depth):<20}{num_nodes:>10}{t * 1e3:>16.2f}{t * 1e6 / num_nodes:>12.3f}')
+    for width in (8, 16, 32, 64):
+        root = mlp(width)
+        num_nodes = len(root._build_node_graph())
+        t = time_backward(root)
+        print(f'{"mlp " + str(width):<20}{num_nodes:>10}{t * 1e3:>16.2f}{t * 1e6 / num_nodes:>12.3f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+""" Benchmark of broadcast elementwise ops, a bias add and a scalar scaling, against the same ops on operands
+expanded to the full shape first, forward and backward.
+
+Usage: python -m benchmarks.broadcast [--width 64] [--batch-size 1024] [--backend python]
+"""
+import random
+import argparse
+
+import mutorch
+from mutorch.bench import random_tensor, timed, peak_memory
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--width', type=int, default=64)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--backend', default='python')
+    args = parser.parse_args()
+    mutorch.set_backend(args.backend)
+
+    random.seed(0)
+    x = random_tensor(args.batch_size, args.width, requires_grad=True)
+    bias = random_tensor(1, args.width, requires_grad=True)
+    scale = mutorch.Tensor(0.5, storage='array')
+
+    def expanded(t):
+        """ The operand copied to the shape of x, as the ops used to require. """
+        return mutorch.Tensor([t.detach()[0] * (args.width // t.shape[1])] * args.batch_size, storage='array')
+
+    print(f'{"op":<14}{"path":<12}{"time [ms]":>12}{"peak [KiB]":>14}')
+    for name, op, operand in (('bias add', lambda a, b: a + b, bias), ('scaling', lambda a, b: a * b, scale)):
+        for path, fn in (('expanded', lambda: op(x, expanded(operand)).sum().backward()),
+                         ('broadcast', lambda: op(x, operand).sum().backward())):
+            elapsed = timed(fn, repeat=5)
+            peak = peak_memory(fn)
+            print(f'{name:<14}{path:<12}{elapsed * 1e3:>12.2f}{peak / 1024:>14.1f}')
+
+if __name__ == '__main__':
+    main()
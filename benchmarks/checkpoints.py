@@ -0,0 +1,49 @@
+""" Benchmark of saving and loading a large model with binary checkpoints, against the pickled checkpoints of former versions of Sequential.save.
+
+Usage: python -m benchmarks.checkpoints [--width 512] [--depth 4]
+"""
+import os
+import pickle
+import random
+import argparse
+import tempfile
+
+import mutorch
+from mutorch import nn
+from mutorch.bench import timed
+
+def save_pickle(model, filename):
+    """ Save a model as former versions of Sequential.save did: a pickle of a flat list of python floats,
+    laid out output by output, the weights of an output followed by its bias. """
+    values = []
+    for layer in model.layers:
+        weight, bias, n = layer.weight._storage, layer.bias._storage, layer.output_size
+        values += [value for j in range(n) for value in (*weight[j::n], bias[j])]
+    with open(filename, 'wb') as f:
+        pickle.dump({'parameters': values}, f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--width', type=int, default=512)
+    parser.add_argument('--depth', type=int, default=4)
+    args = parser.parse_args()
+
+    random.seed(0)
+    model = nn.Sequential(*(nn.Linear(args.width, args.width, activation=nn.Tanh()) for _ in range(args.depth)))
+    directory = tempfile.mkdtemp()
+    legacy, binary = os.path.join(directory, 'model.pkl'), os.path.join(directory, 'model.ckpt')
+    print(f'{model.num_parameters()} parameters')
+    print(f'{"format":<10}{"save [ms]":>11}{"load [ms]":>11}{"one layer [ms]":>16}{"size [MiB]":>12}')
+
+    save_time, load_time = timed(lambda: save_pickle(model, legacy)), timed(lambda: model.load(legacy))
+    print(f'{"pickle":<10}{save_time * 1e3:>11.1f}{load_time * 1e3:>11.1f}{"":>16}{os.path.getsize(legacy) / 2**20:>12.2f}')
+
+    def load_layer():
+        with mutorch.load(binary) as checkpoint:
+            model.layers[0].load_state_dict({'weight': checkpoint['layers.0.weight'], 'bias': checkpoint['layers.0.bias']})
+    save_time, load_time = timed(lambda: model.save(binary)), timed(lambda: model.load(binary))
+    layer_time = timed(load_layer)
+    print(f'{"binary":<10}{save_time * 1e3:>11.1f}{load_time * 1e3:>11.1f}{layer_time * 1e3:>16.2f}{os.path.getsize(binary) / 2**20:>12.2f}')
+
+if __name__ == '__main__':
+    main()
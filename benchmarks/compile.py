@@ -0,0 +1,61 @@
+""" Benchmark of training steps compiled with mutorch.compile against eager steps, on the MLP of the README.
+
+Usage: python -m benchmarks.compile [--batch-size 6] [--steps 200] [--backend python]
+"""
+import time
+import random
+import argparse
+
+import mutorch
+from mutorch import nn, losses, optim
+from mutorch.bench import random_tensor
+
+def mlp():
+    """ The MLP of the README, with the same initial parameters at every call. """
+    random.seed(0)
+    return nn.Sequential(nn.Linear(5, 10, activation=nn.Tanh()),
+                         nn.Linear(10, 10, activation=nn.ReLU()),
+                         nn.Linear(10, 1, activation=nn.Sigmoid()))
+
+def train(step_fn, model, x, y, steps):
+    """ Run the training steps, and return the wall time per step in seconds and the final loss. """
+    optimizer = optim.Adam(model.parameters(), lr=0.01)
+    start = time.perf_counter()
+    for _ in range(steps):
+        optimizer.zero_grad()
+        loss = step_fn(x, y)
+        optimizer.step()
+    return (time.perf_counter() - start) / steps, loss.item()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=6)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--backend', default='python')
+    args = parser.parse_args()
+    mutorch.set_backend(args.backend)
+
+    random.seed(1)
+    x = random_tensor(args.batch_size, 5)
+    y = mutorch.Tensor([[float(random.random() > 0.5)] for _ in range(args.batch_size)],
+                       requires_grad=False, storage='array')
+    loss_fn = losses.MSELoss()
+
+    def eager_step(model):
+        def step(x, y):
+            loss = loss_fn(model(x), y)
+            loss.backward()
+            return loss
+        return step
+
+    model = mlp()
+    eager_time, eager_loss = train(eager_step(model), model, x, y, args.steps)
+    model = mlp()
+    compiled_time, compiled_loss = train(mutorch.compile(model, loss_fn), model, x, y, args.steps)
+    print(f'{"mode":<10}{"step [ms]":>12}{"final loss":>14}')
+    print(f'{"eager":<10}{eager_time * 1e3:>12.3f}{eager_loss:>14.6f}')
+    print(f'{"compiled":<10}{compiled_time * 1e3:>12.3f}{compiled_loss:>14.6f}')
+    print(f'speedup: {eager_time / compiled_time:.2f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+""" Benchmark of the fused cross entropy loss against a softmax followed by the negative log likelihood.
+The NLL loss averages over every element rather than every sample, so its loss is the cross entropy divided by the classes.
+
+Usage: python -m benchmarks.cross_entropy [--batch-size 256] [--classes 10]
+"""
+import random
+import argparse
+
+import mutorch
+from mutorch import nn, losses
+from mutorch.bench import timed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--classes', type=int, default=10)
+    args = parser.parse_args()
+
+    random.seed(0)
+    labels = [random.randrange(args.classes) for _ in range(args.batch_size)]
+    onehot = [[1. if j == label else 0. for j in range(args.classes)] for label in labels]
+    softmax, nll, cross_entropy = nn.Softmax(dim=1), losses.NLLLoss(), losses.CrossEntropyLoss()
+
+    print(f'{"logits scale":<14}{"path":<22}{"storage":<10}{"loss":>12}{"time [ms]":>12}')
+    for scale in (1., 100.):
+        logits = [[random.gauss(0., scale) for _ in range(args.classes)] for _ in range(args.batch_size)]
+        for storage in ('node', 'array'):
+            for name, loss_fn in (('softmax + nll', lambda x: nll(softmax(x), onehot)),
+                                  ('cross entropy', lambda x: cross_entropy(x, labels))):
+                try:
+                    loss = loss_fn(mutorch.Tensor(logits, storage=storage)).item()
+                    elapsed = timed(lambda: loss_fn(mutorch.Tensor(logits, storage=storage)).backward(), repeat=5)
+                except (OverflowError, ZeroDivisionError) as e:
+                    print(f'{scale:<14}{name:<22}{storage:<10}{"failed: " + type(e).__name__:>24}')
+                    continue
+                print(f'{scale:<14}{name:<22}{storage:<10}{loss:>12.4f}{elapsed * 1e3:>12.2f}')
+
+if __name__ == '__main__':
+    main()
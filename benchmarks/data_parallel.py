@@ -0,0 +1,70 @@
+""" Benchmark of the throughput of DataParallel training steps at 1, 2, 4 and 8 worker processes, against single-process steps.
+
+Usage: python -m benchmarks.data_parallel [--batch-size 256] [--width 64] [--steps 5] [--workers 1 2 4 8] [--backend python]
+The scaling is relative to a single worker; it is bounded by the number of cores of the machine.
+"""
+import os
+import time
+import random
+import argparse
+
+import mutorch
+from mutorch import nn, losses, optim, parallel
+from mutorch.bench import random_tensor
+
+def mlp(width, classes):
+    """ An MLP with the same initial parameters at every call. """
+    random.seed(0)
+    return nn.Sequential(nn.Linear(16, width, activation=nn.Tanh()),
+                         nn.Linear(width, width, activation=nn.ReLU()),
+                         nn.Linear(width, classes, activation=None))
+
+def train(accumulate, model, steps):
+    """ Run the training steps, and return the wall time per step in seconds and the final loss. """
+    optimizer = optim.Adam(model.parameters(), lr=0.01)
+    start = time.perf_counter()
+    for _ in range(steps):
+        optimizer.zero_grad()
+        loss = accumulate()
+        optimizer.step()
+    return (time.perf_counter() - start) / steps, loss
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--width', type=int, default=64)
+    parser.add_argument('--steps', type=int, default=5)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--backend', default='python')
+    args = parser.parse_args()
+    mutorch.set_backend(args.backend)
+
+    random.seed(1)
+    x = random_tensor(args.batch_size, 16)
+    y = [random.randrange(4) for _ in range(args.batch_size)]
+    loss_fn = losses.CrossEntropyLoss()
+    print(f'{os.cpu_count()} cores')
+    print(f'{"mode":<16}{"step [ms]":>12}{"samples/s":>12}{"scaling":>10}{"final loss":>14}')
+
+    model = mlp(args.width, 4)
+    def eager():
+        loss = loss_fn(model(x), y)
+        loss.backward()
+        return loss.item()
+    elapsed, loss = train(eager, model, args.steps)
+    print(f'{"single process":<16}{elapsed * 1e3:>12.1f}{args.batch_size / elapsed:>12.1f}{"":>10}{loss:>14.6f}')
+
+    baseline = None
+    for num_workers in args.workers:
+        model = mlp(args.width, 4)
+        with parallel.DataParallel(model, num_workers) as data_parallel:
+            # the first step forks the workers, it is not timed
+            data_parallel.accumulate(x, y, loss_fn)
+            model.zero_grad()
+            elapsed, loss = train(lambda: data_parallel.accumulate(x, y, loss_fn), model, args.steps)
+        baseline = baseline or elapsed
+        print(f'{f"{num_workers} workers":<16}{elapsed * 1e3:>12.1f}{args.batch_size / elapsed:>12.1f}'
+              f'{baseline / elapsed:>9.2f}x{loss:>14.6f}')
+
+if __name__ == '__main__':
+    main()
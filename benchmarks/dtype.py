@@ -0,0 +1,86 @@
+""" Benchmark of the memory and the accuracy of float32 tensors against float64 ones, training the MLP of the README.
+
+Usage: python -m benchmarks.dtype [--hidden 10] [--batch-size 6] [--epochs 500] [--backend python]
+The hidden layers are hidden wide, and the batch repeats the 6 samples of the README. The memory of the parameters
+includes the gradients and the moment estimates of Adam, the memory of the activations is the peak of a training step.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+import mutorch
+from mutorch import nn, losses, optim
+
+X = [[0.6, -0.35, 0.47, 0.71, 0.12],
+     [0.3, 0.45, -0.67, -0.89, 0.23],
+     [0.5, 0.65, 0.87, 0.99, 0.34],
+     [0.7, -0.85, 0.97, -0.11, 0.45],
+     [0.9, -0.01, -0.13, 0.25, -0.56],
+     [-0.2, 0.32, -0.54, 0.76, 0.98]]
+Y = [[0.], [0.], [0.], [1.], [1.], [1.]]
+
+def mlp(hidden):
+    """ The MLP of the README, with the same initial parameters at every call. """
+    random.seed(0)
+    return nn.Sequential(nn.Linear(5, hidden, activation=nn.Tanh()),
+                         nn.Linear(hidden, hidden, activation=nn.ReLU()),
+                         nn.Linear(hidden, 1, activation=nn.Sigmoid()))
+
+def train(dtype, args):
+    """ Train the MLP with tensors of a dtype, and return its measurements and its outputs after training. """
+    mutorch.set_default_dtype(dtype)
+    x = mutorch.Tensor([X[i % len(X)] for i in range(args.batch_size)], requires_grad=False, storage='array')
+    y = mutorch.Tensor([Y[i % len(Y)] for i in range(args.batch_size)], requires_grad=False, storage='array')
+    loss_fn = losses.MSELoss()
+
+    tracemalloc.start()
+    model = mlp(args.hidden)
+    model.flatten_parameters()
+    optimizer = optim.Adam(model.parameters(), lr=0.01)
+    parameters, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    optimizer.zero_grad()
+    loss_fn(model(x), y).backward()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(args.epochs):
+        optimizer.zero_grad()
+        loss = loss_fn(model(x), y)
+        loss.backward()
+        optimizer.step()
+    elapsed = time.perf_counter() - start
+
+    filename = os.path.join(tempfile.mkdtemp(), 'model.ckpt')
+    model.save(filename)
+    checkpoint = os.path.getsize(filename)
+    os.remove(filename)
+    outputs = model(x).items()
+    mutorch.set_default_dtype('float64')
+    return {'parameters': parameters, 'activations': peak - parameters, 'checkpoint': checkpoint,
+            'step': elapsed / args.epochs, 'loss': loss.item()}, outputs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hidden', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=6)
+    parser.add_argument('--epochs', type=int, default=500)
+    parser.add_argument('--backend', default='python')
+    args = parser.parse_args()
+    mutorch.set_backend(args.backend)
+
+    results = {dtype: train(dtype, args) for dtype in ('float64', 'float32')}
+    reference = results['float64'][1]
+    print(f'{"dtype":<10}{"params+state [KB]":>19}{"activations [KB]":>18}{"checkpoint [KB]":>17}'
+          f'{"step [ms]":>11}{"final loss":>14}{"max |out - out64|":>19}')
+    for dtype, (result, outputs) in results.items():
+        deviation = max(abs(a - b) for a, b in zip(outputs, reference))
+        print(f'{dtype:<10}{result["parameters"] / 1e3:>19.1f}{result["activations"] / 1e3:>18.1f}'
+              f'{result["checkpoint"] / 1e3:>17.1f}{result["step"] * 1e3:>11.3f}{result["loss"]:>14.3e}{deviation:>19.2e}')
+
+if __name__ == '__main__':
+    main()
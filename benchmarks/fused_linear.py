@@ -0,0 +1,34 @@
+""" Benchmark of a Linear layer with its activation fused into the layer, against the activation applied to the layer output.
+
+Usage: python -m benchmarks.fused_linear [--width 8] [--batch-size 4096] [--backend python]
+The defaults make the layer narrow, so that its elementwise work is not hidden by the matmul.
+"""
+import random
+import argparse
+
+import mutorch
+from mutorch import nn
+from mutorch.bench import random_tensor, timed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--width', type=int, default=8)
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--backend', default='python')
+    args = parser.parse_args()
+    mutorch.set_backend(args.backend)
+
+    random.seed(0)
+    x = random_tensor(args.batch_size, args.width, requires_grad=True)
+    print(f'{"activation":<12}{"separate [ms]":>16}{"fused [ms]":>14}{"speedup":>10}')
+    for activation in (nn.ReLU, nn.Tanh, nn.Sigmoid):
+        fused = nn.Linear(input_size=args.width, output_size=args.width, activation=activation())
+        # the same layer without activation, followed by the activation as a separate op
+        separate = nn.Linear(input_size=args.width, output_size=args.width, activation=None)
+        separate_activation = activation()
+        separate_time = timed(lambda: separate_activation(separate(x)).sum().backward(), repeat=10)
+        fused_time = timed(lambda: fused(x).sum().backward(), repeat=10)
+        print(f'{activation.__name__:<12}{separate_time * 1e3:>16.2f}{fused_time * 1e3:>14.2f}{separate_time / fused_time:>9.2f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+""" Benchmark of the lazy mode, which fuses chains of elementwise ops, against eager ops on array-backed tensors.
+
+Usage: python -m benchmarks.lazy_fusion [--width 64] [--batch-size 1024] [--backend python]
+Every workload runs forward and backward. The tape entries count the tensors recorded by the forward pass.
+"""
+import random
+import argparse
+import tracemalloc
+
+import mutorch
+from mutorch import nn
+from mutorch.bench import random_tensor, timed
+
+def allocations(fn):
+    """ Peak memory allocated while running fn, in bytes, and number of blocks allocated by it. """
+    tracemalloc.start()
+    before = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    out = fn()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename')) - before
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, blocks, out
+
+def tape_entries(out):
+    """ Number of tensors recorded on the tape behind out, out included. """
+    seen, stack = set(), [out]
+    while stack:
+        t = stack.pop()
+        if id(t) not in seen:
+            seen.add(id(t))
+            stack.extend(t._children_nodes)
+    return len(seen)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--width', type=int, default=64)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--backend', default='python')
+    args = parser.parse_args()
+    mutorch.set_backend(args.backend)
+
+    random.seed(0)
+    def tensor(rows, requires_grad=True):
+        return random_tensor(rows, args.width, requires_grad=requires_grad)
+    x, w, bias = tensor(args.batch_size, requires_grad=False), tensor(args.batch_size), tensor(1)
+    tanh = nn.Tanh()
+    workloads = (('readme chain', lambda: tanh(((x * w) + bias) / 2.2)),
+                 ('scaled residual', lambda: (x - w * 0.5).relu() * 2. + x),
+                 ('gated', lambda: (x * w).sigmoid() * (x + bias).tanh()))
+
+    print(f'{"workload":<18}{"mode":<8}{"tape":>6}{"blocks":>8}{"peak [KiB]":>12}{"time [ms]":>11}')
+    for name, forward in workloads:
+        for mode in ('eager', 'lazy'):
+            def step():
+                if mode == 'lazy':
+                    with mutorch.lazy():
+                        return forward()
+                return forward()
+            peak, blocks, out = allocations(lambda: step().sum())
+            entries = tape_entries(out)
+            elapsed = timed(lambda: step().sum().backward(), repeat=5)
+            print(f'{name:<18}{mode:<8}{entries:>6}{blocks:>8}{peak / 1024:>12.1f}{elapsed * 1e3:>11.2f}')
+
+if __name__ == '__main__':
+    main()
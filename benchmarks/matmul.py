@@ -0,0 +1,47 @@
+""" Benchmark of a dense layer computed with Tensor.matmul against the per-Neuron loop.
+
+Usage: python -m benchmarks.matmul [--batch-size 1] [--widths 64 256 1024]
+The Neuron loop holds millions of Nodes at width 1024, so keep the batch size small.
+"""
+import time
+import random
+import argparse
+
+import mutorch
+from mutorch import nn
+from mutorch.bench import random_tensor
+
+def neuron_loop(width, batch_size):
+    """ Forward and backward of a (width -> width) layer built from one Neuron per output. """
+    neurons = [nn.Neuron(width) for _ in range(width)]
+    x = random_tensor(batch_size, width, storage='node', requires_grad=True)
+    start = time.perf_counter()
+    out = mutorch.Tensor([[n.forward(x.data[i]) for n in neurons] for i in range(batch_size)])
+    out.backward()
+    return time.perf_counter() - start
+
+def matmul(width, batch_size):
+    """ Forward and backward of a (width -> width) layer computed as x @ W + b. """
+    weights = random_tensor(width, width, requires_grad=True)
+    bias = mutorch.Tensor([random.uniform(-1, 1) for _ in range(width)], storage='array')
+    x = random_tensor(batch_size, width, requires_grad=True)
+    start = time.perf_counter()
+    out = x @ weights
+    out = out + mutorch.Tensor([bias.items() for _ in range(batch_size)], storage='array')
+    out.backward()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--widths', type=int, nargs='+', default=[64, 256, 1024])
+    args = parser.parse_args()
+
+    print(f'{"width":<10}{"neurons [ms]":>16}{"matmul [ms]":>16}{"speedup":>10}')
+    for width in args.widths:
+        neuron_time = neuron_loop(width, args.batch_size)
+        matmul_time = matmul(width, args.batch_size)
+        print(f'{width:<10}{neuron_time * 1e3:>16.1f}{matmul_time * 1e3:>16.1f}{neuron_time / matmul_time:>9.1f}x')
+
+if __name__ == '__main__':
+    main()
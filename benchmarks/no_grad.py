@@ -0,0 +1,55 @@
+""" Benchmark of forward passes with and without the construction of the computational graph.
+
+Usage: python -m benchmarks.no_grad
+"""
+import time
+import random
+import tracemalloc
+
+import mutorch
+from mutorch import nn
+
+def node_forward():
+    """ A chain of Node ops, as in the node-level example of the README. """
+    out = mutorch.Node(0.5)
+    for i in range(2000):
+        out = nn.Tanh()((out * 1.01 + 0.1) / 1.2)
+    return out
+
+def mlp_forward(model, x):
+    """ A forward pass through a Sequential MLP. """
+    return model(x)
+
+def measure(fn, *args):
+    """ Peak traced memory, in bytes, and wall time, in seconds, of a call. """
+    start = time.perf_counter()
+    out = fn(*args)
+    elapsed = time.perf_counter() - start
+    del out
+    # tracing slows the call down, so the memory is measured on a separate run
+    tracemalloc.start()
+    out = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del out
+    return peak, elapsed
+
+def main():
+    random.seed(0)
+    model = nn.Sequential(
+                nn.Linear(input_size=64, output_size=64, activation=nn.Tanh()),
+                nn.Linear(input_size=64, output_size=64, activation=nn.ReLU()),
+                nn.Linear(input_size=64, output_size=1, activation=nn.Sigmoid())
+            )
+    x = [[random.uniform(-1, 1) for _ in range(64)] for _ in range(32)]
+
+    print(f'{"workload":<16}{"mode":<10}{"peak [KiB]":>12}{"time [ms]":>12}')
+    for name, fn, args in (('node chain', node_forward, ()), ('mlp forward', mlp_forward, (model, x))):
+        peak, elapsed = measure(fn, *args)
+        print(f'{name:<16}{"grad":<10}{peak / 1024:>12.1f}{elapsed * 1e3:>12.2f}')
+        with mutorch.no_grad():
+            peak, elapsed = measure(fn, *args)
+        print(f'{name:<16}{"no_grad":<10}{peak / 1024:>12.1f}{elapsed * 1e3:>12.2f}')
+
+if __name__ == '__main__':
+    main()
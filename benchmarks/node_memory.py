@@ -0,0 +1,51 @@
+""" Benchmark of the memory allocated per Node, and per forward pass of a node-level MLP.
+
+Usage: python -m benchmarks.node_memory
+"""
+import random
+import tracemalloc
+
+import mutorch
+from mutorch import nn
+from mutorch.bench import random_tensor
+
+def traced_bytes(fn):
+    """ Bytes still allocated by the objects returned by fn. """
+    tracemalloc.start()
+    out = fn()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del out
+    return allocated
+
+def leaves(n):
+    """ n leaf Nodes. """
+    return [mutorch.Node(float(i)) for i in range(n)]
+
+def products(n):
+    """ n op Nodes, each one with its children and backward closure, and their 2n leaves. """
+    return [mutorch.Node(float(i)) * mutorch.Node(2.) for i in range(n)]
+
+def mlp_forward(width, batch_size):
+    """ A forward pass through a two-layer MLP made of Neurons, whose graph holds one Node per op. """
+    layers = [[nn.Neuron(width) for _ in range(width)] for _ in range(2)]
+    x = random_tensor(batch_size, width, storage='node', requires_grad=True)
+    def forward():
+        out = x
+        for neurons in layers:
+            out = mutorch.Tensor([[n.forward(out.data[i]).tanh() for n in neurons] for i in range(batch_size)])
+        return out
+    return forward
+
+def main():
+    random.seed(0)
+    n = 100000
+    print(f'{"leaf Node":<28}{traced_bytes(lambda: leaves(n)) / n:>12.1f} B/node')
+    # every product holds one op Node and two leaves
+    print(f'{"op Node (with 2 leaves)":<28}{traced_bytes(lambda: products(n)) / n:>12.1f} B/op')
+    for width, batch_size in ((16, 8), (32, 8)):
+        forward = mlp_forward(width, batch_size)
+        print(f'{f"mlp forward {width}x{batch_size}":<28}{traced_bytes(forward) / 1024:>12.1f} KiB')
+
+if __name__ == '__main__':
+    main()
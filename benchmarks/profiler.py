@@ -0,0 +1,54 @@
+""" Benchmark of the overhead of the op-level profiler on the training steps of the MLP of the README.
+
+Usage: python -m benchmarks.profiler [--steps 50] [--trace trace.json]
+The steps are timed before any profile, under a profile with and without memory tracing, and after the profiles
+exit, which should run as fast as before. The summary of the profile without memory tracing is printed last.
+"""
+import time
+import random
+import argparse
+
+import mutorch
+from mutorch import nn, losses, optim
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--steps', type=int, default=50)
+    parser.add_argument('--trace', default=None, help='the path of a Chrome trace of the profiled steps')
+    args = parser.parse_args()
+
+    random.seed(0)
+    model = nn.Sequential(nn.Linear(5, 10, activation=nn.Tanh()),
+                          nn.Linear(10, 10, activation=nn.ReLU()),
+                          nn.Linear(10, 1, activation=nn.Sigmoid()))
+    x = mutorch.Tensor([[0.6, -0.35, 0.47, 0.71, 0.12], [0.3, 0.45, -0.67, -0.89, 0.23], [0.5, 0.65, 0.87, 0.99, 0.34],
+                        [0.7, -0.85, 0.97, -0.11, 0.45], [0.9, -0.01, -0.13, 0.25, -0.56], [-0.2, 0.32, -0.54, 0.76, 0.98]],
+                       requires_grad=False, storage='array')
+    y = mutorch.Tensor([[0.], [0.], [0.], [1.], [1.], [1.]], requires_grad=False, storage='array')
+    optimizer = optim.Adam(model.parameters(), lr=0.01)
+    loss_fn = losses.MSELoss()
+
+    def steps():
+        """ Wall time of a training step, in milliseconds. """
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            optimizer.zero_grad()
+            loss_fn(model(x), y).backward()
+            optimizer.step()
+        return (time.perf_counter() - start) / args.steps * 1e3
+
+    print(f'{"profiling":<24}{"step [ms]":>12}')
+    print(f'{"off, before":<24}{steps():>12.3f}')
+    with mutorch.profiler.profile(memory=True):
+        print(f'{"on, memory=True":<24}{steps():>12.3f}')
+    with mutorch.profiler.profile(memory=False) as profile:
+        print(f'{"on, memory=False":<24}{steps():>12.3f}')
+    print(f'{"off, after":<24}{steps():>12.3f}')
+    print()
+    print(profile.table(limit=20))
+    if args.trace is not None:
+        profile.export_chrome_trace(args.trace)
+        print(f'\n{len(profile.events)} events written to {args.trace}')
+
+if __name__ == '__main__':
+    main()
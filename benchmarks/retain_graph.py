@@ -0,0 +1,44 @@
+""" Benchmark of the memory held by a node-level training loop, with and without retaining the graph after backward.
+
+Usage: python -m benchmarks.retain_graph [--width 16] [--steps 5]
+"""
+import random
+import argparse
+import tracemalloc
+
+import mutorch
+from mutorch import nn
+from mutorch.bench import random_tensor
+
+def train(width, steps, retain_graph):
+    """ Run a few forward and backward passes through a two-layer MLP made of Neurons.
+    :return: the peak traced memory, and the memory still traced after the last step, in bytes
+    """
+    random.seed(0)
+    layers = [[nn.Neuron(width) for _ in range(width)] for _ in range(2)]
+    x = random_tensor(8, width, storage='node', requires_grad=True)
+    tracemalloc.start()
+    for _ in range(steps):
+        out = x
+        for neurons in layers:
+            out = mutorch.Tensor([[nn.Tanh()(n.forward(out.data[i])) for n in neurons] for i in range(8)])
+        # the loss of the previous step is only released here, once the new graph has been built
+        loss = out.sum()
+        loss.backward(retain_graph=retain_graph)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, current
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--width', type=int, default=16)
+    parser.add_argument('--steps', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f'{"retain_graph":<16}{"peak [KiB]":>14}{"held after [KiB]":>18}')
+    for retain_graph in (True, False):
+        peak, current = train(args.width, args.steps, retain_graph)
+        print(f'{str(retain_graph):<16}{peak / 1024:>14.1f}{current / 1024:>18.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+""" Load generator for the micro-batching inference server, against a server answering every request on its own.
+
+Usage: python -m benchmarks.serve [--clients 64] [--requests 4000] [--max-batch-size 32] [--max-latency-ms 5] [--backend python]
+Every client sends single-sample requests one after the other, awaiting each prediction before sending the next.
+"""
+import time
+import random
+import asyncio
+import argparse
+
+import mutorch
+from mutorch import nn, serve
+
+async def load(server, clients, requests, samples):
+    """ Send requests from concurrent clients, and return the wall time in seconds. """
+    remaining = [requests]
+    async def client():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            await server.predict(random.choice(samples))
+    start = time.perf_counter()
+    async with server:
+        await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-latency-ms', type=float, default=5.)
+    parser.add_argument('--backend', default='python')
+    args = parser.parse_args()
+    mutorch.set_backend(args.backend)
+
+    random.seed(0)
+    model = nn.Sequential(nn.Linear(16, 64, activation=nn.Tanh()),
+                          nn.Linear(64, 64, activation=nn.ReLU()),
+                          nn.Linear(64, 4, activation=nn.Softmax()))
+    samples = [[random.uniform(-1, 1) for _ in range(16)] for _ in range(256)]
+
+    print(f'{"server":<12}{"requests/s":>12}{"p50 [ms]":>10}{"p99 [ms]":>10}{"mean batch":>12}{"batches":>9}')
+    for name, max_batch_size in (('unbatched', 1), ('batched', args.max_batch_size)):
+        server = serve.BatchingServer(model, max_batch_size=max_batch_size, max_latency_ms=args.max_latency_ms)
+        elapsed = asyncio.run(load(server, args.clients, args.requests, samples))
+        metrics = server.metrics()
+        print(f'{name:<12}{args.requests / elapsed:>12.1f}{metrics["p50_ms"]:>10.2f}{metrics["p99_ms"]:>10.2f}'
+              f'{metrics["mean_batch_size"]:>12.2f}{metrics["batches"]:>9}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+""" Benchmark of the startup and the epoch time of a dataset read from shards, against the same dataset parsed from a CSV file.
+
+Usage: python -m benchmarks.shards [--rows 100000] [--width 16] [--batch-size 256] [--shuffle]
+The CSV file is converted to shards once, streaming its rows; this conversion is reported, but it is not part of
+the startup of the runs reading the shards.
+"""
+import os
+import csv
+import time
+import random
+import argparse
+import tempfile
+
+import mutorch
+from mutorch import data
+
+def timed(fn):
+    """ Wall time of fn, in seconds, and its result. """
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+def epoch(dataset, batch_size, shuffle):
+    """ Iterate over the batches of a dataset once. """
+    for x, y in data.DataLoader(dataset, batch_size=batch_size, shuffle=shuffle):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--width', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--shuffle', action='store_true')
+    args = parser.parse_args()
+
+    random.seed(0)
+    directory = tempfile.mkdtemp()
+    filename = os.path.join(directory, 'train.csv')
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        for _ in range(args.rows):
+            writer.writerow([random.uniform(-1, 1) for _ in range(args.width)] + [float(random.random() > 0.5)])
+
+    def parse_csv():
+        with open(filename, newline='') as f:
+            rows = [[float(value) for value in row] for row in csv.reader(f)]
+        return data.TensorDataset(mutorch.Tensor([row[:-1] for row in rows], requires_grad=False, storage='array'),
+                                  [row[-1] for row in rows])
+
+    def convert():
+        # stream the CSV file into one shard for the features and one for the labels, a chunk of rows at a time
+        with open(filename, newline='') as f, \
+             data.ShardWriter(os.path.join(directory, 'x.shard'), (args.width,)) as x, \
+             data.ShardWriter(os.path.join(directory, 'y.shard'), (1,)) as y:
+            chunk = []
+            for row in csv.reader(f):
+                chunk.append([float(value) for value in row])
+                if len(chunk) == 4096:
+                    x.write([row[:-1] for row in chunk])
+                    y.write([row[-1] for row in chunk])
+                    chunk = []
+            if chunk:
+                x.write([row[:-1] for row in chunk])
+                y.write([row[-1] for row in chunk])
+
+    def open_shards():
+        return data.ShardDataset(os.path.join(directory, 'x.shard'), os.path.join(directory, 'y.shard'))
+
+    conversion, _ = timed(convert)
+    print(f'CSV: {os.path.getsize(filename) / 2**20:.1f} MiB, converted to shards once in {conversion:.2f} s')
+    print(f'{"source":<8}{"startup [s]":>14}{"epoch [s]":>12}')
+    for name, load in (('csv', parse_csv), ('shards', open_shards)):
+        startup, dataset = timed(load)
+        elapsed, _ = timed(lambda: epoch(dataset, args.batch_size, args.shuffle))
+        print(f'{name:<8}{startup:>14.3f}{elapsed:>12.3f}')
+
+if __name__ == '__main__':
+    main()
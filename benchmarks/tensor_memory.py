@@ -0,0 +1,28 @@
+""" Benchmark of the memory held per element by node-backed and array-backed tensors.
+
+Usage: python -m benchmarks.tensor_memory
+"""
+import tracemalloc
+
+import mutorch
+
+def bytes_per_element(shape, storage):
+    """ Bytes still allocated per element after building a tensor of the given shape. """
+    rows, cols = shape
+    data = [[0.001 * (i * cols + j) for j in range(cols)] for i in range(rows)]
+    tracemalloc.start()
+    tensor = mutorch.Tensor(data, storage=storage)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tensor
+    return allocated / (rows * cols)
+
+def main():
+    print(f'{"shape":<16}{"node [B/elem]":>16}{"array [B/elem]":>16}')
+    for shape in ((10, 10), (100, 100), (300, 300)):
+        node_bytes = bytes_per_element(shape, 'node')
+        array_bytes = bytes_per_element(shape, 'array')
+        print(f'{str(shape):<16}{node_bytes:>16.1f}{array_bytes:>16.1f}')
+
+if __name__ == '__main__':
+    main()
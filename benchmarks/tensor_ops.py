@@ -0,0 +1,40 @@
+""" Benchmark of elementwise tensor ops, forward and backward, for node-backed and array-backed tensors.
+
+Usage: python -m benchmarks.tensor_ops
+"""
+import time
+
+import mutorch
+from mutorch import nn
+
+def step(x, w, bias):
+    """ The tensor-level example of the README, reduced to a scalar. """
+    z = (x * w) + bias
+    z = z / 2.2
+    z = nn.Tanh()(z)
+    loss = z.mean()
+    loss.backward()
+    return loss
+
+def time_step(size, storage, repeats=3):
+    """ Best-of-n time of a forward and backward pass on (size, size) tensors, in seconds. """
+    data = [[0.001 * (i * size + j) for j in range(size)] for i in range(size)]
+    best = float('inf')
+    for _ in range(repeats):
+        x = mutorch.Tensor(data, storage=storage)
+        w = mutorch.Tensor(data, storage=storage)
+        bias = mutorch.Tensor(data, storage=storage)
+        start = time.perf_counter()
+        step(x, w, bias)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    print(f'{"shape":<16}{"node [ms]":>12}{"array [ms]":>12}{"speedup":>10}')
+    for size in (16, 64, 128):
+        node_time = time_step(size, 'node')
+        array_time = time_step(size, 'array')
+        print(f'{str((size, size)):<16}{node_time * 1e3:>12.2f}{array_time * 1e3:>12.2f}{node_time / array_time:>9.1f}x')
+
+if __name__ == '__main__':
+    main()
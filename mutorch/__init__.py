@@ -1,10 +1,70 @@
-import os
-import sys
+""" MuTorch: a lightweight deep learning framework with a PyTorch-like API.
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(BASE_DIR)
+The names below are imported from their modules when they are first used, see core/exports.py,
+so that `import mutorch` is cheap for the tools and the worker processes that import it on every spawn.
+"""
+from .core.exports import lazy_exports
 
-from core import *
-from core import nn as nn
-from core import optim as optim
-from core import losses as losses
\ No newline at end of file
+_EXPORTS = {
+    # the autograd: nodes, tensors and modules
+    'Node': ('.core.node', 'Node'),
+    'Tensor': ('.core.tensor', 'Tensor'),
+    'Module': ('.core.module', 'Module'),
+    # the layers, optimizers, losses and datasets, also exported by their subpackages
+    'nn': ('.core.nn', None),
+    'Neuron': ('.core.nn.linear', 'Neuron'),
+    'Linear': ('.core.nn.linear', 'Linear'),
+    'Sequential': ('.core.nn.sequential', 'Sequential'),
+    'ReLU': ('.core.nn.relu', 'ReLU'),
+    'Sigmoid': ('.core.nn.sigmoid', 'Sigmoid'),
+    'Softmax': ('.core.nn.softmax', 'Softmax'),
+    'Tanh': ('.core.nn.tanh', 'Tanh'),
+    'optim': ('.core.optim', None),
+    'SGD': ('.core.optim.sgd', 'SGD'),
+    'Adam': ('.core.optim.adam', 'Adam'),
+    'AdamW': ('.core.optim.adamw', 'AdamW'),
+    'losses': ('.core.losses', None),
+    'MSELoss': ('.core.losses.mse', 'MSELoss'),
+    'L1Loss': ('.core.losses.l1', 'L1Loss'),
+    'SmoothL1Loss': ('.core.losses.l1', 'SmoothL1Loss'),
+    'NLLLoss': ('.core.losses.nll', 'NLLLoss'),
+    'CrossEntropyLoss': ('.core.losses.cross_entropy', 'CrossEntropyLoss'),
+    'data': ('.core.data', None),
+    'Dataset': ('.core.data.dataset', 'Dataset'),
+    'TensorDataset': ('.core.data.dataset', 'TensorDataset'),
+    'DataLoader': ('.core.data.dataloader', 'DataLoader'),
+    'Shard': ('.core.data.shards', 'Shard'),
+    'ShardWriter': ('.core.data.shards', 'ShardWriter'),
+    'ShardDataset': ('.core.data.shards', 'ShardDataset'),
+    # graph construction modes
+    'no_grad': ('.core.grad_mode', 'no_grad'),
+    'inference_mode': ('.core.grad_mode', 'inference_mode'),
+    'is_grad_enabled': ('.core.grad_mode', 'is_grad_enabled'),
+    'lazy': ('.core.fusion', 'lazy'),
+    'is_lazy_enabled': ('.core.fusion', 'is_lazy_enabled'),
+    # training steps compiled to straight-line code, not exported by `from mutorch import *`, see __all__
+    'compile': ('.core.compiler', 'compile'),
+    'CompiledStep': ('.core.compiler', 'CompiledStep'),
+    # state dicts saved to, and loaded lazily from, the binary checkpoints of checkpoint.py
+    'save': ('.core.checkpoint', 'save'),
+    'load': ('.core.checkpoint', 'load'),
+    'Checkpoint': ('.core.checkpoint', 'Checkpoint'),
+    # the compute backends and the dtype of their buffers
+    'set_backend': ('.core.kernels', 'set_backend'),
+    'get_backend': ('.core.kernels', 'get_backend'),
+    'register_backend': ('.core.kernels', 'register_backend'),
+    'set_default_dtype': ('.core.kernels', 'set_default_dtype'),
+    'get_default_dtype': ('.core.kernels', 'get_default_dtype'),
+    # data parallel training, serving and profiling
+    'parallel': ('.core.parallel', None),
+    'DataParallel': ('.core.parallel', 'DataParallel'),
+    'serve': ('.core.serve', None),
+    'BatchingServer': ('.core.serve', 'BatchingServer'),
+    'profiler': ('.core.profiler', None),
+    'profile': ('.core.profiler', 'profile'),
+}
+
+# a star import leaves out compile, which would shadow the builtin, and save and load, which would shadow the functions
+# of the same names imported from other modules: they are used as mutorch.compile, mutorch.save and mutorch.load
+__all__ = [name for name in _EXPORTS if name not in ('compile', 'save', 'load')]
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
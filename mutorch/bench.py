@@ -0,0 +1,246 @@
+""" The benchmark suite of the hot paths of mutorch, with regression tracking against a baseline.
+
+Usage: python -m mutorch.bench [--output results.json] [--baseline benchmarks/baseline.json] [--threshold 0.2]
+                               [--filter linear] [--quick] [--backend python]
+
+Every case times a single call of a hot path: importing mutorch in a fresh interpreter, Node arithmetic, Tensor elementwise ops and reductions,
+Linear forward and backward passes across widths and batch sizes, Sequential training steps with Adam,
+Softmax, and Sequential save and load. A case runs its call enough times to last --min-time seconds,
+--repeat times over with the garbage collector disabled, and reports the median and the minimum of the mean time
+of a call over the repeats. The results are written as JSON, and compared with the ones of a baseline written by
+a former run: a case whose minimum, the repeat least disturbed by the rest of the machine, is more than --threshold
+slower than in the baseline is a regression, and makes the exit status 1.
+The scripts of benchmarks/, each measuring a single feature, share the helpers random_tensor, timed and peak_memory.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tempfile
+import statistics
+import tracemalloc
+
+import mutorch
+from mutorch import nn, losses, optim
+
+def random_tensor(rows, cols, storage='array', requires_grad=False):
+    """ A (rows, cols) tensor of uniform random values in [-1, 1], drawn row by row from the global generator. """
+    return mutorch.Tensor([[random.uniform(-1, 1) for _ in range(cols)] for _ in range(rows)],
+                          requires_grad=requires_grad, storage=storage)
+
+def timed(fn, repeat=3):
+    """ Best wall time of fn over a few runs, in seconds, as measured by measure() for the cases of the suite. """
+    return measure(None, fn, 0., repeat)['min_s']
+
+def peak_memory(fn):
+    """ Peak memory allocated while running fn, in bytes. """
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def _mlp(width):
+    """ The MLP of the README, with hidden layers width wide. """
+    return nn.Sequential(nn.Linear(5, width, activation=nn.Tanh()),
+                         nn.Linear(width, width, activation=nn.ReLU()),
+                         nn.Linear(width, 1, activation=nn.Sigmoid()))
+
+def import_time(statement):
+    """ A fresh interpreter running a statement, as a worker process or a command line tool importing mutorch.
+    The startup of the interpreter is included: compare with the case running pass.
+    """
+    command = [sys.executable, '-c', statement]
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(mutorch.__file__))))
+    return None, lambda: subprocess.run(command, env=env, check=True)
+
+def node_arithmetic():
+    """ A chain of 100 steps of Node arithmetic and tanh. """
+    def run():
+        out = mutorch.Node(0.5)
+        for _ in range(100):
+            out = ((out * 1.01 + 0.1) / 1.2 - 0.05) ** 2
+            out = out.tanh()
+        return out
+    return None, run
+
+def tensor_elementwise(storage, size):
+    """ A chain of elementwise ops on two (size, size) tensors. """
+    a, b = random_tensor(size, size, storage), random_tensor(size, size, storage)
+    return None, lambda: ((a * b + a - b) / 2.).tanh()
+
+def tensor_reduction(storage, size):
+    """ The sum, mean and maximum of a (size, size) tensor. """
+    a = random_tensor(size, size, storage)
+    return None, lambda: (a.sum(), a.mean(), a.max())
+
+def linear_forward(width, batch_size):
+    """ The forward pass of a (width, width) Linear layer with tanh. """
+    layer = nn.Linear(width, width, activation=nn.Tanh())
+    x = random_tensor(batch_size, width)
+    return None, lambda: layer(x)
+
+def linear_backward(width, batch_size):
+    """ The backward pass of a (width, width) Linear layer with tanh, the forward pass being run before the timer starts. """
+    layer = nn.Linear(width, width, activation=nn.Tanh())
+    x = random_tensor(batch_size, width)
+    def prepare():
+        layer.zero_grad()
+        return layer(x).sum()
+    return prepare, lambda out: out.backward()
+
+def sequential_step(width, batch_size):
+    """ A training step of the MLP of the README with Adam and the mean squared error. """
+    model = _mlp(width)
+    optimizer = optim.Adam(model.parameters(), lr=0.001)
+    loss_fn = losses.MSELoss()
+    x, y = random_tensor(batch_size, 5), random_tensor(batch_size, 1)
+    def run():
+        optimizer.zero_grad()
+        loss_fn(model(x), y).backward()
+        optimizer.step()
+    return None, run
+
+def softmax(rows, cols):
+    """ The softmax of the rows of a (rows, cols) tensor. """
+    layer = nn.Softmax(dim=1)
+    x = random_tensor(rows, cols)
+    return None, lambda: layer(x)
+
+def sequential_save(width):
+    """ Writing the checkpoint of the MLP of the README. """
+    model = _mlp(width)
+    filename = os.path.join(tempfile.mkdtemp(), 'model.ckpt')
+    return None, lambda: model.save(filename)
+
+def sequential_load(width):
+    """ Reading the checkpoint of the MLP of the README into a model. """
+    model = _mlp(width)
+    filename = os.path.join(tempfile.mkdtemp(), 'model.ckpt')
+    model.save(filename)
+    return None, lambda: model.load(filename)
+
+def cases(quick=False):
+    """ Return the (name, factory, arguments) of every case. A factory returns a prepare function, or None,
+    and the function timed, called with the output of prepare if any.
+    :param quick: whether to keep the smaller sizes only
+    """
+    sizes = (16,) if quick else (16, 64)
+    widths = (16,) if quick else (16, 64, 128)
+    batch_sizes = (1, 32) if quick else (1, 32, 128)
+    suite = [('import.python', import_time, ('pass',)),
+             ('import.mutorch', import_time, ('import mutorch',)),
+             ('import.mutorch.nn', import_time, ('import mutorch; mutorch.nn.Linear',)),
+             ('node.arithmetic', node_arithmetic, ())]
+    for size in sizes:
+        suite.append((f'tensor.elementwise.node.{size}', tensor_elementwise, ('node', size // 2)))
+        suite.append((f'tensor.elementwise.array.{size}', tensor_elementwise, ('array', size)))
+        suite.append((f'tensor.reduction.array.{size}', tensor_reduction, ('array', size)))
+    for width in widths:
+        for batch_size in batch_sizes:
+            suite.append((f'linear.forward.w{width}.b{batch_size}', linear_forward, (width, batch_size)))
+            suite.append((f'linear.backward.w{width}.b{batch_size}', linear_backward, (width, batch_size)))
+    for width in widths:
+        suite.append((f'sequential.step.adam.w{width}.b32', sequential_step, (width, 32)))
+    suite.append(('softmax.32x100', softmax, (32, 100)))
+    for width in widths:
+        suite.append((f'sequential.save.w{width}', sequential_save, (width,)))
+        suite.append((f'sequential.load.w{width}', sequential_load, (width,)))
+    return suite
+
+def measure(prepare, run, min_time, repeat):
+    """ Time the calls of run, and return the median and the minimum over the repeats of the mean time of a call, in seconds. """
+    def timed(number):
+        elapsed = 0.
+        for _ in range(number):
+            args = () if prepare is None else (prepare(),)
+            start = time.perf_counter()
+            run(*args)
+            elapsed += time.perf_counter() - start
+        return elapsed
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        # the number of calls of a repeat, so that it lasts min_time
+        number = max(1, int(min_time / max(timed(1), 1e-9)))
+        means = [timed(number) / number for _ in range(repeat)]
+    finally:
+        if enabled:
+            gc.enable()
+    return {'median_s': statistics.median(means), 'min_s': min(means), 'number': number, 'repeat': repeat}
+
+def run(suite, min_time=0.1, repeat=5, log=print):
+    """ Run the cases of a suite, and return the results as a JSON-serializable dict. """
+    results = {}
+    for name, factory, args in suite:
+        random.seed(0)
+        results[name] = measure(*factory(*args), min_time, repeat)
+        log(f'{name:<36}{results[name]["median_s"] * 1e3:>12.4f} ms')
+    return {'meta': {'python': platform.python_version(), 'platform': platform.platform(),
+                     'backend': mutorch.get_backend(), 'dtype': mutorch.get_default_dtype(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+def compare(results, baseline, threshold):
+    """ Compare results with a baseline.
+    :param threshold: the relative slowdown of the minimum of a case past which it regressed, e.g. 0.1 for 10%
+    :return: the lines of the comparison table, and the names of the cases that regressed
+    """
+    lines = [f'{"case":<36}{"baseline [ms]":>15}{"now [ms]":>12}{"ratio":>8}  status']
+    regressions = []
+    for name, result in results['results'].items():
+        if name not in baseline['results']:
+            lines.append(f'{name:<36}{"-":>15}{result["min_s"] * 1e3:>12.4f}{"-":>8}  new')
+            continue
+        before = baseline['results'][name]['min_s']
+        ratio = result['min_s'] / before
+        if ratio > 1 + threshold:
+            status = 'REGRESSED'
+            regressions.append(name)
+        elif ratio < 1 / (1 + threshold):
+            status = 'improved'
+        else:
+            status = 'ok'
+        lines.append(f'{name:<36}{before * 1e3:>15.4f}{result["min_s"] * 1e3:>12.4f}{ratio:>8.2f}  {status}')
+    for key in ('backend', 'dtype', 'python'):
+        if baseline['meta'].get(key) != results['meta'][key]:
+            lines.append(f'warning: the baseline ran with {key} {baseline["meta"].get(key)}, these results with {results["meta"][key]}')
+    return lines, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default=None, help='the path of the JSON results')
+    parser.add_argument('--baseline', default=None, help='the path of the JSON results of a former run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='the relative slowdown of a regression')
+    parser.add_argument('--filter', default=None, help='run the cases whose name contains this string only')
+    parser.add_argument('--quick', action='store_true', help='run the smaller sizes only')
+    parser.add_argument('--backend', default='python')
+    parser.add_argument('--min-time', type=float, default=0.1, help='the duration of a repeat, in seconds')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    mutorch.set_backend(args.backend)
+
+    suite = [case for case in cases(args.quick) if args.filter is None or args.filter in case[0]]
+    results = run(suite, args.min_time, args.repeat)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline is None:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    lines, regressions = compare(results, baseline, args.threshold)
+    print()
+    print('\n'.join(lines))
+    if regressions:
+        print(f'\n{len(regressions)} case(s) regressed by more than {args.threshold:.0%}: {", ".join(regressions)}')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1 @@
-import os
-import sys
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(BASE_DIR)
-
-from inspect import isclass
-from pkgutil import iter_modules
-from pathlib import Path
-from importlib import import_module
-
-# iterate through the modules in the current package
-package_dir = os.path.abspath(os.path.join(__file__, '../'))
-for (_, module_name, _) in iter_modules([package_dir]):
-
-    # import the module and iterate through its attributes
-    module = import_module(f"{__name__}.{module_name}")
-    for attribute_name in dir(module):
-        attribute = getattr(module, attribute_name)
-
-        if isclass(attribute):            
-            # Add the class to this package's variables
-            globals()[attribute_name] = attribute
\ No newline at end of file
+""" The core of mutorch: autograd, kernels and training utilities, exported by the mutorch package. """
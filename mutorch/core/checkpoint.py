@@ -0,0 +1,130 @@
+""" This file contains the checkpoint format: the named parameters of a model stored as raw arrays, read back through mmap.
+
+A checkpoint starts with the magic b'MUCK', a version (u8), 3 padding bytes and the length of its header (u64),
+all little-endian, followed by the header: a JSON object mapping the name of every tensor to its typecode,
+its shape, and the offset of its values from the start of the data. The data starts at the first multiple of 64
+bytes after the header, and holds the values of every tensor, in row-major order, as contiguous little-endian floats.
+Opening a checkpoint reads its header only: the values of a tensor are read when it is looked up by name.
+"""
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+from . import kernels
+from .tensor import Tensor, _as_array
+
+_MAGIC = b'MUCK'
+_VERSION = 1
+_PREFIX = struct.Struct('<4sB3xQ')
+_ALIGNMENT = 64
+
+def _aligned(n):
+    """ Return the first multiple of the alignment from n. """
+    return (n + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+def is_checkpoint(filename):
+    """ Return whether a file is a checkpoint, rather than e.g. a pickle written by former versions of Sequential.save. """
+    with open(filename, 'rb') as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+def save(state_dict, filename):
+    """ Write a state dict to a checkpoint.
+    :param state_dict: a dict mapping names to tensors, as returned by Module.state_dict()
+    :param filename: the path of the checkpoint
+    """
+    tensors, buffers, offset = {}, [], 0
+    for name, value in state_dict.items():
+        value = _as_array(value)
+        storage = value._storage
+        tensors[name] = {'typecode': kernels.typecode_of(storage), 'shape': list(value.shape), 'offset': offset}
+        buffers.append(storage)
+        offset = _aligned(offset + len(storage) * storage.itemsize)
+    header = json.dumps({'tensors': tensors}).encode()
+    start = _aligned(_PREFIX.size + len(header))
+    with open(filename, 'wb') as f:
+        f.write(_PREFIX.pack(_MAGIC, _VERSION, len(header)) + header.ljust(start - _PREFIX.size, b' '))
+        for name, storage in zip(tensors, buffers):
+            f.seek(start + tensors[name]['offset'])
+            if sys.byteorder != 'little':
+                storage = array.array(kernels.typecode_of(storage), storage)
+                storage.byteswap()
+            f.write(storage.tobytes())
+
+class Checkpoint:
+    def __init__(self, filenames):
+        """ A read-only dict of the tensors of one or several checkpoints, mapped in memory.
+        Looking a tensor up copies its values out of the page cache, the others are not read,
+        so that a single layer can be loaded out of a large checkpoint.
+        :param filenames: the path of a checkpoint, or the paths of the shards of a checkpoint, each holding some of the tensors
+        """
+        self.filenames = [filenames] if isinstance(filenames, (str, os.PathLike)) else list(filenames)
+        self._mmaps = []
+        self._tensors = {}
+        for filename in self.filenames:
+            with open(filename, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmaps.append(mapped)
+            magic, version, size = _PREFIX.unpack_from(mapped, 0)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f'{filename} is not a checkpoint, or was written by another version of the format.')
+            start = _aligned(_PREFIX.size + size)
+            for name, entry in json.loads(mapped[_PREFIX.size:_PREFIX.size + size])['tensors'].items():
+                if name in self._tensors:
+                    raise ValueError(f'The tensor {name} is stored in more than one shard.')
+                self._tensors[name] = (mapped, start + entry['offset'], entry['typecode'], tuple(entry['shape']))
+
+    def __getitem__(self, name):
+        """ Returns a tensor, read from the checkpoint, that does not require gradient. """
+        mapped, offset, typecode, shape = self._tensors[name]
+        size = 1
+        for n in shape:
+            size *= n
+        values = array.array(typecode)
+        values.frombytes(mapped[offset:offset + size * values.itemsize])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return Tensor._from_storage(values, shape, requires_grad=False)
+
+    def shape(self, name):
+        """ Returns the shape of a tensor, without reading it. """
+        return self._tensors[name][3]
+
+    def keys(self):
+        return self._tensors.keys()
+
+    def items(self):
+        return ((name, self[name]) for name in self._tensors)
+
+    def __iter__(self):
+        return iter(self._tensors)
+
+    def __contains__(self, name):
+        return name in self._tensors
+
+    def __len__(self):
+        return len(self._tensors)
+
+    def close(self):
+        """ Unmap the checkpoint. """
+        for mapped in self._mmaps:
+            mapped.close()
+        self._mmaps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return f"Checkpoint(filenames={self.filenames}, tensors={len(self)})"
+
+def load(filenames):
+    """ Open a checkpoint, see Checkpoint.
+    :param filenames: the path of a checkpoint, or the paths of its shards
+    :return: a read-only dict of the tensors of the checkpoint, to pass to Module.load_state_dict
+    """
+    return Checkpoint(filenames)
@@ -0,0 +1,193 @@
+""" This file contains mutorch.compile: the training steps of a Sequential model replayed as straight-line code.
+
+The first step traces the layers of the model and the loss for the shapes of its batch, and generates
+a python function calling, one after the other, the kernels that the eager forward and backward passes
+would call, on the buffers of the inputs and of the parameters. Later steps with the same shapes run
+that function with their own inputs and the current parameter values: no Tensor, tape entry or backward
+closure is created, and no graph is walked. The gradients are accumulated into the parameters as
+loss.backward() does, and are the same as those of the eager steps.
+A step with other shapes, or a model with a layer or a loss the tracer does not know, runs eagerly.
+"""
+import array
+from . import kernels
+from . import tensor
+from .grad_mode import is_grad_enabled
+
+class _Unsupported(Exception):
+    """ Raised while tracing a layer or a loss that has no compiled form. """
+
+class _Program:
+    """ The lines of the generated step function, and the objects they read. """
+    def __init__(self):
+        self.lines = []
+        self.globals = {'kernels': kernels, 'array': array}
+        self._names = 0
+
+    def name(self, prefix='v'):
+        """ Return a new variable name. """
+        self._names += 1
+        return f'{prefix}{self._names}'
+
+    def bind(self, value, prefix):
+        """ Return the name of a global of the generated function holding a value. """
+        name = self.name(prefix)
+        self.globals[name] = value
+        return name
+
+    def emit(self, line):
+        self.lines.append(f'    {line}')
+
+def _trace_linear(program, layer, h, shape, requires_grad):
+    """ Emit the forward pass of a Linear layer, and return its output, output shape and backward emitter. """
+    (m, k), n = shape, layer.output_size
+    if k != layer.input_size:
+        raise _Unsupported(f'Input size must be {layer.input_size} but got {k}')
+    weight, bias = program.bind(layer.weight, 'P'), program.bind(layer.bias, 'P')
+    fused = getattr(layer.activation, '_kernel', None)
+    out = program.name()
+    program.emit(f'{out} = kernels.matmul({h}, {weight}._storage, {m}, {k}, {n})')
+    program.emit(f'{out} = kernels.bias_activation({out}, {bias}._storage, {m}, {n}, {fused!r})')
+
+    def backward(g):
+        if fused:
+            program.emit(f'{g} = kernels.{fused}_grad({g}, {out})')
+        if layer.weight.requires_grad:
+            program.emit(f'kernels.accumulate({weight}._grad_buffer(), '
+                         f'kernels.matmul(kernels.transpose({h}, {m}, {k}), {g}, {k}, {m}, {n}))')
+        if layer.bias.requires_grad:
+            program.emit(f'kernels.accumulate({bias}._grad_buffer(), kernels.sum_rows({g}, {m}, {n}))')
+        if not requires_grad:
+            return None
+        program.emit(f'{g} = kernels.matmul({g}, kernels.transpose({weight}._storage, {k}, {n}), {m}, {n}, {k})')
+        return g
+
+    backwards = [backward]
+    activation = layer.activation
+    if activation and fused is None:
+        if type(activation).__name__ != 'Softmax' or not activation._requires_grad:
+            raise _Unsupported(f'No compiled form for the activation {activation}')
+        # the (outer, n, inner) blocks of Tensor.softmax, for a 2D tensor
+        dim = activation.dim % 2
+        outer, size, inner = (m, n, 1) if dim == 1 else (1, m, n)
+        y = program.name()
+        program.emit(f'{y} = kernels.softmax({out}, {outer}, {size}, {inner})')
+        def softmax_backward(g):
+            program.emit(f'{g} = kernels.softmax_grad({g}, {y}, {outer}, {size}, {inner})')
+            return g
+        backwards.append(softmax_backward)
+        out = y
+    weight_grad = layer.weight.requires_grad or layer.bias.requires_grad
+    return out, (m, n), requires_grad or weight_grad, backwards
+
+def _trace_loss(program, loss_fn, p, shape, targets):
+    """ Emit the loss and the start of the backward pass, seeded as loss.backward() does.
+    :return: the name of the gradient of the model outputs
+    """
+    m, n = shape
+    size = m * n
+    kind = type(loss_fn).__name__
+    if kind == 'MSELoss':
+        # ((p - t) ** 2).mean(), on targets of the shape of the outputs
+        if targets.shape != shape:
+            raise _Unsupported(f'The targets must have shape {shape}, but got {targets.shape}')
+        d = program.name()
+        program.emit(f'{d} = kernels.sub({p}, y._storage)')
+        program.emit(f'loss = kernels.total(kernels.power({d}, 2.)) / {size}')
+        program.emit(f'g = kernels.power_grad(kernels.full({size}, 1. / {size}), {d}, 2.)')
+        if targets.requires_grad:
+            program.emit('kernels.accumulate(y._grad_buffer(), kernels.neg(g))')
+        return 'g'
+    if kind == 'CrossEntropyLoss':
+        from .losses.cross_entropy import _targets
+        program.globals['_targets'] = _targets
+        program.emit(f'targets = _targets(y, {m}, {n})')
+        program.emit(f'loss, probs = kernels.cross_entropy({p}, targets, {m}, {n})')
+        program.emit(f'g = kernels.cross_entropy_grad(1., probs, targets, {m}, {n})')
+        return 'g'
+    raise _Unsupported(f'No compiled form for the loss {loss_fn}')
+
+class CompiledStep:
+    def __init__(self, model, loss_fn):
+        """ A training step of a Sequential model, compiled for the shapes of its first batch.
+        :param model: a Sequential model of Linear layers
+        :param loss_fn: MSELoss or CrossEntropyLoss
+        """
+        self.model = model
+        self.loss_fn = loss_fn
+        self.source = None
+        self._signature = None
+        self._step = None
+
+    def _prepare(self, inputs, targets):
+        """ Return the inputs, and the targets of the elementwise loss, as array-backed tensors,
+        converted as the eager layers and losses do. """
+        if not 'Tensor' in str(type(inputs)) or inputs.storage != 'array':
+            inputs = tensor.Tensor(inputs.detach() if 'Tensor' in str(type(inputs)) else inputs,
+                                   requires_grad=False, storage='array')
+        if type(self.loss_fn).__name__ != 'CrossEntropyLoss':
+            targets = tensor._as_array(targets)
+        return inputs, targets
+
+    def _signature_of(self, x, y):
+        """ The shapes and gradient flags a compiled step is specialized to. """
+        return (x.shape, x.requires_grad, getattr(y, 'shape', None), getattr(y, 'requires_grad', None),
+                tuple(p.requires_grad for p in self.model.parameters()))
+
+    def _trace(self, x, y):
+        """ Generate the step function for the shapes of x and y, or return None if it has no compiled form. """
+        program = _Program()
+        if type(self.model).__name__ != 'Sequential' or len(x.shape) != 2:
+            return None
+        h, shape, requires_grad, backwards = 'x._storage', x.shape, x.requires_grad, []
+        try:
+            for layer in self.model.layers:
+                if type(layer).__name__ != 'Linear':
+                    raise _Unsupported(f'No compiled form for the layer {layer}')
+                h, shape, requires_grad, layer_backwards = _trace_linear(program, layer, h, shape, requires_grad)
+                backwards += layer_backwards
+            g = _trace_loss(program, self.loss_fn, h, shape, y)
+        except _Unsupported:
+            return None
+        # the backward pass runs the layers in reverse order, down to the first input requiring gradient
+        for backward in reversed(backwards):
+            g = backward(g)
+            if g is None:
+                break
+        if g is not None:
+            program.emit(f'kernels.accumulate(x._grad_buffer(), {g})')
+        program.emit('return loss')
+
+        self.source = '\n'.join(['def step(x, y):'] + program.lines)
+        exec(self.source, program.globals)
+        return program.globals['step']
+
+    def __call__(self, inputs, targets):
+        """ Run a training step: the forward pass, the loss, and the backward pass accumulating the
+        gradients of the parameters, as loss_fn(model(inputs), targets).backward() does.
+        :param inputs: the (batch, features) inputs
+        :param targets: the targets, as taken by the loss function
+        :return: the loss, as a (1, 1) tensor outside of the graph
+        """
+        x, y = self._prepare(inputs, targets)
+        signature = self._signature_of(x, y)
+        if self._signature is None:
+            self._signature = signature
+            self._step = self._trace(x, y)
+        if self._step is None or signature != self._signature or not is_grad_enabled():
+            # other shapes, no compiled form, or no graph to backpropagate through: an eager step
+            loss = self.loss_fn(self.model(x), y)
+            loss.backward()
+            return loss
+        loss = self._step(x, y)
+        return tensor.Tensor._from_storage(array.array(kernels.typecode, [loss]), (1, 1), requires_grad=False)
+
+    def __repr__(self):
+        return f"CompiledStep(model={type(self.model).__name__}, loss_fn={self.loss_fn})"
+
+def compile(model, loss_fn):
+    """ Compile the training steps of a Sequential model, see CompiledStep.
+    :param model: a Sequential model of Linear layers
+    :param loss_fn: the loss function, called as loss_fn(outputs, targets)
+    :return: a function running a step as step(inputs, targets), and returning the loss
+    """
+    return CompiledStep(model, loss_fn)
@@ -0,0 +1,15 @@
+""" The datasets, the data loader and the shard format. """
+from ..exports import lazy_exports
+
+_EXPORTS = {
+    'Dataset': ('.dataset', 'Dataset'),
+    'TensorDataset': ('.dataset', 'TensorDataset'),
+    'DataLoader': ('.dataloader', 'DataLoader'),
+    'Shard': ('.shards', 'Shard'),
+    'ShardWriter': ('.shards', 'ShardWriter'),
+    'ShardDataset': ('.shards', 'ShardDataset'),
+    'write_shard': ('.shards', 'write_shard'),
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,102 @@
+""" This file contains the DataLoader, which iterates over a dataset in mini-batches. """
+import random
+import itertools
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from ..tensor import Tensor
+
+def default_collate(samples):
+    """ Stack samples into batch tensors that do not require gradient.
+    A tuple sample holds one field per tensor of the batch, any other sample is a single field.
+    A field of scalars is stacked into a (batch, 1) tensor, a field of nested lists, or of tensors, 
+    into a tensor with one row per sample.
+    :return: a tuple of batch tensors, one per field
+    """
+    if not isinstance(samples[0], tuple):
+        samples = [(sample,) for sample in samples]
+    batch = []
+    for field in zip(*samples):
+        if isinstance(field[0], (int, float)):
+            rows = [[value] for value in field]
+        elif 'Tensor' in str(type(field[0])):
+            # a (1, n) row vector is a row of n values
+            rows = [t.detach()[0] if t.shape[0] == 1 else t.detach() for t in field]
+        else:
+            rows = list(field)
+        batch.append(Tensor(rows, requires_grad=False, storage='array'))
+    return tuple(batch)
+
+class DataLoader:
+    def __init__(self, dataset, batch_size=1, shuffle=False, drop_last=False, 
+                       num_workers=0, prefetch=2, collate_fn=default_collate):
+        """ Iterate over a dataset in mini-batches of array-backed tensors.
+        With workers, the batches are built in background threads while the previous batches are consumed,
+        and are still returned in order.
+        :param dataset: the dataset to read the samples from
+        :param batch_size: the number of samples per batch
+        :param shuffle: whether to visit the samples in a new random order at every iteration
+        :param drop_last: whether to drop the last batch when it holds fewer than batch_size samples
+        :param num_workers: the number of background threads building batches, 0 to build them when requested
+        :param prefetch: the number of batches built ahead by every worker
+        :param collate_fn: the function stacking a list of samples into a batch, used when the dataset
+                           has no __getitems__ method to read a whole batch
+        """
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be positive, but got {batch_size}.')
+        if num_workers < 0 or prefetch < 1:
+            raise ValueError(f'num_workers must be non-negative and prefetch positive, but got {num_workers} and {prefetch}.')
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.num_workers = num_workers
+        self.prefetch = prefetch
+        self.collate_fn = collate_fn
+
+    def _batches(self):
+        """ Iterate over the indices of the samples of every batch. """
+        indices = list(range(len(self.dataset)))
+        if self.shuffle:
+            random.shuffle(indices)
+        for start in range(0, len(indices), self.batch_size):
+            batch = indices[start:start + self.batch_size]
+            if len(batch) < self.batch_size and self.drop_last:
+                return
+            yield batch
+
+    def _fetch(self, indices):
+        """ Read the samples of a batch and stack them. """
+        if hasattr(self.dataset, '__getitems__'):
+            return self.dataset.__getitems__(indices)
+        return self.collate_fn([self.dataset[i] for i in indices])
+
+    def __iter__(self):
+        """ Iterate over the batches. """
+        batches = self._batches()
+        if self.num_workers == 0:
+            for indices in batches:
+                yield self._fetch(indices)
+            return
+
+        pool = ThreadPoolExecutor(max_workers=self.num_workers)
+        try:
+            # keep num_workers * prefetch batches in flight, and hand them out in order
+            pending = collections.deque(pool.submit(self._fetch, indices) 
+                                        for indices in itertools.islice(batches, self.num_workers * self.prefetch))
+            while pending:
+                batch = pending.popleft().result()
+                for indices in itertools.islice(batches, 1):
+                    pending.append(pool.submit(self._fetch, indices))
+                yield batch
+        finally:
+            # an iteration left early does not wait for the batches built ahead
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def __len__(self):
+        """ Returns the number of batches. """
+        if self.drop_last:
+            return len(self.dataset) // self.batch_size
+        return (len(self.dataset) + self.batch_size - 1) // self.batch_size
+
+    def __repr__(self):
+        return f"DataLoader(batch_size={self.batch_size}, shuffle={self.shuffle}, drop_last={self.drop_last}, num_workers={self.num_workers}, prefetch={self.prefetch})"
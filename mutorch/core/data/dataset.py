@@ -0,0 +1,65 @@
+""" This file contains the datasets read by the DataLoader. """
+import array
+from .. import kernels
+from ..tensor import Tensor, _parse_nested, _nest
+
+class Dataset:
+    def __init__(self):
+        """ Base class for all datasets: a sequence of samples, read by index.
+        A dataset that can read a whole batch faster than sample by sample also defines
+        __getitems__(indices), returning the batch directly.
+        """
+
+    def __getitem__(self, index):
+        """ Returns the sample at an index. """
+        raise NotImplementedError
+
+    def __len__(self):
+        """ Returns the number of samples. """
+        raise NotImplementedError
+
+class TensorDataset(Dataset):
+    def __init__(self, *tensors):
+        """ A dataset of the rows of tensors: the i-th sample holds the i-th row of every tensor, along their first dimension.
+        :param tensors: tensors, or nested lists, with the same number of rows. A flat list holds one scalar per row.
+        """
+        super().__init__()
+        self._fields = []
+        for t in tensors:
+            if 'Tensor' in str(type(t)):
+                # the rows are copied out of a node-backed tensor, an array-backed one is read in place
+                storage, shape = t.to_array()._storage, t.shape
+            else:
+                values, shape = _parse_nested(t)
+                if isinstance(t, list) and not isinstance(t[0], list):
+                    shape = (len(t), 1)
+                storage = array.array(kernels.typecode, values)
+            self._fields.append((storage, shape[1:], len(storage) // shape[0]))
+            if shape[0] != len(self):
+                raise ValueError(f'All the tensors must have the same number of rows, but got {shape[0]} and {len(self)}.')
+
+    def __getitem__(self, index):
+        """ Returns the rows at an index, one per tensor, as nested python lists. """
+        if not -len(self) <= index < len(self):
+            raise IndexError(f'Index {index} is out of range for a dataset of {len(self)} samples.')
+        index = index % len(self)
+        return tuple(_nest(storage[index * size:(index + 1) * size].tolist(), row_shape)
+                     for storage, row_shape, size in self._fields)
+
+    def __getitems__(self, indices):
+        """ Returns the rows at a list of indices as batch tensors, one per tensor, that do not require gradient. """
+        batch = []
+        for storage, row_shape, size in self._fields:
+            values = array.array(kernels.typecode_of(storage))
+            for index in indices:
+                values.extend(storage[index * size:(index + 1) * size])
+            batch.append(Tensor._from_storage(values, (len(indices),) + row_shape, requires_grad=False))
+        return tuple(batch)
+
+    def __len__(self):
+        """ Returns the number of rows. """
+        storage, _, size = self._fields[0]
+        return len(storage) // size
+
+    def __repr__(self):
+        return f"TensorDataset(size={len(self)}, tensors={len(self._fields)})"
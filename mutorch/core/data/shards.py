@@ -0,0 +1,215 @@
+""" This file contains the shard format: tensors stored on disk as raw values, read back through mmap.
+
+A shard holds a single tensor. It starts with a 64-byte header:
+    magic b'MUSH', version (u8), typecode (b'd' for float64, b'f' for float32), number of dimensions (u8),
+    1 padding byte, then the dimensions (u64 each, at most 4)
+all little-endian, followed by the values of the tensor in row-major order, as little-endian floats.
+A large tensor is split along its first dimension into several shards, read back as a single dataset.
+"""
+import os
+import sys
+import mmap
+import array
+import struct
+import bisect
+from .. import kernels
+from ..tensor import Tensor, _parse_nested, _nest
+from .dataset import Dataset
+
+_MAGIC = b'MUSH'
+_VERSION = 1
+_HEADER_SIZE = 64
+_HEADER = struct.Struct('<4sBcBx')
+_TYPECODES = ('d', 'f')
+
+def _little_endian(values):
+    """ Swap the bytes of an array in place on big-endian machines, so that it holds little-endian values. """
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+def _rows(data, typecode):
+    """ Return the row-major values of a tensor, or nested lists, and its shape. """
+    if 'Tensor' in str(type(data)):
+        return array.array(typecode, data.to_array()._storage), data.shape
+    values, shape = _parse_nested(data)
+    if isinstance(data, list) and not isinstance(data[0], list):
+        # a flat list holds one scalar per row
+        shape = (len(data), 1)
+    return array.array(typecode, values), tuple(shape)
+
+class ShardWriter:
+    def __init__(self, filename, row_shape, typecode='d'):
+        """ Write a shard row by row, without holding the whole tensor in memory.
+        The number of rows is written in the header when the writer is closed.
+        :param filename: the path of the shard
+        :param row_shape: the shape of a row, i.e. of the tensor without its first dimension
+        :param typecode: 'd' to store float64 values, 'f' to store float32 values
+        """
+        if typecode not in _TYPECODES:
+            raise ValueError(f'typecode must be one of {_TYPECODES}, but got {typecode!r}.')
+        if len(row_shape) > 3:
+            raise ValueError('The tensor must have a maximum of 4 dimensions.')
+        self.filename = filename
+        self.row_shape = tuple(row_shape)
+        self.typecode = typecode
+        self.rows = 0
+        self._file = open(filename, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        shape = (self.rows,) + self.row_shape
+        header = _HEADER.pack(_MAGIC, _VERSION, self.typecode.encode(), len(shape))
+        header += struct.pack(f'<{len(shape)}Q', *shape)
+        self._file.write(header.ljust(_HEADER_SIZE, b'\0'))
+
+    def write(self, data):
+        """ Append rows to the shard.
+        :param data: a tensor, or nested lists, of rows of shape row_shape. A flat list holds one scalar per row.
+        """
+        self._write_rows(*_rows(data, self.typecode))
+
+    def _write_rows(self, values, shape):
+        if tuple(shape[1:]) != self.row_shape:
+            raise ValueError(f'The rows must have shape {self.row_shape}, but got {tuple(shape[1:])}.')
+        self._file.write(_little_endian(values).tobytes())
+        self.rows += shape[0]
+
+    def close(self):
+        """ Write the number of rows in the header, and close the file. """
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._write_header()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return f"ShardWriter(filename={self.filename!r}, row_shape={self.row_shape}, typecode={self.typecode!r}, rows={self.rows})"
+
+def write_shard(filename, data, typecode='d'):
+    """ Write a tensor to a shard.
+    :param filename: the path of the shard
+    :param data: a tensor, or nested lists. A flat list holds one scalar per row.
+    :param typecode: 'd' to store float64 values, 'f' to store float32 values
+    """
+    values, shape = _rows(data, typecode)
+    with ShardWriter(filename, shape[1:], typecode) as writer:
+        writer._write_rows(values, shape)
+
+class Shard:
+    def __init__(self, filename):
+        """ A shard mapped in memory: its rows are read from the page cache when sliced, the file is never read whole.
+        :param filename: the path of the shard
+        """
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, typecode, ndim = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f'{filename} is not a shard, or was written by another version of the format.')
+        self.typecode = typecode.decode()
+        self.shape = struct.unpack_from(f'<{ndim}Q', self._mmap, _HEADER.size)
+        self._row_size = 1
+        for n in self.shape[1:]:
+            self._row_size *= n
+        self._itemsize = array.array(self.typecode).itemsize
+        size = self.shape[0] * self._row_size * self._itemsize
+        if len(self._mmap) < _HEADER_SIZE + size:
+            raise ValueError(f'{filename} is truncated: {self.shape} values do not fit in {len(self._mmap)} bytes.')
+        self._view = memoryview(self._mmap)[_HEADER_SIZE:_HEADER_SIZE + size]
+
+    def read(self, start, stop, out=None):
+        """ Read the rows from start to stop, converted to the typecode of out.
+        :param out: an array to append the values to, or None to return a new one of the default dtype
+        """
+        out = array.array(kernels.typecode) if out is None else out
+        values = self._view[start * self._row_size * self._itemsize:stop * self._row_size * self._itemsize]
+        if self.typecode == out.typecode and sys.byteorder == 'little':
+            # the bytes on disk are the bytes in memory: a single copy out of the page cache
+            out.frombytes(values)
+        else:
+            converted = array.array(self.typecode)
+            converted.frombytes(values)
+            out.extend(array.array(out.typecode, _little_endian(converted)))
+        return out
+
+    def close(self):
+        """ Unmap the shard. """
+        self._view.release()
+        self._mmap.close()
+
+    def __len__(self):
+        """ Returns the number of rows. """
+        return self.shape[0]
+
+    def __repr__(self):
+        return f"Shard(filename={self.filename!r}, shape={self.shape}, typecode={self.typecode!r})"
+
+class ShardDataset(Dataset):
+    def __init__(self, *fields):
+        """ A dataset of the rows of tensors stored in shards, as TensorDataset: the i-th sample holds the i-th row of every tensor.
+        A tensor split into several shards reads as their concatenation along the first dimension.
+        Batches are read by slicing the mapped shards, one slice per run of consecutive rows.
+        :param fields: one path, or list of paths, of shards per tensor, with the same total number of rows
+        """
+        super().__init__()
+        self._fields = []
+        for filenames in fields:
+            shards = [Shard(filename) for filename in ([filenames] if isinstance(filenames, (str, os.PathLike)) else filenames)]
+            if any(shard.shape[1:] != shards[0].shape[1:] for shard in shards):
+                raise ValueError(f'The shards of a tensor must have rows of the same shape, but got {[s.shape for s in shards]}.')
+            # the index of the first row of every shard
+            starts = [0]
+            for shard in shards:
+                starts.append(starts[-1] + len(shard))
+            self._fields.append((shards, starts))
+            if starts[-1] != len(self):
+                raise ValueError(f'All the tensors must have the same number of rows, but got {starts[-1]} and {len(self)}.')
+
+    def _read(self, shards, starts, indices):
+        """ Read the rows at a list of indices of a tensor, slicing each run of consecutive rows of a shard at once. """
+        values = array.array(kernels.typecode)
+        i = 0
+        while i < len(indices):
+            k = bisect.bisect_right(starts, indices[i]) - 1
+            start = stop = indices[i]
+            i += 1
+            while i < len(indices) and indices[i] == stop + 1 and stop + 1 < starts[k + 1]:
+                stop = indices[i]
+                i += 1
+            shards[k].read(start - starts[k], stop + 1 - starts[k], values)
+        return values
+
+    def __getitem__(self, index):
+        """ Returns the rows at an index, one per tensor, as nested python lists. """
+        if not -len(self) <= index < len(self):
+            raise IndexError(f'Index {index} is out of range for a dataset of {len(self)} samples.')
+        index = index % len(self)
+        return tuple(_nest(self._read(shards, starts, [index]).tolist(), shards[0].shape[1:])
+                     for shards, starts in self._fields)
+
+    def __getitems__(self, indices):
+        """ Returns the rows at a list of indices as batch tensors, one per tensor, that do not require gradient. """
+        return tuple(Tensor._from_storage(self._read(shards, starts, indices), (len(indices),) + shards[0].shape[1:],
+                                          requires_grad=False)
+                     for shards, starts in self._fields)
+
+    def close(self):
+        """ Unmap the shards. """
+        for shards, _ in self._fields:
+            for shard in shards:
+                shard.close()
+
+    def __len__(self):
+        """ Returns the number of rows. """
+        return self._fields[0][1][-1]
+
+    def __repr__(self):
+        return f"ShardDataset(size={len(self)}, tensors={len(self._fields)}, shards={sum(len(s) for s, _ in self._fields)})"
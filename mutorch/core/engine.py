@@ -0,0 +1,59 @@
+""" This file contains the autograd engine shared by the computational graphs.
+
+A graph is made of objects exposing ``_children_nodes`` (the inputs they were
+computed from) and ``_backward`` (a closure propagating their gradient to those
+inputs). The engine orders the graph once and runs every closure exactly once,
+so shared subgraphs are not re-propagated for each path that reaches them.
+Unless the graph is retained, every node releases its inputs and its closure
+once its gradient has been propagated, so the graph is freed by the backward pass.
+"""
+
+def _freed_backward():
+    """ Backward closure of a node whose graph was released by a previous backward pass. """
+    raise RuntimeError('Trying to backward through the graph a second time, but it has already been freed. '
+                       'Specify retain_graph=True when calling backward the first time.')
+
+def topological_sort(roots):
+    """ Order the graph reachable from the roots.
+    :param roots: the output nodes of the graph
+    :return: a list of nodes in which every node comes after all of its children
+    """
+    order = []
+    visited = set()
+    for root in roots:
+        if id(root) in visited:
+            continue
+        visited.add(id(root))
+        # iterative depth-first search, deep graphs would exceed the recursion limit
+        stack = [(root, iter(root._children_nodes))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if id(child) not in visited:
+                    visited.add(id(child))
+                    stack.append((child, iter(child._children_nodes)))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+
+    return order
+
+def backward(roots, retain_graph=False):
+    """ Backpropagate through the graph reachable from the roots.
+    The gradients of the roots must be seeded by the caller.
+    :param roots: the output nodes of the graph
+    :param retain_graph: whether to keep the graph, to backpropagate through it again
+    """
+    order = topological_sort(roots)
+    seeded = set(map(id, roots))
+    for node in order:
+        if node._children_nodes and id(node) not in seeded:
+            # a retained graph still holds the gradients of its inner nodes from the previous pass
+            node._grad = 0. if isinstance(node._grad, float) else None
+    for node in reversed(order):
+        node._backward()
+        if not retain_graph and node._children_nodes:
+            # the closure often references its own output, dropping it also breaks that reference cycle
+            node._children_nodes = ()
+            node._backward = _freed_backward
@@ -0,0 +1,32 @@
+""" This file contains the lazy exports of the packages: names read from their modules on first use.
+
+A package lists the names it exports with the module each one is read from, and gets a module-level __getattr__
+(PEP 562) importing that module when the name is first looked up. Importing a package therefore imports none
+of its modules, and a process only pays for the modules it uses.
+"""
+import sys
+import importlib
+
+def lazy_exports(package, exports):
+    """ Return the __getattr__ and __dir__ functions of a package exporting names of its modules, imported on first use.
+    :param package: the name of the package, its __name__
+    :param exports: a dict mapping every exported name to the (module, attribute) it is read from, the module
+                    relative to the package, and the attribute None to export the module itself
+    """
+    namespace = sys.modules[package].__dict__
+
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        module, attribute = exports[name]
+        value = importlib.import_module(module, package)
+        if attribute is not None:
+            value = getattr(value, attribute)
+        # set on the package, so that the later lookups do not go through __getattr__
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,159 @@
+""" This file contains the lazy mode, and the code generation that fuses deferred elementwise ops.
+
+Under lazy mode, the elementwise ops on array-backed tensors do not run: they return a tensor
+holding the expression of the ops, built on top of the expressions of their deferred operands.
+The expression is evaluated in a single fused loop, into a single output buffer with a single
+backward closure, when the values of the tensor are first read.
+
+An expression is a tree of tuples: ('x', i) reads the i-th input tensor, ('c', value) is a
+python scalar, and (op, *args) applies one of the ops of _SOURCES to its arguments.
+Expressions are compiled to the source of a python expression over the arguments x0, x1, ...
+which the backends evaluate with kernels.elementwise.
+"""
+import math
+import threading
+
+class _LazyMode(threading.local):
+    """ Per-thread flag telling the elementwise ops whether to defer their computation. """
+    enabled = False
+
+_lazy_mode = _LazyMode()
+
+def is_lazy_enabled():
+    """ Return whether elementwise ops are deferred in the current thread. """
+    return _lazy_mode.enabled
+
+class lazy:
+    def __init__(self):
+        """ Context manager, or function decorator, under which the elementwise ops on array-backed tensors
+        are deferred and fused. The values are computed when they are first read, through items(), detach(),
+        item(), backward(), a reduction such as sum(), or any op that is not elementwise.
+        """
+        self._prev = False
+
+    def __enter__(self):
+        self._prev = _lazy_mode.enabled
+        _lazy_mode.enabled = True
+        return self
+
+    def __exit__(self, *args):
+        _lazy_mode.enabled = self._prev
+        return False
+
+    def __call__(self, fn):
+        """ Run fn with its elementwise ops deferred. """
+        def wrapper(*args, **kwargs):
+            # a fresh context per call, so that the decorated function can be re-entered from any thread
+            with type(self)():
+                return fn(*args, **kwargs)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        return wrapper
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+# op -> template of its python source
+_SOURCES = {'add': '({0} + {1})', 'sub': '({0} - {1})', 'mul': '({0} * {1})', 'div': '({0} / {1})',
+            'pow': '({0} ** {1})', 'neg': '(-{0})', 'abs': 'abs({0})', 'tanh': 'tanh({0})',
+            'log': 'log({0})', 'relu': 'relu({0})', 'sigmoid': 'sigmoid({0})'}
+
+def source(expr, offset=0):
+    """ Return the python source of an expression, reading its i-th input from the argument x{i + offset}. """
+    if expr[0] == 'x':
+        return f'x{expr[1] + offset}'
+    if expr[0] == 'c':
+        value = expr[1]
+        return f'({value!r})' if math.isfinite(value) else f"float('{value}')"
+    return _SOURCES[expr[0]].format(*(source(arg, offset) for arg in expr[1:]))
+
+def inputs(expr):
+    """ Return the set of the inputs read by an expression. """
+    if expr[0] == 'x':
+        return {expr[1]}
+    if expr[0] == 'c':
+        return set()
+    return set().union(*(inputs(arg) for arg in expr[1:]))
+
+def _local(expr, k, offset, y=None):
+    """ Return the source of the derivative of the op at the root of expr with respect to its k-th argument,
+    or None when no gradient flows to that argument.
+    :param y: the source of the value of expr, when it is available
+    """
+    op, args = expr[0], [source(arg, offset) for arg in expr[1:]]
+    a = args[0]
+    if op in ('add', 'sub'):
+        return '(-1.)' if op == 'sub' and k == 1 else '1.'
+    if op == 'mul':
+        return args[1 - k]
+    if op == 'div':
+        return f'(1. / {args[1]})' if k == 0 else f'(-{a} / ({args[1]} * {args[1]}))'
+    if op == 'pow':
+        # as for Nodes, the gradient only flows to the base
+        return f'({args[1]} * {a} ** ({args[1]} - 1))' if k == 0 else None
+    if op == 'neg':
+        return '(-1.)'
+    if op == 'abs':
+        return f'sign({a})'
+    if op == 'log':
+        return f'dlog({a})'
+    # the derivatives of the activations read their output, when it is available, or else recompute it once:
+    # an assignment expression may reuse the name t, since it is read right after it is bound
+    if op == 'relu':
+        return f'step({y or source(expr, offset)})'
+    if op == 'tanh':
+        return f'(1. - {y} * {y})' if y else f'(1. - (t := {source(expr, offset)}) * t)'
+    if op == 'sigmoid':
+        return f'({y} * (1. - {y}))' if y else f'((t := {source(expr, offset)}) * (1. - t))'
+    raise ValueError(f'Unknown op: {op}')
+
+def _product(factors):
+    """ Return the source of the product of sources, dropping the factors equal to one. """
+    factors = [factor for factor in factors if factor != '1.']
+    return ' * '.join(factors) if factors else '1.'
+
+def derivative(expr, i, offset=0):
+    """ Return the source of the derivative of an expression with respect to its i-th input,
+    or None when it does not depend on it. """
+    if expr[0] == 'x':
+        return '1.' if expr[1] == i else None
+    if expr[0] == 'c':
+        return None
+    terms = []
+    for k, arg in enumerate(expr[1:]):
+        d = derivative(arg, i, offset)
+        local = _local(expr, k, offset) if d is not None else None
+        if local is not None:
+            terms.append(_product([local, f'({d})' if ' ' in d else d]))
+    if not terms:
+        return None
+    return terms[0] if len(terms) == 1 else f'({" + ".join(terms)})'
+
+def gradients(expr, requires_grad):
+    """ Generate the backward pass of an expression, as a single pass shared by every input followed by
+    one pass per input requiring gradient.
+    The shared pass multiplies the output gradient by the derivatives of the chain of ops, from the output,
+    down to the first op with more than one argument leading to an input requiring gradient.
+    :param requires_grad: whether each input of the expression requires gradient
+    :return: the source of the shared pass over (output gradient x0, output x1, inputs x2, ...), or None
+             when it is the output gradient itself, and a dict mapping every input receiving gradient to the
+             source of its gradient over (shared pass x0, inputs x1, ...), or None when it is the shared pass
+    """
+    targets = {i for i, flag in enumerate(requires_grad) if flag}
+    factors, y = [], 'x1'
+    node = expr
+    while node[0] not in ('x', 'c'):
+        branches = [k for k, arg in enumerate(node[1:]) if inputs(arg) & targets and _local(node, k, 2, y) is not None]
+        if len(branches) != 1:
+            break
+        factors.append(_local(node, branches[0], 2, y))
+        node, y = node[1 + branches[0]], None
+    shared = _product(['x0'] + factors)
+    shared = None if shared == 'x0' else shared
+
+    grads = {}
+    for i in sorted(targets & inputs(node)):
+        d = derivative(node, i, 1)
+        if d is not None:
+            grads[i] = None if d == '1.' else f'x0 * {d}'
+    return shared, grads
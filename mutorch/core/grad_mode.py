@@ -0,0 +1,44 @@
+""" This file contains the context managers that switch off the construction of the computational graph. """
+import threading
+
+class _GradMode(threading.local):
+    """ Per-thread flag telling the ops whether to build the computational graph. """
+    enabled = True
+
+_grad_mode = _GradMode()
+
+def is_grad_enabled():
+    """ Return whether ops build the computational graph in the current thread. """
+    return _grad_mode.enabled
+
+class no_grad:
+    def __init__(self):
+        """ Context manager, or function decorator, under which ops only compute values.
+        No children, backward closures or gradients are recorded, so nothing can be backpropagated.
+        """
+        self._prev = True
+
+    def __enter__(self):
+        self._prev = _grad_mode.enabled
+        _grad_mode.enabled = False
+        return self
+
+    def __exit__(self, *args):
+        _grad_mode.enabled = self._prev
+        return False
+
+    def __call__(self, fn):
+        """ Run fn without building the computational graph. """
+        def wrapper(*args, **kwargs):
+            # a fresh context per call, so that the decorated function can be re-entered from any thread
+            with type(self)():
+                return fn(*args, **kwargs)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        return wrapper
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+class inference_mode(no_grad):
+    """ Context manager for forward-only code such as serving: ops compute values only, as under no_grad. """
@@ -0,0 +1,80 @@
+""" This file contains the registry of compute backends behind array-backed tensors.
+
+A backend is a module implementing every kernel of KERNELS on flat buffers of doubles ('d'), or of floats ('f')
+under set_default_dtype('float32'). The buffers the kernels return hold the default dtype, and the buffers they
+update in place keep theirs.
+The kernels of the selected backend are bound as attributes of this module, so that
+tensors, layers, losses and optimizers call kernels.<name>(...) whatever the backend,
+and the autograd tape is the same for all of them.
+"""
+import importlib
+
+# name of a backend -> module implementing its kernels, relative to this package for the built-in ones
+BACKENDS = {'python': '.python_backend',
+            'numpy': '.numpy_backend'}
+
+# the kernels every backend implements
+KERNELS = ('zeros', 'full',
+           'add', 'sub', 'mul', 'div', 'div_grad', 'reduce_sum', 'neg', 'absolute', 'absolute_grad',
+           'power', 'power_grad', 'tanh', 'tanh_grad', 'log', 'log_grad',
+           'relu', 'relu_grad', 'sigmoid', 'sigmoid_grad', 'softmax', 'softmax_grad',
+           'cross_entropy', 'cross_entropy_grad',
+           'elementwise', 'total', 'accumulate', 'transpose', 'matmul', 'add_rows', 'bias_activation', 'sum_rows',
+           'sgd', 'adam')
+
+# name of a dtype -> typecode of the buffers holding its values
+DTYPES = {'float64': 'd',
+          'float32': 'f'}
+
+_backend = None
+# the typecode of the buffers allocated by the kernels
+typecode = 'd'
+
+def register_backend(name, module_name):
+    """ Register a backend, to be selected with set_backend(name).
+    :param name: the name of the backend
+    :param module_name: the absolute importable name of the module implementing the kernels
+    """
+    BACKENDS[name] = module_name
+
+def set_backend(name):
+    """ Select the backend running the kernels of every array-backed tensor op.
+    :param name: 'python' (the default, pure python loops), 'numpy', or a registered backend
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown backend: {name}. Available backends: {list(BACKENDS)}')
+    module = importlib.import_module(BACKENDS[name], __package__)
+    if hasattr(module, 'available') and not module.available():
+        raise ImportError(f'The {name} backend requires {name}, which could not be imported.')
+    missing = [kernel for kernel in KERNELS if not hasattr(module, kernel)]
+    if missing:
+        raise NotImplementedError(f'The {name} backend does not implement: {missing}')
+    for kernel in KERNELS:
+        globals()[kernel] = getattr(module, kernel)
+    _backend = name
+
+def get_backend():
+    """ Return the name of the selected backend. """
+    return _backend
+
+def set_default_dtype(name):
+    """ Select the dtype of the array-backed tensors created from now on, and of the outputs of the ops.
+    The gradients and the optimizer states of a tensor follow its own dtype. Sums and losses are accumulated in double.
+    :param name: 'float64' (the default), or 'float32' to halve the memory of the buffers
+    """
+    global typecode
+    if name not in DTYPES:
+        raise ValueError(f'Unknown dtype: {name}. Available dtypes: {list(DTYPES)}')
+    typecode = DTYPES[name]
+
+def get_default_dtype():
+    """ Return the name of the default dtype. """
+    return next(name for name, code in DTYPES.items() if code == typecode)
+
+def typecode_of(buffer):
+    """ Return the typecode of a buffer: an array, or a memoryview of an array such as the parameters gathered by
+    Module.flatten_parameters. """
+    return buffer.typecode if hasattr(buffer, 'typecode') else buffer.format
+
+set_backend('python')
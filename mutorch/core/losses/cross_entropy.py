@@ -0,0 +1,57 @@
+import array
+from .. import kernels
+from ..module import Module
+from ..tensor import Tensor, _record
+
+def _targets(y_true, rows, cols):
+    """ Return the targets as a flat (rows, cols) buffer of target distributions.
+    :param y_true: (rows, cols) one-hot, or probability, targets, or the class index of every row
+    """
+    if 'Tensor' in str(type(y_true)):
+        values = y_true._storage.tolist() if y_true._storage is not None else [v for row in y_true.detach() for v in row]
+    else:
+        values = [v for row in y_true for v in row] if isinstance(y_true[0], list) else list(y_true)
+    if len(values) == rows * cols:
+        return array.array(kernels.typecode, values)
+    if len(values) == rows:
+        # class indices, converted to one-hot rows
+        targets = kernels.zeros(rows * cols)
+        for i, label in enumerate(values):
+            targets[i * cols + int(label)] = 1.
+        return targets
+    raise ValueError(f'The targets must have shape ({rows}, {cols}), or hold one class index per row, but got {len(values)} values.')
+
+class CrossEntropyLoss(Module):
+    def __init__(self):
+        """ Cross Entropy loss: a numerically stable log-softmax over the classes fused with the negative log likelihood """
+        super().__init__()
+
+    def forward(self, y_pred, y_true):
+        """ Forward pass 
+        :param y_pred: the (batch, classes) unnormalized scores
+        :param y_true: the (batch, classes) one-hot targets, or the class index of every sample
+        :return: the loss averaged over the samples
+        """
+        y_pred = y_pred if 'Tensor' in str(type(y_pred)) else Tensor(y_pred, requires_grad=False, storage='array')
+        if len(y_pred.shape) != 2:
+            raise ValueError(f'The scores must be a 2D (batch, classes) tensor, but got shape {y_pred.shape}.')
+        rows, cols = y_pred.shape
+        targets = _targets(y_true, rows, cols)
+
+        if y_pred.storage == 'node':
+            # a graph of Nodes: log_softmax = x - max - log(sum(exp(x - max))) on every row
+            loss = []
+            for i, row in enumerate(y_pred._data):
+                max_value = max(node.value for node in row)
+                shifted = [node - max_value for node in row]
+                log_total = sum(s.exp() for s in shifted).log()
+                loss += [(s - log_total) * t for s, t in zip(shifted, targets[i * cols:(i + 1) * cols]) if t != 0.]
+            return Tensor(-sum(loss) / rows)
+
+        loss, probs = kernels.cross_entropy(y_pred._storage, targets, rows, cols)
+        # d(loss)/d(scores) = (softmax - onehot) / batch
+        return _record(array.array(kernels.typecode, [loss]), (1, 1), (y_pred,),
+                       (lambda g, y: kernels.cross_entropy_grad(g[0], probs, targets, rows, cols),))
+
+    def __repr__(self):
+        return f"CrossEntropy()"
@@ -1,4 +1,4 @@
-from module import Module
+from ..module import Module
 
 class MSELoss(Module):
     def __init__(self):
@@ -1,4 +1,4 @@
-from module import Module
+from ..module import Module
 
 class NLLLoss(Module):
     def __init__(self):
@@ -1,4 +1,18 @@
 """ This file contains the definition of Module class. """
+import array
+from . import kernels
+from .tensor import Tensor, _as_array
+
+def _flat_buffers(parameters):
+    """ Return the (values, gradients) buffers gathered by Module.flatten_parameters, if the parameters are exactly
+    the array-backed tensors viewing them, or else None. """
+    if not parameters or any(not 'Tensor' in str(type(p)) or not isinstance(p._storage, memoryview) for p in parameters):
+        return None
+    values, grads = parameters[0]._storage.obj, parameters[0]._grad.obj
+    if any(p._storage.obj is not values or p._grad.obj is not grads for p in parameters) \
+            or sum(len(p._storage) for p in parameters) != len(values):
+        return None
+    return values, grads
 
 class Module:
     def __init__(self):
@@ -7,9 +21,35 @@ class Module:
 
     def zero_grad(self):
         """ Sets gradients of all parameters to zero. """
+        flat = _flat_buffers(self._parameters)
+        if flat is not None:
+            # a single fill of the gradient buffer gathered by flatten_parameters
+            flat[1][:] = kernels.zeros(len(flat[1]), kernels.typecode_of(flat[1]))
+            return
         for param in self._parameters:
             param.zero_grad()
 
+    def flatten_parameters(self):
+        """ Gather the values of the array-backed tensor parameters into one contiguous buffer, and their gradients
+        into another. Every parameter then keeps its values and its gradient as views of its slice of the buffers,
+        so that the optimizers created afterwards update all of them in a single step over the buffers, and zero_grad
+        resets them in a single fill. The buffers have the dtype of the first parameter. Node parameters are left as they are.
+        :return: the (values, gradients) buffers
+        """
+        tensors = [p for p in self._parameters if 'Tensor' in str(type(p)) and p._storage is not None]
+        size = sum(len(p._storage) for p in tensors)
+        typecode = kernels.typecode_of(tensors[0]._storage) if tensors else kernels.typecode
+        values, grads = kernels.zeros(size, typecode), kernels.zeros(size, typecode)
+        offset = 0
+        for p in tensors:
+            n = len(p._storage)
+            values[offset:offset + n] = array.array(typecode, p._storage)
+            if p._grad is not None:
+                grads[offset:offset + n] = array.array(typecode, p._grad)
+            p._storage, p._grad = memoryview(values)[offset:offset + n], memoryview(grads)[offset:offset + n]
+            offset += n
+        return values, grads
+
     def parameters(self):
         """ Returns a list of parameters. """
         return self._parameters
@@ -24,4 +64,62 @@ class Module:
 
     def num_parameters(self):
         """ Returns the number of parameters. """
-        return len(self._parameters)
+        return sum(len(p._storage) if 'Tensor' in str(type(p)) else 1 for p in self._parameters)
+
+    def named_parameters(self):
+        """ Returns a list of (name, parameter) pairs, the parameters being named by their index unless the module names them. """
+        return [(str(i), p) for i, p in enumerate(self._parameters)]
+
+    def state_dict(self):
+        """ Returns a dict mapping the name of every parameter to its values, as a tensor that does not require gradient.
+        The tensor of an array-backed parameter shares its memory.
+        """
+        state_dict = {}
+        for name, p in self.named_parameters():
+            if 'Tensor' in str(type(p)):
+                state_dict[name] = Tensor._from_storage(_as_array(p)._storage, p.shape, requires_grad=False)
+            else:
+                state_dict[name] = Tensor._from_storage(array.array('d', [p.value]), (1, 1), requires_grad=False)
+        return state_dict
+
+    def load_state_dict(self, state_dict, strict=True):
+        """ Loads parameter values by name.
+        :param state_dict: a dict mapping parameter names to tensors (or nested lists), such as the one returned by 
+                           state_dict() or a Checkpoint, which then only reads the tensors of the parameters
+        :param strict: whether the names must be those of the parameters, otherwise the parameters missing from
+                       the state dict keep their values and the names of no parameter are ignored
+        """
+        parameters = dict(self.named_parameters())
+        if strict:
+            missing = [name for name in parameters if name not in state_dict]
+            unexpected = [name for name in state_dict if name not in parameters]
+            if missing or unexpected:
+                raise KeyError(f'The state dict does not match the parameters. Missing: {missing}, unexpected: {unexpected}')
+        for name, p in parameters.items():
+            if name not in state_dict:
+                continue
+            value = _as_array(state_dict[name])
+            shape = p.shape if 'Tensor' in str(type(p)) else (1, 1)
+            if value.shape != shape:
+                raise ValueError(f'The shape of {name} is {shape}, but got {value.shape}.')
+            if 'Tensor' not in str(type(p)):
+                p._value = value._storage[0]
+            elif kernels.typecode_of(p._storage) == kernels.typecode_of(value._storage):
+                p._storage[:] = value._storage
+            else:
+                p._storage[:] = array.array(kernels.typecode_of(p._storage), value._storage)
+
+    def _load_checkpoint_values(self, values):
+        """ Loads parameter values in the order of the pickled checkpoints of former versions of Sequential.save.
+        :param values: a flat list of values, starting with the values of this module
+        :return: the number of values consumed
+        """
+        offset = 0
+        for p in self._parameters:
+            if 'Tensor' in str(type(p)):
+                p._storage[:] = array.array(kernels.typecode_of(p._storage), values[offset:offset + len(p._storage)])
+                offset += len(p._storage)
+            else:
+                p._value = values[offset]
+                offset += 1
+        return offset
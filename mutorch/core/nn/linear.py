@@ -1,7 +1,31 @@
+import array
 import random
-from module import Module
-from tensor import Tensor
-from relu import ReLU
+from .. import kernels
+from ..module import Module
+from ..tensor import Tensor, _record, _as_array
+from .relu import ReLU
+
+def _linear(inputs, weight, bias, activation=None):
+    """ Compute activation(inputs @ weight + bias) for a whole batch, as a single entry of the graph.
+    The bias and the activation are applied in one pass over the product. The derivative of the 
+    activation is recovered from the outputs, so the backward pass applies the chain rule through 
+    the activation in one loop, without keeping the pre-activations.
+    :param inputs: the (batch, in) array-backed inputs
+    :param weight: the (in, out) array-backed weight matrix
+    :param bias: the (1, out) array-backed bias
+    :param activation: the name of the fused activation kernel: 'relu', 'tanh', 'sigmoid' or None
+    :return: the (batch, out) outputs
+    """
+    (m, k), n = inputs.shape, weight.shape[1]
+    out = kernels.matmul(inputs._storage, weight._storage, m, k, n)
+    out = kernels.bias_activation(out, bias._storage, m, n, activation)
+    # relu'(x) is 1 where relu(x) > 0, tanh' and sigmoid' are functions of their outputs
+    activation_grad = getattr(kernels, f'{activation}_grad') if activation else None
+    return _record(out, (m, n), (inputs, weight, bias),
+                   (lambda g, y: kernels.matmul(g, kernels.transpose(weight._storage, k, n), m, n, k),
+                    lambda g, y: kernels.matmul(kernels.transpose(inputs._storage, m, k), g, k, m, n),
+                    lambda g, y: kernels.sum_rows(g, m, n)),
+                   pre_grad=(lambda g: activation_grad(g, out)) if activation else None)
 
 class Neuron(Module):
     def __init__(self, input_size,
@@ -32,12 +56,16 @@ class Neuron(Module):
     def __repr__(self):
         return f"Neuron(input_size={len(self.weights)})"
 
+# the default activation of Linear, named so that importing this module does not draw from the global random generator,
+# which would shift the initial weights of the models built after random.seed() when mutorch.nn is first used
+_DEFAULT_ACTIVATION = ReLU(name='relu')
+
 class Linear(Module):
     def __init__(self, input_size, 
                        output_size,
                        weight_initializer=lambda: random.uniform(-1, 1),
                        bias_initializer=lambda: random.uniform(-1, 1),
-                       activation=ReLU(),
+                       activation=_DEFAULT_ACTIVATION,
                        children_layers=()):
         """ A linear layer
         :param input_size: the number of inputs
@@ -51,11 +79,17 @@ class Linear(Module):
         self.input_size = input_size
         self.output_size = output_size
         self.activation = activation
-        self.neurons = [Neuron(input_size, 
-                               weight_initializer, 
-                               bias_initializer) for _ in range(output_size)]
+        # the initializers are called output by output, in the order of the former per-neuron layout
+        columns = []
+        biases = []
+        for _ in range(output_size):
+            columns.append([weight_initializer() for _ in range(input_size)])
+            biases.append(bias_initializer())
+        self.weight = Tensor([[columns[j][i] for j in range(output_size)] for i in range(input_size)], 
+                             requires_grad=True, storage='array')
+        self.bias = Tensor(biases, requires_grad=True, storage='array')
         # internal parameters
-        self._parameters = [p for n in self.neurons for p in n.parameters()]
+        self._parameters = [self.weight, self.bias]
         self._children_layers = children_layers
 
     def forward(self, inputs):
@@ -63,18 +97,37 @@ class Linear(Module):
         :param inputs: the inputs to the linear layer
         :return: the output of the linear layer
         """
-        inputs = Tensor(inputs) if not 'Tensor' in str(type(inputs)) else inputs
-        batch_size = inputs.shape[0]
+        if not 'Tensor' in str(type(inputs)):
+            inputs = Tensor(inputs, requires_grad=False, storage='array')
+        elif inputs.storage != 'array':
+            # the gradient of node-backed inputs flows back to their Nodes
+            inputs = _as_array(inputs)
         if inputs.shape[1] != self.input_size:
             raise ValueError(f"Input size must be {self.input_size} but got {inputs.shape[1]}")
-        if batch_size != 1:
-            out = Tensor([[n.forward(inputs.data[i]) for n in self.neurons] for i in range(batch_size)])
-        else:
-            out = Tensor([n.forward(inputs) for n in self.neurons])
-        out = self.activation(out) if self.activation else out
+        # the activations with a kernel are fused into the layer, the others are applied to its output
+        fused = getattr(self.activation, '_kernel', None)
+        out = _linear(inputs, self.weight, self.bias, fused)
+        if self.activation and fused is None:
+            out = self.activation(out)
 
         return out
 
+    def named_parameters(self):
+        """ Returns the weight and the bias with their names. """
+        return [('weight', self.weight), ('bias', self.bias)]
+
+    def _load_checkpoint_values(self, values):
+        """ Loads parameter values laid out output by output: the weights of an output followed by its bias,
+        as in the pickled checkpoints of former versions of Sequential.save.
+        :return: the number of values consumed
+        """
+        k, n = self.input_size, self.output_size
+        for j in range(n):
+            start = j * (k + 1)
+            self.weight._storage[j::n] = array.array(kernels.typecode_of(self.weight._storage), values[start:start + k])
+            self.bias._storage[j] = values[start + k]
+        return n * (k + 1)
+
     def __repr__(self):
         layer_str = f"Linear(input_size={self.input_size}, output_size={self.output_size}"
         layer_str += f", activation={self.activation.name}" if self.activation else ""
@@ -1,11 +1,14 @@
-import core
-from node import Node
-from tensor import Tensor
+from ..node import Node
+from ..tensor import Tensor
+from ..grad_mode import is_grad_enabled
 
 import string
 import random
 
 class ReLU(Node):
+    # the kernel with which Linear fuses this activation into its own forward and backward pass
+    _kernel = 'relu'
+
     def __init__(self, name='', requires_grad=True):
         """ Initialize a node.
         :param name: The name of the node.
@@ -15,13 +18,13 @@ class ReLU(Node):
         self._name = name if name != '' else 'tanh+' + \
                             ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
         self._requires_grad = requires_grad
+        self._value = 0.
+        self._grad = 0.
 
     def __repr__(self):
         """ Return a string representation of the node. """
         str_ = f'ReLU('
-        str_ += f'name={self._name}, ' if self._name != '' else ''
-        str_ += f'value={self.value}'
-        str_ += f', grad={self._grad}' if self._requires_grad else ''
+        str_ += f'name={self._name}' if self._name != '' else ''
         str_ += f')'
         return f'{str_}'
 
@@ -32,54 +35,33 @@ class ReLU(Node):
         """
         x = x if 'Node' in str(type(x)) or 'Tensor' in str(type(x)) \
               else Node(x) if isinstance(x, (int, float)) else Tensor(x)
+        # no graph is built under no_grad
+        requires_grad = self._requires_grad and is_grad_enabled()
+
+        if 'Tensor' in str(type(x)) and x.storage == 'array':
+            # a single tape entry for the whole tensor
+            out = x.relu()
 
-        if 'Tensor' in str(type(x)):
+        elif 'Tensor' in str(type(x)):
+            # positive elements are passed through as they are, so their gradient flows without an op
             if len(x.shape) == 2:
                 out = Tensor([[x._data[i][j] if x._data[i][j]._value > 0 \
-                                else Node(0, requires_grad=self._requires_grad)  \
+                                else Node(0, requires_grad=requires_grad)  \
                                 for j in range(x.shape[1])] \
-                                for i in range(x.shape[0])], requires_grad=self._requires_grad)
-
-                self._value = out.items()
-                if self._requires_grad:
-                    def backward():
-                        for i in range(x.shape[0]):
-                            for j in range(x.shape[1]):
-                                if x._data[i][j]._value > 0:
-                                    x._data[i][j]._grad += out._data[i][j]._grad
-                                    x._data[i][j].backward()
-                    out._backward = backward
+                                for i in range(x.shape[0])], requires_grad=requires_grad)
 
             elif len(x.shape) == 3:
                 out = Tensor([[[x._data[i][j][k] if x._data[i][j][k]._value > 0 \
-                                else Node(0, requires_grad=self._requires_grad) \
+                                else Node(0, requires_grad=requires_grad) \
                                   for k in range(x.shape[2])] \
                                   for j in range(x.shape[1])] \
-                                  for i in range(x.shape[0])], requires_grad=self._requires_grad)
-
-                self._value = out.items()
-                if self._requires_grad:
-                    def backward():
-                        for i in range(x.shape[0]):
-                            for j in range(x.shape[1]):
-                                for k in range(x.shape[2]):
-                                    if x._data[i][j][k]._value > 0:
-                                        x._data[i][j][k]._grad += out._data[i][j][k]._grad
-                                        x._data[i][j][k].backward()
-                    out._backward = backward
+                                  for i in range(x.shape[0])], requires_grad=requires_grad)
 
         else:
             out = Node(max(0, x._value),
                        name=self._name,
-                       requires_grad=self._requires_grad,
-                       children_nodes=(x,), 
+                       requires_grad=requires_grad,
+                       children_nodes=(x,) if requires_grad else (), 
                        op='relu')
 
-            self._value = out.value
-            if self._requires_grad:
-                def backward():
-                    if x._value > 0:
-                        x._grad += out._grad
-                out._backward = backward
-                
         return out
\ No newline at end of file
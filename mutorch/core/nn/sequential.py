@@ -1,4 +1,5 @@
-from module import Module
+from .. import checkpoint
+from ..module import Module
 
 class Sequential(Module):
     def __init__(self, *layers):
@@ -23,31 +24,67 @@ class Sequential(Module):
             out = layer.forward(out)
         return out
 
-    def backward(self):
-        """ Backward pass """
-        for param in self._parameters:
-            param.backward()
+    def backward(self, loss, accumulate=False):
+        """ Backward pass, in a single traversal of the graph rooted at the loss
+        :param loss: the loss computed from the outputs of the model
+        :param accumulate: whether to add the gradients to the ones held by the parameters, 
+                           otherwise they are reset first
+        """
+        if not accumulate:
+            self.zero_grad()
+        loss.backward()
+
+    def accumulate(self, micro_batches, loss_fn):
+        """ Accumulate the gradients of a batch split into micro-batches
+        Only the graph of one micro-batch is alive at a time. The loss of every micro-batch is weighted 
+        by its share of the batch, so that the accumulated gradients of a loss averaged over the samples 
+        are the gradients of the whole batch. The gradients are added to the ones held by the parameters.
+        :param micro_batches: a list of (inputs, targets) pairs
+        :param loss_fn: the loss function, called as loss_fn(outputs, targets)
+        :return: the loss of the whole batch, as a python float
+        """
+        micro_batches = list(micro_batches)
+        sizes = [inputs.shape[0] if 'Tensor' in str(type(inputs)) else len(inputs) for inputs, _ in micro_batches]
+        batch_size = sum(sizes)
+        total_loss = 0.
+        for (inputs, targets), size in zip(micro_batches, sizes):
+            loss = loss_fn(self.forward(inputs), targets) * (size / batch_size)
+            self.backward(loss, accumulate=True)
+            total_loss += loss.item()
+        return total_loss
+
+    def named_parameters(self):
+        """ Returns the parameters of the layers, named layers.<index of the layer>.<name in the layer>. """
+        return [(f'layers.{i}.{name}', p) for i, l in enumerate(self.layers) for name, p in l.named_parameters()]
+
+    def _load_checkpoint_values(self, values):
+        """ Loads the parameter values of the layers, in the order of the pickled checkpoints of former versions of save.
+        :return: the number of values consumed
+        """
+        offset = 0
+        for l in self.layers:
+            offset += l._load_checkpoint_values(values[offset:])
+        return offset
 
     def save(self, filename):
-        """ Save the model to a file
+        """ Save the parameters of the model to a checkpoint, see checkpoint.py
         :param filename: the filename to save the model to
         """
-        import pickle
-        with open(filename, 'wb') as f:
-            param_values = [p.value for p in self.parameters()]
-            state_dict = {'parameters': param_values}
-            pickle.dump(state_dict, f)
+        checkpoint.save(self.state_dict(), filename)
 
     def load(self, filename):
-        """ Load the weights from a file
+        """ Load the weights from a checkpoint, or from a pickle saved by former versions of save
         :param filename: the filename to load the weights from
         """
+        if checkpoint.is_checkpoint(filename):
+            with checkpoint.load(filename) as state_dict:
+                self.load_state_dict(state_dict)
+            return
         import pickle
         with open(filename, 'rb') as f:
             state_dict = pickle.load(f)
             param_values = state_dict['parameters']
-            for i, p in enumerate(self.parameters()):
-                p._value = param_values[i]
+            self._load_checkpoint_values(param_values)
 
     def draw_graph(self, filename='sequential_graph'):
         """ Draw the reversed graph of nodes in a top-down manner. """
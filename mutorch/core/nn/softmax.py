@@ -1,75 +1,53 @@
-import math
-from node import Node
-from tensor import Tensor
+from ..tensor import Tensor
+from .. import grad_mode
+from ..grad_mode import is_grad_enabled
 
 import string
 import random
 
 class Softmax:
     """ Softmax function. """
-    def __init__(self, name='', requires_grad=True):
+    def __init__(self, name='', requires_grad=True, dim=-1):
         """ Initialize the node.
         :param name: The name of the node.
         :param requires_grad: Whether the node requires gradient.
+        :param dim: The dimension along which the outputs sum to one, the last one (every row) by default.
         """
         self._name = name if name != '' else 'softmax+' + \
                             ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
         self._requires_grad = requires_grad
+        self.dim = dim
+
+    @property
+    def name(self):
+        """ Return the name of the node. """
+        return self._name
 
     def __repr__(self):
         """ Return a string representation of the node. """
         str_ = f'Softmax('
         str_ += f'name={self._name}, ' if self._name != '' else ''
-        str_ += f'value={self.value}'
-        str_ += f', grad={self._grad}' if self._requires_grad else ''
+        str_ += f'dim={self.dim}'
         str_ += f')'
         return f'{str_}'
 
     def __call__(self, x, normalize=False):
-        """ Apply the softmax function to the input node. 
-        :param x: The input node.
-        :return: The output node.
+        """ Apply the softmax function to the input tensor, along self.dim.
+        The maximum of every line is always subtracted before the exponential, for numerical stability.
+        :param x: The input tensor.
+        :param normalize: Kept for compatibility, the input is always normalized.
+        :return: The output tensor.
         """
         x = x if 'Tensor' in str(type(x)) \
               else Tensor(x)
-
-        if normalize:
-            x = x - x.max()
-        if sum(x.shape) <= 2:
-            raise ValueError(f'Input tensor must have more than 1 element, but got {sum(x.shape)} elements.')
-        elif len(x.shape) == 2:
-            node_sum = Node(sum([math.exp(val) for val in x.items()]))
-            out = Tensor([[(x._data[i][j].exp()) / node_sum \
-                            for j in range(x.shape[1])] \
-                            for i in range(x.shape[0])], requires_grad=self._requires_grad)
-
-            self._value = out.items()
-            if self._requires_grad:
-                def backward():
-                    for i in range(x.shape[0]):
-                        for j in range(x.shape[1]):
-                            x._data[i][j]._grad += out._data[i][j]._value * (1 - out._data[i][j]._value) * out._data[i][j]._grad
-                            x._data[i][j].backward()
-                out._backward = backward
-
-        elif len(x.shape) == 3:
-            node_sum = Node(sum([math.exp(val) for val in x.items()]))
-            out = Tensor([[[(x._data[i][j][k].exp()) / node_sum \
-                             for k in range(x.shape[2])] \
-                             for j in range(x.shape[1])] \
-                             for i in range(x.shape[0])], requires_grad=self._requires_grad)
-
-            self._value = out.items()
-            if self._requires_grad:
-                def backward():
-                    for i in range(x.shape[0]):
-                        for j in range(x.shape[1]):
-                            for k in range(x.shape[2]):
-                                x._data[i][j][k]._grad += out._data[i][j][k]._value * (1 - out._data[i][j][k]._value) * out._data[i][j][k]._grad
-                                x._data[i][j][k].backward()
-                out._backward = backward
-
-        else:
+        if len(x.shape) not in (2, 3):
             raise ValueError(f'Input tensor must be 2D or 3D, but got {len(x.shape)}D tensor.')
-
-        return out
\ No newline at end of file
+        if x.shape[self.dim] < 2:
+            raise ValueError(f'Input tensor must have more than 1 element along dim {self.dim}, but got shape {x.shape}.')
+        # no graph is built under no_grad
+        if not self._requires_grad and is_grad_enabled():
+            with grad_mode.no_grad():
+                return self(x)
+
+        # a single tape entry for an array-backed tensor, Node ops for a node-backed one
+        return x.softmax(self.dim)
\ No newline at end of file
@@ -1,11 +1,15 @@
 import math
-from node import Node
-from tensor import Tensor
+from ..node import Node
+from ..tensor import Tensor
+from ..grad_mode import is_grad_enabled
 
 import string
 import random
 
 class Tanh(Node):
+    # the kernel with which Linear fuses this activation into its own forward and backward pass
+    _kernel = 'tanh'
+
     def __init__(self, name='', requires_grad=True):
         """ Initialize a node.
         :param name: The name of the node.
@@ -15,13 +19,12 @@ class Tanh(Node):
         self._name = name if name != '' else 'tanh+' + \
                             ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
         self._requires_grad = requires_grad
+        self._grad = 0.
 
     def __repr__(self):
         """ Return a string representation of the node. """
         str_ = f'Tanh('
-        str_ += f'name={self._name}, ' if self._name != '' else ''
-        str_ += f'value={self.value}'
-        str_ += f', grad={self._grad}' if self._requires_grad else ''
+        str_ += f'name={self._name}' if self._name != '' else ''
         str_ += f')'
         return f'{str_}'
 
@@ -32,48 +35,30 @@ class Tanh(Node):
         """
         x = x if 'Node' in str(type(x)) or 'Tensor' in str(type(x)) \
               else Node(x) if isinstance(x, (int, float)) else Tensor(x)
+        # no graph is built under no_grad
+        requires_grad = self._requires_grad and is_grad_enabled()
+
+        if 'Tensor' in str(type(x)) and x.storage == 'array':
+            # a single tape entry for the whole tensor
+            out = x.tanh()
 
-        if 'Tensor' in str(type(x)):
+        elif 'Tensor' in str(type(x)):
             if len(x.shape) == 2:
                 out = Tensor([[x._data[i][j].tanh()  \
                                 for j in range(x.shape[1])] \
-                                for i in range(x.shape[0])], requires_grad=self._requires_grad)
-
-                self._value = out.items()
-                if self._requires_grad:
-                    def backward():
-                        for i in range(x.shape[0]):
-                            for j in range(x.shape[1]):
-                                x._data[i][j]._grad += (1 - out._data[i][j]._value ** 2) * out._data[i][j]._grad
-                                x._data[i][j].backward()
-                    out._backward = backward
+                                for i in range(x.shape[0])], requires_grad=requires_grad)
 
             elif len(x.shape) == 3:
                 out = Tensor([[[x._data[i][j][k].tanh() \
                                  for k in range(x.shape[2])] \
                                  for j in range(x.shape[1])] \
-                                 for i in range(x.shape[0])], requires_grad=self._requires_grad)
-
-                self._value = out.items()
-                if self._requires_grad:
-                    def backward():
-                        for i in range(x.shape[0]):
-                            for j in range(x.shape[1]):
-                                for k in range(x.shape[2]):
-                                    x._data[i][j][k]._grad += (1 - out._data[i][j][k]._value ** 2) * out._data[i][j][k]._grad
-                                    x._data[i][j][k].backward()
-                    out._backward = backward
+                                 for i in range(x.shape[0])], requires_grad=requires_grad)
 
         else:
             out = Node(math.tanh(x.value), 
                        name=self._name,
-                       requires_grad=self._requires_grad,
-                       children_nodes=(x,), 
+                       requires_grad=requires_grad,
+                       children_nodes=(x,) if requires_grad else (), 
                        op='tanh')
-            self._value = out.value
-            if self._requires_grad:
-                def backward():
-                    x._grad += out._grad * (1 - out.value ** 2)
-                out._backward = backward
 
         return out
\ No newline at end of file
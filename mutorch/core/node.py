@@ -1,11 +1,18 @@
 import math
-import pprint
+from . import engine
+from .grad_mode import is_grad_enabled
+
+def _no_backward():
+    """ Backward closure shared by leaves, constants and nodes built without gradient. """
 
 class Node:
-    # default values
-    _value = 0.
-    _name = ''
-    _grad = 0.
+    # a fixed layout instead of a per-instance __dict__, graphs hold millions of nodes
+    __slots__ = ('_value', '_name', '_requires_grad', '_children_nodes', '_op', '_grad', '_backward_fn')
+
+    # the backward of an op node is looked up from its op when it runs, instead of a closure held by every node
+    _OP_BACKWARD = {'+': '_add_backward', '*': '_mul_backward', '**': '_pow_backward',
+                    'tanh': '_tanh_backward', 'exp': '_exp_backward', 'log': '_log_backward',
+                    'relu': '_relu_backward', 'sigmoid': '_sigmoid_backward'}
 
     def __init__(self, value, 
                        name='', 
@@ -28,10 +35,12 @@ class Node:
         self._value = float(value)
         self._name = name
         self._requires_grad = requires_grad
-        self._children_nodes = children_nodes
+        # the children are only needed to backpropagate
+        self._children_nodes = children_nodes if requires_grad else ()
         self._op = op
         self._grad = 0. if requires_grad else None
-        self._backward = lambda: None
+        # only set by the nodes of a freed graph, see engine.py
+        self._backward_fn = None
 
     def __repr__(self):
         """ Return a string representation of the node. """
@@ -43,22 +52,25 @@ class Node:
         str_ += f')'
         return f'{str_}'
 
+    def _result(self, value, children_nodes, op):
+        """ Create the output node of an op. 
+        It is linked to its children only while the computational graph is being built.
+        :param value: the value of the output
+        :param children_nodes: the inputs of the op
+        :param op: the operation performed
+        :return: the output node
+        """
+        if is_grad_enabled():
+            return Node(value, children_nodes=children_nodes, op=op)
+        return Node(value, requires_grad=False, op=op)
+
     def __add__(self, other):
         """ Add two nodes. 
         :param other: the other node
         :return: the sum of the two nodes
         """
         other = other if isinstance(other, Node) else Node(other)
-        out = Node(self.value + other.value, 
-                   children_nodes=(self, other), 
-                   op='+')
-        
-        def backward():
-            self._grad += out._grad
-            other._grad += out._grad
-        out._backward = backward
-
-        return out
+        return self._result(self.value + other.value, (self, other), '+')
 
     def __radd__(self, other):
         """ Add two nodes. 
@@ -75,11 +87,12 @@ class Node:
         return self.__add__(-other)
 
     def __rsub__(self, other):
-        """ Subtract two nodes. 
+        """ Subtract a node from another node. 
         :param other: the other node
         :return: the difference of the two nodes
         """
-        return self.__sub__(other)
+        other = other if isinstance(other, Node) else Node(other)
+        return other.__sub__(self)
 
     def __mul__(self, other):
         """ Multiply two nodes. 
@@ -87,16 +100,7 @@ class Node:
         :return: the product of the two nodes
         """
         other = other if isinstance(other, Node) else Node(other)
-        out = Node(self.value * other.value, 
-                   children_nodes=(self, other), 
-                   op='*')
-        
-        def backward():
-            self._grad += other.value * out._grad
-            other._grad += self.value * out._grad
-        out._backward = backward
-
-        return out
+        return self._result(self.value * other.value, (self, other), '*')
 
     def __rmul__(self, other):
         """ Multiply two nodes. 
@@ -111,23 +115,15 @@ class Node:
         :return: the node raised to the power
         """
         other = other if isinstance(other, Node) else Node(other)
-        out = Node(self.value ** other.value, 
-                   children_nodes=(self, other), 
-                   op='**')
-        def backward():
-            eps = 1e-8
-            self._grad += other.value * self.value ** (other.value - 1) * out._grad
-            # other._grad += self.value ** other.value * math.log(self.value + eps) * out._grad
-        out._backward = backward
-
-        return out
+        return self._result(self.value ** other.value, (self, other), '**')
 
     def __rpow__(self, other):
-        """ Raise a node to a power. 
-        :param other: the power
-        :return: the node raised to the power
+        """ Raise another node to the power of a node. 
+        :param other: the base
+        :return: the base raised to the power of the node
         """
-        return self.__pow__(other)
+        other = other if isinstance(other, Node) else Node(other)
+        return other.__pow__(self)
 
     def __truediv__(self, other):
         """ Divide two nodes. 
@@ -137,11 +133,12 @@ class Node:
         return self.__mul__(other ** -1)
 
     def __rtruediv__(self, other):
-        """ Divide two nodes. 
+        """ Divide another node by a node. 
         :param other: the other node
         :return: the quotient of the two nodes
         """
-        return self.__truediv__(other)
+        other = other if isinstance(other, Node) else Node(other)
+        return other.__truediv__(self)
 
     def __neg__(self):
         """ Negate a node. 
@@ -159,44 +156,32 @@ class Node:
         """ Compute the hyperbolic tangent of a node. 
         :return: the hyperbolic tangent of the node
         """
-        out = Node(math.tanh(self.value), 
-                   children_nodes=(self,), 
-                   op='tanh')
-        
-        def backward():
-            self._grad += (1 - math.tanh(self.value) ** 2) * out._grad
-        out._backward = backward
-
-        return out
+        return self._result(math.tanh(self.value), (self,), 'tanh')
 
     def exp(self):
         """ Compute the exponential of a node. 
         :return: the exponential of the node
         """
-        out = Node(math.exp(self.value), 
-                   children_nodes=(self,), 
-                   op='exp')
-        
-        def backward():
-            self._grad += math.exp(self.value) * out._grad
-        out._backward = backward
-
-        return out
+        return self._result(math.exp(self.value), (self,), 'exp')
 
     def log(self):
         """ Compute the natural logarithm of a node. 
         :return: the natural logarithm of the node
         """
         self = self.clip(min_value=1e-8)
-        out = Node(math.log(self.value), 
-                children_nodes=(self,), 
-                op='log')
-        
-        def backward():
-            self._grad += 1 / self.value * out._grad
-        out._backward = backward
+        return self._result(math.log(self.value), (self,), 'log')
+
+    def relu(self):
+        """ Compute the rectified linear unit of a node. 
+        :return: the rectified linear unit of the node
+        """
+        return self._result(max(0., self.value), (self,), 'relu')
 
-        return out
+    def sigmoid(self):
+        """ Compute the sigmoid of a node. 
+        :return: the sigmoid of the node
+        """
+        return self._result(1 / (1 + math.exp(-self.value)), (self,), 'sigmoid')
 
     def clip(self, min_value=None, max_value=None):
         """ Clip the value of a node. 
@@ -214,42 +199,87 @@ class Node:
             self = (self / self) * Node(max_value)
         return self
 
+    @property
+    def _backward(self):
+        """ Return the backward closure of the node: the one set by its op, else the backward of its op. """
+        if self._backward_fn is not None:
+            return self._backward_fn
+        if self._children_nodes and self._op in Node._OP_BACKWARD:
+            return getattr(self, Node._OP_BACKWARD[self._op])
+        return _no_backward
+
+    @_backward.setter
+    def _backward(self, backward):
+        self._backward_fn = backward
+
+    def _add_backward(self):
+        """ Backpropagate the gradient of a sum to its children. """
+        a, b = self._children_nodes
+        a._grad += self._grad
+        b._grad += self._grad
+
+    def _mul_backward(self):
+        """ Backpropagate the gradient of a product to its children. """
+        a, b = self._children_nodes
+        a._grad += b.value * self._grad
+        b._grad += a.value * self._grad
+
+    def _pow_backward(self):
+        """ Backpropagate the gradient of a power to its base. """
+        a, b = self._children_nodes
+        a._grad += b.value * a.value ** (b.value - 1) * self._grad
+        # b._grad += a.value ** b.value * math.log(a.value + 1e-8) * self._grad
+
+    def _tanh_backward(self):
+        """ Backpropagate the gradient of a hyperbolic tangent to its child. """
+        (a,) = self._children_nodes
+        a._grad += (1 - math.tanh(a.value) ** 2) * self._grad
+
+    def _exp_backward(self):
+        """ Backpropagate the gradient of an exponential to its child. """
+        (a,) = self._children_nodes
+        a._grad += math.exp(a.value) * self._grad
+
+    def _log_backward(self):
+        """ Backpropagate the gradient of a natural logarithm to its child. """
+        (a,) = self._children_nodes
+        a._grad += 1 / a.value * self._grad
+
+    def _relu_backward(self):
+        """ Backpropagate the gradient of a rectified linear unit to its child. """
+        (a,) = self._children_nodes
+        if a.value > 0:
+            a._grad += self._grad
+
+    def _sigmoid_backward(self):
+        """ Backpropagate the gradient of a sigmoid to its child. """
+        (a,) = self._children_nodes
+        a._grad += self.value * (1 - self.value) * self._grad
+
     def _build_node_graph(self):
         """ Build a graph of nodes. 
         :return: the graph of nodes
         """
-        graph = {self: []}
-        stack = [self]
-        while stack:
-            node = stack.pop()
-            for child_node in node._children_nodes:
-                graph[node] = graph.get(node, []) + [child_node]
-                stack.append(child_node)
+        graph = {}
+        for node in engine.topological_sort((self,)):
+            graph[node] = list(node._children_nodes)
 
         return graph
 
-    def backward(self):
+    def backward(self, retain_graph=False):
         """ Backpropagate the gradient. 
+        :param retain_graph: whether to keep the graph after the backward pass, 
+                             by default it is freed and cannot be backpropagated through again
         """
         self._grad = 1.
 
-        # build a stack of nodes and perform backward propagation
-        stack = [self]
-        while stack:
-            node = stack.pop()
-            node._backward()
-            stack.extend(node._children_nodes)
+        # every node is visited once, in reverse topological order
+        engine.backward((self,), retain_graph=retain_graph)
 
     def zero_grad(self):
         """ Reset the gradient to zero. """
-        self._grad = 0.
-
-        # build a stack of nodes and set the gradient to zero
-        stack = [self]
-        while stack:
-            node = stack.pop()
+        for node in engine.topological_sort((self,)):
             node._grad = 0.
-            stack.extend(node._children_nodes)
 
     @property
     def value(self):
@@ -273,6 +303,8 @@ class Node:
 
     def print_graph(self):
         """ Print the graph of nodes """
+        # imported here: pprint pulls in dataclasses and inspect, which would weigh on every import of the autograd
+        import pprint
         pprint.pprint(self._build_node_graph())
 
     def draw_graph(self, show_grad=True, 
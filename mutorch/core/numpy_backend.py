@@ -0,0 +1,303 @@
+""" This file contains the numpy backend: the kernels of kernels.KERNELS, vectorized with numpy.
+
+Tensors keep their values in the same flat buffers as with the pure python backend, of doubles or floats.
+numpy reads those buffers through zero-copy views and writes its results straight into
+new buffers, so both backends share the storage, the autograd tape and the optimizers.
+numpy is an optional dependency: it is only required once this backend is selected.
+"""
+import array
+from . import kernels
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def available():
+    """ Return whether numpy can be imported. """
+    return np is not None
+
+# typecode of a buffer -> dtype of its numpy view
+_DTYPES = {'d': 'float64', 'f': 'float32'}
+
+def _view(buffer):
+    """ Return a numpy array sharing the memory of a buffer. """
+    return np.frombuffer(buffer, dtype=_DTYPES[kernels.typecode_of(buffer)])
+
+def _empty(n):
+    """ Return a new buffer of n elements, of the default dtype, and a numpy view to write it. """
+    out = zeros(n)
+    return out, _view(out)
+
+def _operands(a, b, shapes):
+    """ Return views of two buffers shaped so that numpy broadcasts them against each other.
+    :param shapes: None if the buffers have the same shape, or one of them a single element,
+                   else the (a shape, b shape, output shape) tuple
+    """
+    if shapes is None:
+        return _view(a), _view(b)
+    a_shape, b_shape, _ = shapes
+    return _view(a).reshape(a_shape), _view(b).reshape(b_shape)
+
+def _binary(ufunc, a, b, shapes=None):
+    """ Apply a numpy ufunc to two buffers, broadcast as described by shapes. """
+    a, b = _operands(a, b, shapes)
+    shape = np.broadcast_shapes(a.shape, b.shape)
+    out, view = _empty(int(np.prod(shape)))
+    ufunc(a, b, out=view.reshape(shape))
+    return out
+
+def _unary(ufunc, a):
+    """ Apply a numpy ufunc to a buffer. """
+    out, view = _empty(len(a))
+    ufunc(_view(a), out=view)
+    return out
+
+def _wrap(values):
+    """ Copy a numpy array into a new buffer. """
+    out, view = _empty(values.size)
+    view[:] = values.ravel()
+    return out
+
+def zeros(n, typecode=None):
+    """ Return a buffer of n zeros, of the default dtype unless a typecode is given. """
+    return array.array(typecode or kernels.typecode, [0.]) * n
+
+def full(n, value, typecode=None):
+    """ Return a buffer of n copies of a value, of the default dtype unless a typecode is given. """
+    return array.array(typecode or kernels.typecode, [value]) * n
+
+def add(a, b, shapes=None):
+    """ Return a + b, elementwise. """
+    return _binary(np.add, a, b, shapes)
+
+def sub(a, b, shapes=None):
+    """ Return a - b, elementwise. """
+    return _binary(np.subtract, a, b, shapes)
+
+def mul(a, b, shapes=None):
+    """ Return a * b, elementwise. """
+    return _binary(np.multiply, a, b, shapes)
+
+def div(a, b, shapes=None):
+    """ Return a / b, elementwise. """
+    return _binary(np.true_divide, a, b, shapes)
+
+def div_grad(g, a, b, shapes=None):
+    """ Return the gradient of a / b with respect to b, at the shape of the output gradient g. """
+    a, b = _operands(a, b, shapes)
+    return _wrap(-_view(g).reshape(np.broadcast_shapes(a.shape, b.shape)) * a / (b * b))
+
+def reduce_sum(g, out_shape, shape):
+    """ Sum a gradient of shape out_shape back to the shape of an operand broadcast to out_shape. """
+    shape = (1,) * (len(out_shape) - len(shape)) + tuple(shape)
+    axes = tuple(axis for axis, (n, size) in enumerate(zip(out_shape, shape)) if size == 1 and n != 1)
+    return _wrap(_view(g).reshape(out_shape).sum(axis=axes, dtype=np.float64))
+
+def neg(a):
+    """ Return -a, elementwise. """
+    return _unary(np.negative, a)
+
+def absolute(a):
+    """ Return |a|, elementwise. """
+    return _unary(np.abs, a)
+
+def absolute_grad(g, x):
+    """ Return the gradient of |x|. """
+    return _wrap(_view(g) * np.sign(_view(x)))
+
+def power(a, p, shapes=None):
+    """ Return a ** p, elementwise.
+    :param p: a scalar exponent, or a buffer of exponents broadcast against a as described by shapes
+    """
+    if isinstance(p, (int, float)):
+        return _wrap(np.power(_view(a), p))
+    return _binary(np.power, a, p, shapes)
+
+def power_grad(g, x, p, shapes=None):
+    """ Return the gradient of x ** p with respect to x, at the shape of the output gradient g. """
+    if isinstance(p, (int, float)):
+        return _wrap(_view(g) * p * np.power(_view(x), p - 1))
+    x, p = _operands(x, p, shapes)
+    return _wrap(_view(g).reshape(np.broadcast_shapes(x.shape, p.shape)) * p * np.power(x, p - 1))
+
+def tanh(a):
+    """ Return the hyperbolic tangent of a, elementwise. """
+    return _unary(np.tanh, a)
+
+def tanh_grad(g, y):
+    """ Return the gradient of the hyperbolic tangent, from its output y. """
+    y = _view(y)
+    return _wrap(_view(g) * (1 - y * y))
+
+def log(a):
+    """ Return the natural logarithm of a, elementwise, with the input clipped to 1e-8. """
+    return _wrap(np.log(np.maximum(_view(a), 1e-8)))
+
+def log_grad(g, x):
+    """ Return the gradient of the clipped logarithm: no gradient flows through the clipped values. """
+    out, view = _empty(len(x))
+    x = _view(x)
+    np.divide(_view(g), x, out=view, where=x >= 1e-8)
+    return out
+
+def relu(a):
+    """ Return the rectified linear unit of a, elementwise. """
+    return _wrap(np.where(_view(a) > 0, _view(a), 0.))
+
+def relu_grad(g, x):
+    """ Return the gradient of the rectified linear unit. """
+    return _wrap(np.where(_view(x) > 0, _view(g), 0.))
+
+def sigmoid(a):
+    """ Return the sigmoid of a, elementwise, as exp(-log(1 + exp(-x))) which never overflows. """
+    return _wrap(np.exp(-np.logaddexp(0., -_view(a))))
+
+def sigmoid_grad(g, y):
+    """ Return the gradient of the sigmoid, from its output y. """
+    y = _view(y)
+    return _wrap(_view(g) * y * (1 - y))
+
+# functions read by the sources of fused expressions, see fusion.py
+_FUSED_FUNCTIONS = {'tanh': lambda x: np.tanh(x), 'log': lambda x: np.log(np.maximum(x, 1e-8)),
+                    'relu': lambda x: np.maximum(x, 0.), 'sigmoid': lambda x: np.exp(-np.logaddexp(0., -x)),
+                    'sign': lambda x: np.sign(x), 'step': lambda x: np.greater(x, 0.) * 1.,
+                    'dlog': lambda x: np.where(x >= 1e-8, 1 / np.maximum(x, 1e-8), 0.)}
+# (source of a fused expression, number of operands) -> compiled function
+_fused = {}
+
+def elementwise(expression, operands, shapes, out_shape):
+    """ Evaluate a fused expression on its operands broadcast to out_shape, with numpy ops on whole arrays.
+    :param expression: the python source of the expression over the arguments x0, x1, ... one per operand
+    :param operands: the buffers of the operands
+    :param shapes: the shapes of the operands
+    """
+    fn = _fused.get((expression, len(operands)))
+    if fn is None:
+        args = ', '.join(f'x{i}' for i in range(len(operands)))
+        fn = _fused[expression, len(operands)] = eval(f'lambda {args}: {expression}', dict(_FUSED_FUNCTIONS))
+    values = fn(*(_view(x).reshape(shape) for x, shape in zip(operands, shapes)))
+    return _wrap(np.broadcast_to(values, out_shape))
+
+def total(a):
+    """ Return the sum of the elements of a buffer, as a python float, accumulated in double. """
+    return float(_view(a).sum(dtype=np.float64))
+
+def accumulate(grad, values):
+    """ Add values into a gradient buffer, in place.
+    The values are summed when the gradient belongs to a broadcast operand.
+    """
+    if len(grad) == len(values):
+        view = _view(grad)
+        view += _view(values)
+    else:
+        grad[0] += total(values)
+
+def transpose(a, rows, cols):
+    """ Return the (cols, rows) transpose of a row-major (rows, cols) buffer. """
+    return _wrap(_view(a).reshape(rows, cols).T)
+
+def matmul(a, b, m, k, n, block_size=None):
+    """ Multiply a row-major (m, k) buffer with a row-major (k, n) buffer.
+    The tiling is left to the BLAS library numpy is linked against, block_size is ignored.
+    :return: the row-major (m, n) product
+    """
+    out, view = _empty(m * n)
+    np.matmul(_view(a).reshape(m, k), _view(b).reshape(k, n), out=view.reshape(m, n))
+    return out
+
+def add_rows(a, row, rows, cols):
+    """ Add a row of cols elements to every row of a row-major (rows, cols) buffer, in place. """
+    view = _view(a).reshape(rows, cols)
+    view += _view(row)
+
+def bias_activation(a, row, rows, cols, activation=None):
+    """ Add a row of cols elements to every row of a row-major (rows, cols) buffer and apply an activation, in place.
+    :param activation: 'relu', 'tanh', 'sigmoid', or None to only add the row
+    :return: the output buffer
+    """
+    add_rows(a, row, rows, cols)
+    view = _view(a)
+    if activation == 'relu':
+        np.maximum(view, 0., out=view)
+    elif activation == 'tanh':
+        np.tanh(view, out=view)
+    elif activation == 'sigmoid':
+        np.exp(-np.logaddexp(0., -view), out=view)
+    elif activation is not None:
+        raise ValueError(f'Unknown activation: {activation}')
+    return a
+
+def softmax(a, outer, n, inner):
+    """ Return the softmax of an (outer, n, inner) buffer along its middle axis.
+    The maximum of every line is subtracted before the exponential, which therefore never overflows.
+    """
+    out, view = _empty(len(a))
+    a, view = _view(a).reshape(outer, n, inner), view.reshape(outer, n, inner)
+    np.exp(a - a.max(axis=1, keepdims=True), out=view)
+    view /= view.sum(axis=1, keepdims=True, dtype=np.float64)
+    return out
+
+def softmax_grad(g, y, outer, n, inner):
+    """ Return the gradient of the softmax along the middle axis of an (outer, n, inner) buffer, 
+    y * (g - sum(g * y)) on every line, from its output y. """
+    g, y = _view(g).reshape(outer, n, inner), _view(y).reshape(outer, n, inner)
+    return _wrap(y * (g - (g * y).sum(axis=1, keepdims=True)))
+
+def cross_entropy(logits, targets, rows, cols):
+    """ Compute the cross entropy between the rows of a (rows, cols) buffer of scores and target distributions,
+    as a log-softmax over every row, with its maximum subtracted, fused with the negative log likelihood.
+    The loss is computed in double whatever the dtype of the scores.
+    :param targets: the (rows, cols) buffer of one-hot, or probability, targets
+    :return: the loss averaged over the rows, and the softmax of the scores
+    """
+    logits = _view(logits).reshape(rows, cols).astype(np.float64, copy=False)
+    targets = _view(targets).reshape(rows, cols)
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    total = exp.sum(axis=1, keepdims=True)
+    loss = -float((targets * (shifted - np.log(total))).sum()) / rows
+    return loss, _wrap(exp / total)
+
+def cross_entropy_grad(g, probs, targets, rows, cols):
+    """ Return the gradient of the cross entropy with respect to the scores, g * (softmax - target) / rows 
+    for targets summing to one.
+    :param g: the gradient of the loss, a python float
+    """
+    probs, targets = _view(probs).reshape(rows, cols), _view(targets).reshape(rows, cols)
+    return _wrap((probs * targets.sum(axis=1, keepdims=True) - targets) * (g / rows))
+
+def sum_rows(a, rows, cols):
+    """ Return the sum of the rows of a row-major (rows, cols) buffer. """
+    return _wrap(_view(a).reshape(rows, cols).sum(axis=0, dtype=np.float64))
+
+def sgd(values, grad, lr, velocity=None, momentum=0., weight_decay=0.):
+    """ Apply a gradient descent step to a buffer of parameters, in place.
+    A weight decay adds weight_decay * values to the gradient, an L2 penalty, before the momentum.
+    With momentum, the step follows the velocity buffer, updated in place as velocity = momentum * velocity + grad.
+    """
+    g = _view(grad)
+    view = _view(values)
+    if weight_decay:
+        # a new array, the gradient buffer itself is left as it is
+        g = g + weight_decay * view
+    if momentum:
+        u = _view(velocity)
+        u *= momentum
+        u += g
+        g = u
+    view -= lr * g
+
+def adam(values, grad, m, v, lr, beta1, beta2, eps, t, weight_decay=0.):
+    """ Apply an Adam step to a buffer of parameters and its moment estimates, in place.
+    A weight decay shrinks the parameters before the step, decoupled from the moment estimates as in AdamW.
+    """
+    g, m, v = _view(grad), _view(m), _view(v)
+    m *= beta1
+    m += (1 - beta1) * g
+    v *= beta2
+    v += (1 - beta2) * g * g
+    view = _view(values)
+    if weight_decay:
+        view *= 1 - lr * weight_decay
+    view -= lr * (m / (1 - beta1 ** t)) / (np.sqrt(v / (1 - beta2 ** t)) + eps)
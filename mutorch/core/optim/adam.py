@@ -1,5 +1,10 @@
 import math
-from module import Module
+from .. import kernels
+from ..module import Module, _flat_buffers
+
+def _moments(storage):
+    """ Return a buffer of zero moment estimates for a buffer of parameters, of the same dtype. """
+    return kernels.zeros(len(storage), kernels.typecode_of(storage))
 
 class Adam(Module):
     def __init__(self, parameters, lr=0.001, beta1=0.9, beta2=0.999, eps=1e-8):
@@ -9,6 +14,7 @@ class Adam(Module):
         :param beta1: exponential decay rate for the first moment estimates
         :param beta2: exponential decay rate for the second-moment estimates
         :param eps: term added to the denominator to improve numerical stability
+        The parameters gathered by Module.flatten_parameters are updated in a single step over their buffers.
         """
         super().__init__()
         self.parameters = parameters
@@ -17,13 +23,29 @@ class Adam(Module):
         self.beta2 = beta2
         self.eps = eps
         self.t = 0
-        self.m = [0] * len(parameters)
-        self.v = [0] * len(parameters)
+        # decoupled weight decay, see AdamW
+        self.weight_decay = 0.
+        self._flat = _flat_buffers(parameters)
+        # array-backed tensor parameters keep one moment estimate per element, in a single buffer when they are flattened
+        if self._flat is not None:
+            self.m, self.v = _moments(self._flat[0]), _moments(self._flat[0])
+        else:
+            self.m = [_moments(p._storage) if 'Tensor' in str(type(p)) else 0 for p in parameters]
+            self.v = [_moments(p._storage) if 'Tensor' in str(type(p)) else 0 for p in parameters]
 
     def step(self):
         """ Performs a single optimization step. """
         self.t += 1
+        if self._flat is not None:
+            kernels.adam(*self._flat, self.m, self.v, self.lr, self.beta1, self.beta2, self.eps, self.t, self.weight_decay)
+            return
         for i, param in enumerate(self.parameters):
+            if 'Tensor' in str(type(param)):
+                kernels.adam(param._storage, param._grad_buffer(), self.m[i], self.v[i],
+                             self.lr, self.beta1, self.beta2, self.eps, self.t, self.weight_decay)
+                continue
+            if self.weight_decay:
+                param._value *= 1 - self.lr * self.weight_decay
             self.m[i] = self.beta1 * self.m[i] + (1 - self.beta1) * param.grad
             self.v[i] = self.beta2 * self.v[i] + (1 - self.beta2) * param.grad ** 2
             m_hat = self.m[i] / (1 - self.beta1 ** self.t)
@@ -32,6 +54,9 @@ class Adam(Module):
 
     def zero_grad(self):
         """ Sets gradients of all optimized parameters to zero. """
+        if self._flat is not None:
+            self._flat[1][:] = kernels.zeros(len(self._flat[1]), kernels.typecode_of(self._flat[1]))
+            return
         for param in self.parameters:
             param.zero_grad()
 
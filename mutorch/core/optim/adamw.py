@@ -0,0 +1,18 @@
+from .adam import Adam
+
+class AdamW(Adam):
+    def __init__(self, parameters, lr=0.001, beta1=0.9, beta2=0.999, eps=1e-8, weight_decay=0.01):
+        """ Adam optimizer with decoupled weight decay: the parameters shrink by lr * weight_decay at every step,
+        apart from the moment estimates of their gradients.
+        :param parameters: list of parameters to optimize
+        :param lr: learning rate
+        :param beta1: exponential decay rate for the first moment estimates
+        :param beta2: exponential decay rate for the second-moment estimates
+        :param eps: term added to the denominator to improve numerical stability
+        :param weight_decay: weight decay coefficient
+        """
+        super().__init__(parameters, lr=lr, beta1=beta1, beta2=beta2, eps=eps)
+        self.weight_decay = weight_decay
+
+    def __repr__(self):
+        return f"AdamW(lr={self.lr}, beta1={self.beta1}, beta2={self.beta2}, eps={self.eps}, weight_decay={self.weight_decay})"
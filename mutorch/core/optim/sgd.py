@@ -1,24 +1,55 @@
-from module import Module
+from .. import kernels
+from ..module import Module, _flat_buffers
 
 class SGD(Module):
-    def __init__(self, parameters, lr=0.001):
+    def __init__(self, parameters, lr=0.001, momentum=0., weight_decay=0.):
         """ Stochastic Gradient Descent optimizer
+        The parameters gathered by Module.flatten_parameters are updated in a single step over their buffers.
         :param parameters: list of parameters to optimize
         :param lr: learning rate
+        :param momentum: momentum factor, the steps following the velocity = momentum * velocity + gradient
+        :param weight_decay: L2 penalty, weight_decay * parameter added to the gradient before the momentum, as in
+                             torch.optim.SGD; see AdamW for a weight decay decoupled from the gradient
         """
         super().__init__()
         self.parameters = parameters
         self.lr = lr
+        self.momentum = momentum
+        self.weight_decay = weight_decay
+        self._flat = _flat_buffers(parameters)
+        # the velocities of array-backed tensor parameters are buffers, of all of them at once when they are flattened
+        if self._flat is not None:
+            self.velocity = kernels.zeros(len(self._flat[0]), kernels.typecode_of(self._flat[0])) if momentum else None
+        else:
+            self.velocity = [(kernels.zeros(len(p._storage), kernels.typecode_of(p._storage)) if 'Tensor' in str(type(p)) else 0.) if momentum else None
+                             for p in parameters]
 
     def step(self):
         """ Performs a single optimization step. """
-        for param in self.parameters:
-            param._value -= self.lr * param.grad
+        if self._flat is not None:
+            kernels.sgd(*self._flat, self.lr, self.velocity, self.momentum, self.weight_decay)
+            return
+        for i, param in enumerate(self.parameters):
+            if 'Tensor' in str(type(param)):
+                kernels.sgd(param._storage, param._grad_buffer(), self.lr, self.velocity[i], self.momentum, self.weight_decay)
+                continue
+            grad = param.grad + self.weight_decay * param._value if self.weight_decay else param.grad
+            if self.momentum:
+                self.velocity[i] = self.momentum * self.velocity[i] + grad
+                param._value -= self.lr * self.velocity[i]
+            else:
+                param._value -= self.lr * grad
 
     def zero_grad(self):
         """ Sets gradients of all optimized parameters to zero. """
+        if self._flat is not None:
+            self._flat[1][:] = kernels.zeros(len(self._flat[1]), kernels.typecode_of(self._flat[1]))
+            return
         for param in self.parameters:
             param.zero_grad()
 
     def __repr__(self):
-        return f"SGD(lr={self.lr})"
\ No newline at end of file
+        str_ = f"SGD(lr={self.lr}"
+        str_ += f", momentum={self.momentum}" if self.momentum else ""
+        str_ += f", weight_decay={self.weight_decay}" if self.weight_decay else ""
+        return str_ + ")"
@@ -0,0 +1,275 @@
+""" This file contains DataParallel: the batches of a training step split across worker processes.
+
+Every worker process holds a replica of the model, forked from the model. At every step, the parameters
+of the model are copied into shared memory and loaded by every replica, so that the replicas hold the same
+values, bit for bit, as the model. Every worker runs the forward and backward passes of its slice of the
+batch and writes its gradients into its own slot of shared memory. The slots are then all-reduced by the
+workers themselves: each one sums a range of the parameters over the slots, always in worker order, so
+that the result does not depend on the timing of the workers. The model receives the summed gradients,
+and is updated by its optimizer in the main process, as after loss.backward().
+A worker that dies fails the step instead of blocking it: the main process polls the workers while it waits
+for their results, and the others give up waiting at the all-reduce after a timeout.
+"""
+import array
+import weakref
+import threading
+import traceback
+import multiprocessing
+import multiprocessing.connection
+from multiprocessing import shared_memory
+from . import kernels
+from .module import Module
+from .tensor import Tensor, _as_array
+
+# the seconds between two checks that the workers are alive, while waiting for their results
+_POLL_INTERVAL = 0.1
+
+def _split(n, parts):
+    """ Return the (start, stop) ranges of n rows split into parts of sizes differing by at most one. """
+    size, extra = divmod(n, parts)
+    ranges, start = [], 0
+    for i in range(parts):
+        stop = start + size + (i < extra)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def _view(memory, n, typecode):
+    """ Return the first n values of a shared memory block, of a given typecode, as a writable memoryview. """
+    return memory.buf.cast(typecode)[:n]
+
+def _row_size(shape):
+    """ Return the number of values of a row of a tensor of a given shape. """
+    size = 1
+    for n in shape[1:]:
+        size *= n
+    return size
+
+def _worker(rank, model, connection, barrier, memories, sizes, typecode):
+    """ The loop of a worker process: run the steps sent through its connection, until it receives None,
+    or until the all-reduce fails because another worker did not reach it in time. """
+    params, grads, reduced, inputs = (_view(memory, size, typecode) for memory, size in zip(memories, sizes))
+    parameters = model.parameters()
+    num_workers = len(grads) // len(params)
+    n = len(params)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        x_shape, y_shape, (start, stop), batch_size, loss_fn = message
+        slot = grads[rank * n:(rank + 1) * n]
+        loss, error = 0., None
+        try:
+            offset = 0
+            for p in parameters:
+                memoryview(p._storage)[:] = params[offset:offset + len(p._storage)]
+                offset += len(p._storage)
+            model.zero_grad()
+            if stop > start:
+                x_row, y_row = _row_size(x_shape), _row_size(y_shape)
+                x_size = x_shape[0] * x_row
+                x = Tensor._from_storage(array.array(typecode, inputs[start * x_row:stop * x_row]),
+                                         (stop - start,) + x_shape[1:], requires_grad=False)
+                y = Tensor._from_storage(array.array(typecode, inputs[x_size + start * y_row:x_size + stop * y_row]),
+                                         (stop - start,) + y_shape[1:], requires_grad=False)
+                # the loss of the slice is weighted by its share of the batch, as in Sequential.accumulate
+                out = loss_fn(model(x), y) * ((stop - start) / batch_size)
+                out.backward()
+                loss = out.item()
+            offset = 0
+            for p in parameters:
+                size = len(p._storage)
+                slot[offset:offset + size] = p._grad if p._grad is not None else kernels.zeros(size, typecode)
+                offset += size
+        except Exception:
+            error = traceback.format_exc()
+            slot[:] = kernels.zeros(n, typecode)
+        # all-reduce: once every slot is written, sum this worker's range of the parameters over the slots
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            # a broken barrier stays broken: the workers stop, and are restarted by the next step
+            connection.send((loss, traceback.format_exc(), False))
+            break
+        first, last = _split(n, num_workers)[rank]
+        total = array.array(typecode, grads[first:last])
+        for other in range(1, num_workers):
+            kernels.accumulate(total, grads[other * n + first:other * n + last])
+        reduced[first:last] = total
+        connection.send((loss, error, True))
+
+def _shutdown(workers, views, memories, timeout):
+    """ Stop the worker processes of a DataParallel and free its shared memory, see DataParallel.close.
+    It does not reference the DataParallel, so that it can also run when the DataParallel is garbage collected.
+    """
+    for process, connection in workers:
+        try:
+            connection.send(None)
+        except OSError:
+            # the worker is dead
+            pass
+    for process, connection in workers:
+        process.join(timeout)
+        if process.is_alive():
+            # a worker waiting at the all-reduce for a dead one
+            process.terminate()
+            process.join()
+        connection.close()
+    for view in views:
+        view.release()
+    for memory in memories:
+        memory.close()
+        memory.unlink()
+
+class DataParallel(Module):
+    def __init__(self, model, num_workers, timeout=60.):
+        """ Train a model with the batches of every step split across worker processes, see parallel.py.
+        The workers are forked from the process when the first step runs, and hold a replica of the model.
+        They are restarted when a batch does not fit the shared memory sized after the batches seen so far,
+        and after a step failed by a worker that died. They are stopped, and the shared memory freed,
+        by close() or when the DataParallel is garbage collected.
+        Worker processes are forked, which requires a POSIX system.
+        :param model: a model of array-backed tensor parameters, e.g. a Sequential of Linear layers
+        :param num_workers: the number of worker processes
+        :param timeout: the seconds a worker waits for the others at the all-reduce of a step, before the step fails
+        """
+        super().__init__()
+        if num_workers < 1:
+            raise ValueError(f'num_workers must be positive, but got {num_workers}.')
+        if any(p._storage is None for p in model.parameters()):
+            raise ValueError('DataParallel requires a model whose parameters are array-backed tensors.')
+        typecodes = {kernels.typecode_of(p._storage) for p in model.parameters()}
+        if len(typecodes) > 1:
+            raise ValueError(f'DataParallel requires a model whose parameters have the same dtype, but got typecodes {typecodes}.')
+        self.model = model
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self._parameters = model.parameters()
+        # the typecode of the shared memory: the inputs and the targets are converted to the dtype of the parameters
+        self._typecode = typecodes.pop() if typecodes else kernels.typecode
+        self._size = sum(len(p._storage) for p in self._parameters)
+        self._capacity = 0
+        self._workers = []
+        self._finalizer = None
+
+    def _start(self, capacity):
+        """ Allocate the shared memory and fork the worker processes.
+        :param capacity: the number of input and target values a step can hold
+        """
+        self.close()
+        context = multiprocessing.get_context('fork')
+        sizes = (self._size, self._size * self.num_workers, self._size, capacity)
+        itemsize = array.array(self._typecode).itemsize
+        self._memories = [shared_memory.SharedMemory(create=True, size=max(8, itemsize * size)) for size in sizes]
+        views = [_view(memory, size, self._typecode) for memory, size in zip(self._memories, sizes)]
+        self._params, self._grads, self._reduced, self._inputs = views
+        self._finalizer = weakref.finalize(self, _shutdown, self._workers, views, self._memories, self.timeout)
+        barrier = context.Barrier(self.num_workers, timeout=self.timeout)
+        for rank in range(self.num_workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=_worker, daemon=True,
+                                      args=(rank, self.model, worker_connection, barrier, self._memories, sizes, self._typecode))
+            process.start()
+            # only the worker holds its end, so that the main process reads the end of the pipe if it dies
+            worker_connection.close()
+            self._workers.append((process, connection))
+        self._capacity = capacity
+
+    def forward(self, inputs):
+        """ Forward pass of the model, in this process. """
+        return self.model(inputs)
+
+    def accumulate(self, inputs, targets, loss_fn):
+        """ Accumulate the gradients of a batch whose rows are split across the workers, as
+        model.accumulate(micro_batches, loss_fn) does for micro-batches in this process.
+        The gradients are added to the ones held by the parameters.
+        :param inputs: the (batch, ...) inputs
+        :param targets: the targets, with one row per input. A flat list holds one target per row.
+        :param loss_fn: the loss function, called as loss_fn(outputs, targets)
+        :return: the loss of the whole batch, as a python float
+        """
+        x = _as_array(inputs)
+        if not 'Tensor' in str(type(targets)) and not isinstance(targets[0], list):
+            targets = [[value] for value in targets]
+        y = _as_array(targets)
+        if x.shape[0] != y.shape[0]:
+            raise ValueError(f'The inputs and the targets must have the same number of rows, but got {x.shape[0]} and {y.shape[0]}.')
+        if len(x._storage) + len(y._storage) > self._capacity:
+            self._start(len(x._storage) + len(y._storage))
+
+        offset = 0
+        for p in self._parameters:
+            self._params[offset:offset + len(p._storage)] = p._storage
+            offset += len(p._storage)
+        x_values, y_values = (storage if kernels.typecode_of(storage) == self._typecode else array.array(self._typecode, storage)
+                              for storage in (x._storage, y._storage))
+        self._inputs[:len(x_values)] = x_values
+        self._inputs[len(x_values):len(x_values) + len(y_values)] = y_values
+        batch_size = x.shape[0]
+        try:
+            for (_, connection), rows in zip(self._workers, _split(batch_size, self.num_workers)):
+                connection.send((x.shape, y.shape, rows, batch_size, loss_fn))
+        except OSError:
+            # the connection of a worker that died since the previous step
+            self._abort()
+            raise RuntimeError('A worker process died before the step.')
+        results = self._results()
+        errors = [error for _, error, _ in results if error is not None]
+        if not all(running for _, _, running in results):
+            self.close()
+        if errors:
+            raise RuntimeError(f'A worker failed to run its slice of the batch:\n{errors[0]}')
+
+        offset = 0
+        for p in self._parameters:
+            size = len(p._storage)
+            if p.requires_grad:
+                kernels.accumulate(p._grad_buffer(), self._reduced[offset:offset + size])
+            offset += size
+        return sum(loss for loss, _, _ in results)
+
+    def _results(self):
+        """ Return the results of the step sent to the workers, in worker order.
+        The step fails, and the workers are stopped, if a worker dies before sending its result.
+        """
+        results, pending = {}, {connection: rank for rank, (_, connection) in enumerate(self._workers)}
+        while pending:
+            ready = multiprocessing.connection.wait(list(pending), _POLL_INTERVAL)
+            for connection in ready:
+                try:
+                    results[pending.pop(connection)] = connection.recv()
+                except EOFError:
+                    ready = ()
+                    break
+            if not ready and any(not self._workers[rank][0].is_alive() for rank in pending.values()):
+                self._abort()
+                raise RuntimeError('A worker process died during the step.')
+        return [results[rank] for rank in range(self.num_workers)]
+
+    def _abort(self):
+        """ Kill the worker processes, which may be waiting at the all-reduce for a dead one, and close. """
+        for process, _ in self._workers:
+            process.terminate()
+        self.close()
+
+    def close(self):
+        """ Stop the worker processes and free the shared memory. """
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+        self._workers = []
+        for view in ('_params', '_grads', '_reduced', '_inputs'):
+            if hasattr(self, view):
+                delattr(self, view)
+        self._memories = []
+        self._capacity = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return f"DataParallel(model={type(self.model).__name__}, num_workers={self.num_workers})"
@@ -0,0 +1,186 @@
+""" This file contains the op-level profiler: the time, the nodes and the memory spent in every op of a training step.
+
+While a profile is active, the ops of Node and Tensor, the calls and forward passes of the modules and the steps
+of the optimizers are replaced on their classes by wrappers recording every call. They are restored when the profile
+exits, so that code running outside of a profile calls the ops themselves, without any check or indirection.
+Every call is recorded with its wall time, the part of it not spent in nested recorded calls (self time),
+the nodes constructed and, with memory=True, the bytes traced by tracemalloc that it left allocated.
+The calls can be summarized in a table, or exported as Chrome trace events, to be opened in chrome://tracing or Perfetto.
+"""
+import os
+import json
+import time
+import functools
+import threading
+import tracemalloc
+from .node import Node
+from .tensor import Tensor
+from .module import Module
+
+# the ops recorded on Node and Tensor
+NODE_OPS = ('__add__', '__radd__', '__sub__', '__rsub__', '__mul__', '__rmul__', '__pow__', '__rpow__',
+            '__truediv__', '__rtruediv__', '__neg__', '__abs__', 'tanh', 'exp', 'log', 'relu', 'sigmoid', 'clip',
+            'backward')
+TENSOR_OPS = NODE_OPS + ('__init__', '__getitem__', 'sum', 'mean', 'matmul', '__matmul__', '__rmatmul__',
+                         'softmax', 'max', 'flatten', 'detach', 'to_array', 'to_nodes')
+# the methods recorded on Module and its subclasses: Sequential runs its layers with forward, without __call__
+MODULE_METHODS = ('__call__', 'forward', 'step')
+# the columns a summary can be sorted by
+SORT_KEYS = ('calls', 'total', 'self', 'nodes', 'bytes')
+
+# the profile recording the calls, if any
+_active = None
+# the number of nodes constructed while a profile is active
+_nodes = 0
+
+def _subclasses(cls):
+    """ Return a class and all of its subclasses. """
+    classes = [cls]
+    for subclass in cls.__subclasses__():
+        classes.extend(_subclasses(subclass))
+    return classes
+
+def _recorded(fn, name, by_type):
+    """ Return a wrapper of a function recording its calls in the active profile.
+    :param by_type: whether the name is prefixed with the type of the first argument, e.g. Linear.__call__, rather than
+                    with the class defining the function
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profile = _active
+        if profile is None:
+            return fn(*args, **kwargs)
+        return profile._call(f'{type(args[0]).__name__}.{name}' if by_type else name, fn, args, kwargs)
+    return wrapper
+
+def _counted(init):
+    """ Return a wrapper of Node.__init__ counting the nodes constructed. """
+    @functools.wraps(init)
+    def wrapper(*args, **kwargs):
+        global _nodes
+        _nodes += 1
+        return init(*args, **kwargs)
+    return wrapper
+
+class profile:
+    def __init__(self, memory=True):
+        """ Context manager recording the calls of the ops, the modules and the optimizers run under it, see profiler.py.
+        :param memory: whether to trace the bytes allocated by every call with tracemalloc, which slows the calls down:
+                       pass False to time them as they run outside of the profile
+        """
+        self.memory = memory
+        # name -> [calls, total seconds, self seconds, nodes, bytes]
+        self.stats = {}
+        # (name, thread id, start, duration, nodes, bytes) of every call
+        self.events = []
+        self._patched = []
+        self._stacks = threading.local()
+        self._tracing = False
+        self._start = 0.
+
+    def _patch(self):
+        """ Replace the ops, the module calls and the optimizer steps by recording wrappers. """
+        targets = [(Node, '__init__', _counted(Node.__init__))]
+        targets.extend((Node, op, _recorded(Node.__dict__[op], f'Node.{op}', False)) for op in NODE_OPS if op in Node.__dict__)
+        targets.extend((Tensor, op, _recorded(Tensor.__dict__[op], f'Tensor.{op}', False)) for op in TENSOR_OPS if op in Tensor.__dict__)
+        for cls in _subclasses(Module):
+            # the optimizers are the modules defining a step
+            targets.extend((cls, name, _recorded(cls.__dict__[name], name, True))
+                           for name in MODULE_METHODS if name in cls.__dict__)
+        for cls, name, wrapper in targets:
+            self._patched.append((cls, name, cls.__dict__[name]))
+            setattr(cls, name, wrapper)
+
+    def _unpatch(self):
+        """ Restore the functions replaced by _patch. """
+        for cls, name, fn in reversed(self._patched):
+            setattr(cls, name, fn)
+        self._patched = []
+
+    def __enter__(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError('Another profile is already active.')
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._patch()
+        self._start = time.perf_counter()
+        _active = self
+        return self
+
+    def __exit__(self, *args):
+        global _active
+        _active = None
+        self._unpatch()
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        return False
+
+    def _call(self, name, fn, args, kwargs):
+        """ Run a recorded call, and add it to the stats and the events. """
+        stack = getattr(self._stacks, 'calls', None)
+        if stack is None:
+            stack = self._stacks.calls = []
+        nodes = _nodes
+        allocated = tracemalloc.get_traced_memory()[0] if self.memory else 0
+        # the time spent in the nested recorded calls, subtracted from the total to get the self time
+        nested = [0.]
+        stack.append(nested)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += duration
+            nodes = _nodes - nodes
+            allocated = tracemalloc.get_traced_memory()[0] - allocated if self.memory else None
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = [0, 0., 0., 0, 0 if self.memory else None]
+            stat[0] += 1
+            stat[1] += duration
+            stat[2] += duration - nested[0]
+            stat[3] += nodes
+            if self.memory:
+                stat[4] += allocated
+            self.events.append((name, threading.get_ident(), start - self._start, duration, nodes, allocated))
+
+    def table(self, sort_by='total', limit=None):
+        """ Return the summary of the recorded calls, one row per op, as a string to print.
+        The total time, nodes and bytes of a call include those of the calls nested in it, the self time does not.
+        :param sort_by: the column the rows are sorted by, in decreasing order, one of SORT_KEYS
+        :param limit: the number of rows, or None for all of them
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f'sort_by must be one of {SORT_KEYS}, but got {sort_by}.')
+        column = SORT_KEYS.index(sort_by)
+        rows = sorted(self.stats.items(), key=lambda item: item[1][column] or 0, reverse=True)[:limit]
+        width = max([len('op')] + [len(name) for name, _ in rows])
+        lines = [f'{"op":<{width}}{"calls":>10}{"total [ms]":>13}{"self [ms]":>12}{"mean [us]":>12}{"nodes":>10}{"KB":>12}']
+        for name, (calls, total, self_time, nodes, allocated) in rows:
+            allocated = f'{allocated / 1e3:.1f}' if allocated is not None else '-'
+            lines.append(f'{name:<{width}}{calls:>10}{total * 1e3:>13.3f}{self_time * 1e3:>12.3f}'
+                         f'{total / calls * 1e6:>12.2f}{nodes:>10}{allocated:>12}')
+        return '\n'.join(lines)
+
+    def export_chrome_trace(self, filename):
+        """ Write the recorded calls as Chrome trace events, one complete event per call, nested by their times.
+        :param filename: the path of the JSON file
+        """
+        pid = os.getpid()
+        events = []
+        for name, tid, start, duration, nodes, allocated in self.events:
+            event = {'name': name, 'cat': name.split('.')[0], 'ph': 'X', 'pid': pid, 'tid': tid,
+                     'ts': start * 1e6, 'dur': duration * 1e6, 'args': {'nodes': nodes}}
+            if allocated is not None:
+                event['args']['bytes'] = allocated
+            events.append(event)
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def __repr__(self):
+        return f"profile(memory={self.memory}, ops={len(self.stats)}, calls={len(self.events)})"
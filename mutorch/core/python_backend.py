@@ -0,0 +1,378 @@
+""" This file contains the pure python backend: loops over the flat buffers of array-backed tensors.
+
+Every function works on whole buffers so that a tensor op, and its backward
+closure, runs a single loop instead of one Node (and one closure) per element.
+Elementwise kernels take the shapes of their operands when those differ, and broadcast
+them following numpy's rules by walking their buffers, without building expanded copies.
+It is the default backend, and the reference for the kernels listed in kernels.KERNELS.
+"""
+import array
+import math
+import itertools
+import operator
+from . import kernels
+
+def zeros(n, typecode=None):
+    """ Return a buffer of n zeros, of the default dtype unless a typecode is given. """
+    return array.array(typecode or kernels.typecode, [0.]) * n
+
+def full(n, value, typecode=None):
+    """ Return a buffer of n copies of a value, of the default dtype unless a typecode is given. """
+    return array.array(typecode or kernels.typecode, [value]) * n
+
+def _broadcast(buffer, n):
+    """ Iterate over a buffer broadcast to n elements. """
+    if len(buffer) == 1 and n != 1:
+        return itertools.repeat(buffer[0], n)
+    return buffer
+
+def _groups(shape, out_shape):
+    """ Merge the dimensions of an operand broadcast to out_shape into groups of (output size, operand size),
+    in which the operand either has every element (both sizes equal) or is broadcast (operand size 1).
+    Dimensions of size 1 in the output are dropped.
+    """
+    shape = (1,) * (len(out_shape) - len(shape)) + tuple(shape)
+    groups = []
+    for n, size in zip(out_shape, shape):
+        if n == 1:
+            continue
+        if groups and (groups[-1][1] == 1) == (size == 1):
+            groups[-1] = (groups[-1][0] * n, groups[-1][1] * size)
+        else:
+            groups.append((n, size))
+    return groups or [(1, 1)]
+
+def _expand_groups(buffer, offset, groups):
+    """ Iterate over the elements of a buffer, from offset, in the order of its broadcast groups. """
+    (n, size), rest = groups[0], groups[1:]
+    if not rest:
+        return itertools.repeat(buffer[offset], n) if size == 1 else buffer[offset:offset + n]
+    block = 1
+    for _, inner in rest:
+        block *= inner
+    step = 0 if size == 1 else block
+    return itertools.chain.from_iterable(_expand_groups(buffer, offset + i * step, rest) for i in range(n))
+
+def _expand(buffer, shape, out_shape):
+    """ Iterate over a row-major buffer of a given shape broadcast to out_shape.
+    The elements are read through index arithmetic: the broadcast buffer is never materialized.
+    """
+    if tuple(shape) == tuple(out_shape):
+        return buffer
+    if len(buffer) == 1:
+        n = 1
+        for size in out_shape:
+            n *= size
+        return itertools.repeat(buffer[0], n)
+    return _expand_groups(buffer, 0, _groups(shape, out_shape))
+
+def _operands(a, b, shapes):
+    """ Iterate over two buffers broadcast against each other.
+    :param shapes: None if the buffers have the same shape, or one of them a single element,
+                   else the (a shape, b shape, output shape) tuple
+    """
+    if shapes is None:
+        n = max(len(a), len(b))
+        return _broadcast(a, n), _broadcast(b, n)
+    a_shape, b_shape, out_shape = shapes
+    return _expand(a, a_shape, out_shape), _expand(b, b_shape, out_shape)
+
+def unary(fn, a):
+    """ Apply fn to every element of a buffer. """
+    return array.array(kernels.typecode, map(fn, a))
+
+def binary(fn, a, b, shapes=None):
+    """ Apply fn to every pair of elements of two buffers, broadcast as described by shapes. """
+    return array.array(kernels.typecode, map(fn, *_operands(a, b, shapes)))
+
+def add(a, b, shapes=None):
+    """ Return a + b, elementwise. """
+    return binary(operator.add, a, b, shapes)
+
+def sub(a, b, shapes=None):
+    """ Return a - b, elementwise. """
+    return binary(operator.sub, a, b, shapes)
+
+def mul(a, b, shapes=None):
+    """ Return a * b, elementwise. """
+    return binary(operator.mul, a, b, shapes)
+
+def div(a, b, shapes=None):
+    """ Return a / b, elementwise. """
+    return binary(operator.truediv, a, b, shapes)
+
+def div_grad(g, a, b, shapes=None):
+    """ Return the gradient of a / b with respect to b, at the shape of the output gradient g. """
+    return array.array(kernels.typecode, map(lambda gi, ai, bi: -gi * ai / (bi * bi), g, *_operands(a, b, shapes)))
+
+def reduce_sum(g, out_shape, shape):
+    """ Sum a gradient of shape out_shape back to the shape of an operand broadcast to out_shape. """
+    size = 1
+    for n in shape:
+        size *= n
+    if size == 1:
+        return array.array(kernels.typecode, [sum(g)])
+    out = zeros(size)
+    _reduce_groups(out, 0, g, 0, _groups(shape, out_shape))
+    return out
+
+def _reduce_groups(out, offset, g, g_offset, groups):
+    """ Add the elements of g, from g_offset, into out, from offset, following the broadcast groups of out. """
+    (n, size), rest = groups[0], groups[1:]
+    if not rest:
+        values = g[g_offset:g_offset + n]
+        if size == 1:
+            out[offset] += sum(values)
+        else:
+            out[offset:offset + n] = array.array(kernels.typecode, map(operator.add, out[offset:offset + n], values))
+        return
+    block, g_block = 1, 1
+    for m, inner in rest:
+        block *= inner
+        g_block *= m
+    step = 0 if size == 1 else block
+    for i in range(n):
+        _reduce_groups(out, offset + i * step, g, g_offset + i * g_block, rest)
+
+def neg(a):
+    """ Return -a, elementwise. """
+    return unary(operator.neg, a)
+
+def absolute(a):
+    """ Return |a|, elementwise. """
+    return unary(abs, a)
+
+def absolute_grad(g, x):
+    """ Return the gradient of |x|. """
+    return binary(lambda gi, xi: gi if xi > 0 else -gi if xi < 0 else 0., g, x)
+
+def power(a, p, shapes=None):
+    """ Return a ** p, elementwise.
+    :param p: a scalar exponent, or a buffer of exponents broadcast against a as described by shapes
+    """
+    if isinstance(p, (int, float)):
+        return unary(lambda x: x ** p, a)
+    return binary(operator.pow, a, p, shapes)
+
+def power_grad(g, x, p, shapes=None):
+    """ Return the gradient of x ** p with respect to x, at the shape of the output gradient g. """
+    if isinstance(p, (int, float)):
+        return binary(lambda gi, xi: gi * p * xi ** (p - 1), g, x)
+    return array.array(kernels.typecode, map(lambda gi, xi, pi: gi * pi * xi ** (pi - 1), g, *_operands(x, p, shapes)))
+
+def tanh(a):
+    """ Return the hyperbolic tangent of a, elementwise. """
+    return unary(math.tanh, a)
+
+def tanh_grad(g, y):
+    """ Return the gradient of the hyperbolic tangent, from its output y. """
+    return binary(lambda gi, yi: gi * (1 - yi * yi), g, y)
+
+def log(a):
+    """ Return the natural logarithm of a, elementwise, with the input clipped to 1e-8. """
+    return unary(lambda x: math.log(max(x, 1e-8)), a)
+
+def log_grad(g, x):
+    """ Return the gradient of the clipped logarithm: no gradient flows through the clipped values. """
+    return binary(lambda gi, xi: gi / xi if xi >= 1e-8 else 0., g, x)
+
+def relu(a):
+    """ Return the rectified linear unit of a, elementwise. """
+    return unary(lambda x: x if x > 0 else 0., a)
+
+def relu_grad(g, x):
+    """ Return the gradient of the rectified linear unit. """
+    return binary(lambda gi, xi: gi if xi > 0 else 0., g, x)
+
+def _sigmoid(x):
+    """ Numerically stable sigmoid of a scalar. """
+    if x >= 0:
+        return 1 / (1 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1 + z)
+
+def sigmoid(a):
+    """ Return the sigmoid of a, elementwise. """
+    return unary(_sigmoid, a)
+
+def sigmoid_grad(g, y):
+    """ Return the gradient of the sigmoid, from its output y. """
+    return binary(lambda gi, yi: gi * yi * (1 - yi), g, y)
+
+# functions read by the sources of fused expressions, see fusion.py
+_FUSED_FUNCTIONS = {'tanh': math.tanh, 'log': lambda x: math.log(max(x, 1e-8)), 'relu': lambda x: x if x > 0 else 0.,
+                    'sigmoid': _sigmoid, 'sign': lambda x: (x > 0) - (x < 0), 'step': lambda x: 1. if x > 0 else 0.,
+                    'dlog': lambda x: 1 / x if x >= 1e-8 else 0.}
+# (source of a fused expression, number of operands) -> compiled function
+_fused = {}
+
+def elementwise(expression, operands, shapes, out_shape):
+    """ Evaluate a fused expression in a single loop over its operands broadcast to out_shape.
+    :param expression: the python source of the expression over the arguments x0, x1, ... one per operand
+    :param operands: the buffers of the operands
+    :param shapes: the shapes of the operands
+    """
+    fn = _fused.get((expression, len(operands)))
+    if fn is None:
+        args = ', '.join(f'x{i}' for i in range(len(operands)))
+        fn = _fused[expression, len(operands)] = eval(f'lambda {args}: {expression}', dict(_FUSED_FUNCTIONS))
+    return array.array(kernels.typecode, map(fn, *(_expand(x, shape, out_shape) for x, shape in zip(operands, shapes))))
+
+def total(a):
+    """ Return the sum of the elements of a buffer, as a python float. """
+    return sum(a)
+
+def accumulate(grad, values):
+    """ Add values into a gradient buffer, in place.
+    The values are summed when the gradient belongs to a broadcast operand.
+    """
+    if len(grad) == len(values):
+        grad[:] = array.array(kernels.typecode_of(grad), map(operator.add, grad, values))
+    else:
+        grad[0] += sum(values)
+
+# number of rows and columns of the output computed per tile by matmul
+MATMUL_BLOCK_SIZE = 32
+
+def transpose(a, rows, cols):
+    """ Return the (cols, rows) transpose of a row-major (rows, cols) buffer. """
+    out = array.array(kernels.typecode_of(a))
+    for j in range(cols):
+        out.extend(a[j::cols])
+    return out
+
+def matmul(a, b, m, k, n, block_size=MATMUL_BLOCK_SIZE):
+    """ Multiply a row-major (m, k) buffer with a row-major (k, n) buffer.
+    The output is computed tile by tile, so that the rows of a and the columns of b 
+    used by a tile stay in cache while every dot product of the tile runs.
+    :return: the row-major (m, n) product
+    """
+    a_rows = [a[i * k:(i + 1) * k] for i in range(m)]
+    b_cols = [b[j::n] for j in range(n)]
+    out = zeros(m * n)
+    mul = operator.mul
+    for i0 in range(0, m, block_size):
+        i_range = range(i0, min(i0 + block_size, m))
+        for j0 in range(0, n, block_size):
+            j_range = range(j0, min(j0 + block_size, n))
+            for i in i_range:
+                row, offset = a_rows[i], i * n
+                for j in j_range:
+                    out[offset + j] = sum(map(mul, row, b_cols[j]))
+    return out
+
+def add_rows(a, row, rows, cols):
+    """ Add a row of cols elements to every row of a row-major (rows, cols) buffer, in place. """
+    for i in range(rows):
+        start = i * cols
+        a[start:start + cols] = array.array(kernels.typecode_of(a), map(operator.add, a[start:start + cols], row))
+
+# activations that can be fused with the bias of a layer
+_ACTIVATIONS = {'relu': lambda x: x if x > 0 else 0., 'tanh': math.tanh, 'sigmoid': _sigmoid}
+
+def bias_activation(a, row, rows, cols, activation=None):
+    """ Add a row of cols elements to every row of a row-major (rows, cols) buffer and apply an activation,
+    in a single pass that builds no intermediate buffer.
+    :param activation: 'relu', 'tanh', 'sigmoid', or None to only add the row, in place
+    :return: the output buffer
+    """
+    if activation is None:
+        add_rows(a, row, rows, cols)
+        return a
+    return array.array(kernels.typecode, map(_ACTIVATIONS[activation], map(operator.add, a, itertools.cycle(row))))
+
+def _lines(outer, n, inner):
+    """ Iterate over the slices selecting, in an (outer, n, inner) row-major buffer, the n elements 
+    of every line along the middle axis. """
+    for o in range(outer):
+        for i in range(inner):
+            start = o * n * inner + i
+            yield slice(start, start + (n - 1) * inner + 1, inner)
+
+def softmax(a, outer, n, inner):
+    """ Return the softmax of an (outer, n, inner) buffer along its middle axis.
+    The maximum of every line is subtracted before the exponential, which therefore never overflows.
+    """
+    out = zeros(len(a))
+    for line in _lines(outer, n, inner):
+        values = a[line]
+        exp = array.array('d', map(math.exp, map(operator.sub, values, itertools.repeat(max(values), n))))
+        out[line] = array.array(kernels.typecode, map(operator.truediv, exp, itertools.repeat(sum(exp), n)))
+    return out
+
+def softmax_grad(g, y, outer, n, inner):
+    """ Return the gradient of the softmax along the middle axis of an (outer, n, inner) buffer, 
+    y * (g - sum(g * y)) on every line, from its output y. """
+    out = zeros(len(g))
+    for line in _lines(outer, n, inner):
+        g_line, y_line = g[line], y[line]
+        dot = sum(map(operator.mul, g_line, y_line))
+        out[line] = array.array(kernels.typecode, map(operator.mul, y_line, map(operator.sub, g_line, itertools.repeat(dot, n))))
+    return out
+
+def cross_entropy(logits, targets, rows, cols):
+    """ Compute the cross entropy between the rows of a (rows, cols) buffer of scores and target distributions,
+    as a log-softmax over every row, with its maximum subtracted, fused with the negative log likelihood.
+    :param targets: the (rows, cols) buffer of one-hot, or probability, targets
+    :return: the loss averaged over the rows, and the softmax of the scores
+    """
+    loss = 0.
+    probs = zeros(len(logits))
+    for i in range(rows):
+        row = slice(i * cols, (i + 1) * cols)
+        values, target = logits[row], targets[row]
+        shifted = array.array('d', map(operator.sub, values, itertools.repeat(max(values), cols)))
+        exp = array.array('d', map(math.exp, shifted))
+        total = sum(exp)
+        # log_softmax = shifted - log(sum(exp(shifted)))
+        loss -= sum(map(operator.mul, target, shifted)) - math.log(total) * sum(target)
+        probs[row] = array.array(kernels.typecode, map(operator.truediv, exp, itertools.repeat(total, cols)))
+    return loss / rows, probs
+
+def cross_entropy_grad(g, probs, targets, rows, cols):
+    """ Return the gradient of the cross entropy with respect to the scores, g * (softmax - target) / rows 
+    for targets summing to one.
+    :param g: the gradient of the loss, a python float
+    """
+    out = zeros(len(probs))
+    scale = g / rows
+    for i in range(rows):
+        row = slice(i * cols, (i + 1) * cols)
+        target = targets[row]
+        total = sum(target)
+        out[row] = array.array(kernels.typecode, map(lambda p, t: (p * total - t) * scale, probs[row], target))
+    return out
+
+def sum_rows(a, rows, cols):
+    """ Return the sum of the rows of a row-major (rows, cols) buffer. """
+    out = zeros(cols)
+    for i in range(rows):
+        accumulate(out, a[i * cols:(i + 1) * cols])
+    return out
+
+def sgd(values, grad, lr, velocity=None, momentum=0., weight_decay=0.):
+    """ Apply a gradient descent step to a buffer of parameters, in place.
+    A weight decay adds weight_decay * values to the gradient, an L2 penalty, before the momentum.
+    With momentum, the step follows the velocity buffer, updated in place as velocity = momentum * velocity + grad.
+    """
+    if weight_decay:
+        grad = array.array(kernels.typecode_of(grad), map(lambda g, x: g + weight_decay * x, grad, values))
+    if momentum:
+        velocity[:] = array.array(kernels.typecode_of(velocity), map(lambda u, g: momentum * u + g, velocity, grad))
+        grad = velocity
+    values[:] = array.array(kernels.typecode_of(values), map(lambda x, g: x - lr * g, values, grad))
+
+def adam(values, grad, m, v, lr, beta1, beta2, eps, t, weight_decay=0.):
+    """ Apply an Adam step to a buffer of parameters and its moment estimates, in place.
+    A weight decay shrinks the parameters before the step, decoupled from the moment estimates as in AdamW.
+    """
+    bias_correction1 = 1 - beta1 ** t
+    bias_correction2 = 1 - beta2 ** t
+    sqrt = math.sqrt
+    decay = 1 - lr * weight_decay
+    for i in range(len(values)):
+        g = grad[i]
+        m_i = m[i] = beta1 * m[i] + (1 - beta1) * g
+        v_i = v[i] = beta2 * v[i] + (1 - beta2) * g ** 2
+        x = values[i] * decay if weight_decay else values[i]
+        values[i] = x - lr * (m_i / bias_correction1) / (sqrt(v_i / bias_correction2) + eps)
@@ -0,0 +1,155 @@
+""" This file contains the micro-batching inference server: single-sample requests answered by batched forward passes.
+
+Requests are queued by the callers awaiting their prediction. A batching task takes the first request waiting,
+collects the requests arriving after it until the batch is full or the oldest request has waited max_latency_ms,
+and runs a single forward pass of the whole batch, without building the graph. The forward pass runs in a
+thread of its own, so that the next batch is collected while the current one is computed. Every caller then
+receives the row of the outputs computed from its sample.
+"""
+import time
+import asyncio
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from .tensor import Tensor
+from .grad_mode import no_grad
+
+def _percentile(values, q):
+    """ Return the q-th percentile of values, by the nearest-rank method, or None if there are none. """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values))) - 1))]
+
+def _input_size(model):
+    """ Return the number of features of the samples of a model, read from its first layer, or None if unknown. """
+    layers = getattr(model, 'layers', None)
+    return getattr(layers[0] if layers else model, 'input_size', None)
+
+class BatchingServer:
+    def __init__(self, model, max_batch_size=32, max_latency_ms=5., history=10000):
+        """ Serve the predictions of a model, batching the samples of concurrent requests, see serve.py.
+        The server runs in the asyncio event loop in which it is started, with start() or `async with`.
+        :param model: the model, called on a (batch, features) tensor, e.g. a Sequential
+        :param max_batch_size: the largest number of samples of a forward pass
+        :param max_latency_ms: the longest time a request waits for other requests to fill its batch, in milliseconds
+        :param history: the number of the latest requests and batches the metrics are computed over
+        """
+        if max_batch_size < 1:
+            raise ValueError(f'max_batch_size must be positive, but got {max_batch_size}.')
+        self.model = model
+        # the number of features of a sample: a malformed sample fails its own request, not the batch it would join
+        self._input_size = _input_size(model)
+        self.max_batch_size = max_batch_size
+        self.max_latency_ms = max_latency_ms
+        self.requests = 0
+        self.batches = 0
+        self._latencies = collections.deque(maxlen=history)
+        self._batch_sizes = collections.deque(maxlen=history)
+        self._queue = None
+        self._task = None
+        self._executor = None
+
+    async def start(self):
+        """ Start the batching task in the running event loop. """
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = asyncio.get_running_loop().create_task(self._batching())
+
+    async def stop(self):
+        """ Answer the requests already queued, then stop the batching task. """
+        if self._task is None:
+            return
+        # None tells the batching task to stop once the requests ahead of it are answered
+        await self._queue.put(None)
+        await self._task
+        self._executor.shutdown()
+        self._task = self._executor = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+        return False
+
+    async def predict(self, sample):
+        """ Return the prediction of the model for a single sample.
+        :param sample: the features of the sample, as a flat list of numbers
+        :return: the row of the outputs of the model computed from the sample, as a list
+        """
+        if self._task is None:
+            raise RuntimeError('The server must be started before it serves predictions.')
+        sample = list(sample)
+        if self._input_size is None:
+            # the samples of a model of unknown input size must match the first one served
+            self._input_size = len(sample)
+        if len(sample) != self._input_size:
+            raise ValueError(f'The sample must have {self._input_size} features, but got {len(sample)}.')
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((sample, future, time.perf_counter()))
+        return await future
+
+    def _forward(self, samples):
+        """ Run the forward pass of a batch of samples, and return the rows of the outputs. """
+        with no_grad():
+            return self.model(Tensor(samples, requires_grad=False, storage='array')).detach()
+
+    async def _batching(self):
+        """ Collect the queued requests into batches and answer them, until the queue holds None. """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            request = await self._queue.get()
+            if request is None:
+                break
+            batch = [request]
+            deadline = loop.time() + self.max_latency_ms / 1e3
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    # the requests already queued are taken without waiting
+                    request = self._queue.get_nowait()
+                else:
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), max(0., deadline - loop.time()))
+                    except asyncio.TimeoutError:
+                        break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            try:
+                rows = await loop.run_in_executor(self._executor, self._forward, [sample for sample, _, _ in batch])
+            except Exception as error:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            now = time.perf_counter()
+            for (_, future, start), row in zip(batch, rows):
+                if not future.done():
+                    future.set_result(row)
+                self._latencies.append(now - start)
+            self.requests += len(batch)
+            self.batches += 1
+            self._batch_sizes.append(len(batch))
+
+    def metrics(self):
+        """ Returns the metrics of the server, over its latest requests and batches.
+        :return: a dict of the number of requests and batches served, the p50 and p99 latencies of the requests
+                 from their arrival to their answer, in milliseconds, and the mean and largest batch sizes
+        """
+        p50, p99 = _percentile(self._latencies, 50), _percentile(self._latencies, 99)
+        sizes = self._batch_sizes
+        return {'requests': self.requests,
+                'batches': self.batches,
+                'p50_ms': p50 * 1e3 if p50 is not None else None,
+                'p99_ms': p99 * 1e3 if p99 is not None else None,
+                'mean_batch_size': sum(sizes) / len(sizes) if sizes else None,
+                'max_batch_size': max(sizes) if sizes else None}
+
+    def __repr__(self):
+        return f"BatchingServer(model={type(self.model).__name__}, max_batch_size={self.max_batch_size}, max_latency_ms={self.max_latency_ms})"
@@ -1,20 +1,252 @@
-from node import Node
+import array
+import operator
+import itertools
+from . import engine
+from . import fusion
+from . import kernels
+from .node import Node
+from .grad_mode import is_grad_enabled
+
+STORAGE_MODES = ('node', 'array')
+
+def _contiguous_strides(shape):
+    """ Return the row-major strides, in elements, of a tensor with the given shape. """
+    strides = [1] * len(shape)
+    for axis in range(len(shape) - 2, -1, -1):
+        strides[axis] = strides[axis + 1] * shape[axis + 1]
+    return tuple(strides)
+
+def _parse_nested(data):
+    """ Flatten a scalar or nested lists of scalars/Nodes in row-major order.
+    :param data: a scalar, a Node, a Tensor or nested lists of scalars/Nodes
+    :return: the flat list of values and the shape of the data
+    """
+    if 'Tensor' in str(type(data)):
+        data = data.detach()
+    shape = []
+    probe = data
+    while isinstance(probe, list):
+        shape.append(len(probe))
+        probe = probe[0]
+    if len(shape) > 4:
+        raise ValueError('The tensor must have a maximum of 4 dimensions.')
+
+    values = data if shape else [data]
+    for _ in range(len(shape) - 1):
+        values = [x for sub in values for x in sub]
+    values = [x.value if 'Node' in str(type(x)) else x for x in values]
+
+    # scalars and 1D lists are stored as row vectors
+    if len(shape) == 0:
+        shape = [1, 1]
+    elif len(shape) == 1:
+        shape = [1, shape[0]]
+    size = 1
+    for n in shape:
+        size *= n
+    if len(values) != size:
+        raise ValueError(f'All the rows of the tensor must have the same length. shape = {tuple(shape)}')
+
+    return values, tuple(shape)
+
+def _as_array(x):
+    """ Return x as an array-backed tensor.
+    Scalars, Nodes and node-backed tensors that do not require gradient are copied into constants.
+    A node-backed tensor that requires gradient is copied into a tensor recorded on the tape, see _from_nodes.
+    """
+    if 'Tensor' in str(type(x)):
+        if x._storage is not None:
+            return x
+        if x.requires_grad and is_grad_enabled():
+            return _from_nodes(x)
+        x = x.detach()
+    return Tensor(x, requires_grad=False, storage='array')
+
+def _from_nodes(x):
+    """ Return an array-backed copy of a node-backed tensor, whose gradient is accumulated into its Nodes,
+    so that the backward pass goes on through their graph. """
+    nodes = x._data
+    for _ in range(len(x.shape) - 1):
+        nodes = [node for sub in nodes for node in sub]
+    out = Tensor(x.detach(), requires_grad=True, storage='array')
+    out._children_nodes = tuple(node for node in nodes if node.requires_grad)
+    def backward():
+        if out._grad is None:
+            return
+        for node, g in zip(nodes, out._grad):
+            if node.requires_grad:
+                node._grad += float(g)
+    out._backward = backward
+    return out
+
+def _is_array(x):
+    """ Return whether x is an array-backed tensor. """
+    return 'Tensor' in str(type(x)) and x._storage is not None
+
+def _broadcast_shape(a_shape, b_shape):
+    """ Return the shape of an elementwise op between two tensors, following numpy's broadcasting rules:
+    the shapes are aligned on their last dimension, and a dimension of size 1 is stretched to match the other.
+    """
+    ndim = max(len(a_shape), len(b_shape))
+    a_aligned = (1,) * (ndim - len(a_shape)) + tuple(a_shape)
+    b_aligned = (1,) * (ndim - len(b_shape)) + tuple(b_shape)
+    assert all(n == m or n == 1 or m == 1 for n, m in zip(a_aligned, b_aligned)), \
+        f'The shapes of the tensors cannot be broadcast together. a.shape = {a_shape}, b.shape = {b_shape}'
+    return tuple(max(n, m) for n, m in zip(a_aligned, b_aligned))
+
+def _shapes(a_shape, b_shape, out_shape):
+    """ Return the shapes argument of an elementwise kernel: None when neither operand is broadcast. """
+    if a_shape == b_shape == out_shape:
+        return None
+    return (a_shape, b_shape, out_shape)
+
+def _broadcast_offsets(shape, out_shape):
+    """ Iterate over the row-major offsets of the elements of a tensor of a given shape broadcast to out_shape. """
+    shape = (1,) * (len(out_shape) - len(shape)) + tuple(shape)
+    strides = [0 if n == 1 else stride for n, stride in zip(shape, _contiguous_strides(shape))]
+    for index in itertools.product(*map(range, out_shape)):
+        yield sum(map(operator.mul, index, strides))
+
+def _nest(values, shape):
+    """ Lay out a flat row-major list of values as nested lists of the given shape. """
+    if len(shape) == 1:
+        return values
+    size = len(values) // shape[0]
+    return [_nest(values[i * size:(i + 1) * size], shape[1:]) for i in range(shape[0])]
+
+def _broadcast_nodes(a, b, fn):
+    """ Apply fn to every pair of Nodes of two node-backed tensors broadcast against each other.
+    Every output Node reads its operands through index arithmetic, without expanded copies of the tensors.
+    """
+    shape = _broadcast_shape(a.shape, b.shape)
+    a_nodes, b_nodes = a._data, b._data
+    for _ in range(len(a.shape) - 1):
+        a_nodes = [node for sub in a_nodes for node in sub]
+    for _ in range(len(b.shape) - 1):
+        b_nodes = [node for sub in b_nodes for node in sub]
+    out = [fn(a_nodes[i], b_nodes[j]) for i, j in zip(_broadcast_offsets(a.shape, shape),
+                                                       _broadcast_offsets(b.shape, shape))]
+    return Tensor(_nest(out, shape), requires_grad=a.requires_grad)
+
+def _map_nodes(x, fn):
+    """ Apply fn to every Node of a node-backed tensor, and return the tensor of the results. """
+    nodes = x._data
+    for _ in range(len(x.shape) - 1):
+        nodes = [node for sub in nodes for node in sub]
+    return Tensor(_nest([fn(node) for node in nodes], x.shape), requires_grad=x.requires_grad)
+
+def _record(storage, shape, inputs, grad_fns, pre_grad=None):
+    """ Wrap the output of an op on array-backed tensors and record it on the tape.
+    :param storage: the output buffer
+    :param shape: the output shape
+    :param inputs: the input tensors of the op
+    :param grad_fns: one function per input, mapping the output gradient and output values 
+                     to the gradient contribution of that input, at the shape of the input 
+                     or at the output shape for a broadcast input
+    :param pre_grad: an optional function applied once to the output gradient before the grad_fns,
+                     such as the chain rule through an activation fused into the op
+    :return: the output tensor
+    """
+    # under no_grad the output is a plain buffer, without children or backward closure
+    children = tuple(x for x in inputs if x.requires_grad) if is_grad_enabled() else ()
+    out = Tensor._from_storage(storage, shape, requires_grad=len(children) > 0)
+    if children:
+        _attach(out, inputs, grad_fns, pre_grad)
+    return out
+
+def _attach(out, inputs, grad_fns, pre_grad=None):
+    """ Set the children and the backward closure of the output of an op, see _record. """
+    out._children_nodes = tuple(x for x in inputs if x.requires_grad)
+    def backward():
+        if out._grad is None:
+            return
+        g = out._grad if pre_grad is None else pre_grad(out._grad)
+        for x, grad_fn in zip(inputs, grad_fns):
+            if x.requires_grad:
+                grad = grad_fn(g, out._storage)
+                if len(grad) != len(x._storage):
+                    # the input was broadcast: sum the gradient back to its shape
+                    grad = kernels.reduce_sum(grad, out.shape, x.shape)
+                kernels.accumulate(x._grad_buffer(), grad)
+    out._backward = backward
+
+def _is_deferred(x):
+    """ Return whether x is a tensor whose values have not been computed yet. """
+    return 'LazyTensor' in str(type(x)) and x._expr is not None
+
+def _lazy(*operands):
+    """ Return whether an elementwise op is deferred: under lazy mode, on an array-backed operand. """
+    return fusion.is_lazy_enabled() and any(_is_deferred(x) or _is_array(x) for x in operands)
+
+def _defer(op, *operands):
+    """ Return the deferred output of an elementwise op, whose expression inlines those of its deferred operands.
+    Scalars are inlined as constants, any other operand becomes an input of the expression.
+    """
+    for x in operands:
+        if _is_deferred(x) and sum(y is x for y in operands) > 1:
+            # an operand read twice, as in y * y, is evaluated once rather than inlined twice
+            x._evaluate()
+    inputs, args, shape = [], [], None
+    for x in operands:
+        if isinstance(x, (int, float)):
+            args.append(('c', float(x)))
+            continue
+        if _is_deferred(x):
+            expr, x_inputs = x._expr, x._inputs
+        else:
+            x = _as_array(x)
+            expr, x_inputs = ('x', 0), (x,)
+        indices = []
+        for t in x_inputs:
+            index = next((i for i, y in enumerate(inputs) if y is t), None)
+            if index is None:
+                index = len(inputs)
+                inputs.append(t)
+            indices.append(index)
+        args.append(_reindex(expr, indices))
+        shape = x.shape if shape is None else _broadcast_shape(shape, x.shape)
+    return _LazyTensor((op, *args), inputs, shape)
+
+def _reindex(expr, indices):
+    """ Return an expression reading its i-th input from the input indices[i]. """
+    if expr[0] == 'x':
+        return ('x', indices[expr[1]])
+    if expr[0] == 'c':
+        return expr
+    return (expr[0], *(_reindex(arg, indices) for arg in expr[1:]))
 
 class Tensor:
-    def __init__(self, data, requires_grad=True):
+    def __init__(self, data, requires_grad=True, storage='node'):
         """ Initialize a tensor.
         
         Args:
             data: The data of the tensor.
             requires_grad: Whether the tensor requires gradient.
+            storage: 'node' to hold one Node per element, or 'array' to hold 
+                     the values in a single contiguous array of doubles, or of floats under
+                     mutorch.set_default_dtype('float32').
         """
+        if storage not in STORAGE_MODES:
+            raise ValueError(f'storage must be one of {STORAGE_MODES}, but got {storage}.')
         self._data = data
         self._shape = None
+        self._storage = None
+        self._strides = None
+        self._grad = None
+        self._children_nodes = ()
         self._backward = lambda: None
         self.requires_grad = requires_grad
 
+        ## an array-backed tensor keeps its values in one flat buffer
+        if storage == 'array':
+            values, shape = _parse_nested(data)
+            self._data = None
+            self._shape = shape
+            self._strides = _contiguous_strides(shape)
+            self._storage = array.array(kernels.typecode, values)
+
         ## check if data is a scalar or a list of scalars
-        if isinstance(data, (int, float)) or \
+        elif isinstance(data, (int, float)) or \
            isinstance(data, list) and isinstance(data[0], (int, float)) or \
            isinstance(data, list) and isinstance(data[0], list) and isinstance(data[0][0], (int, float)) or \
            isinstance(data, list) and isinstance(data[0], list) and isinstance(data[0][0], list) and isinstance(data[0][0][0], (int, float)):
@@ -87,161 +319,240 @@ class Tensor:
         else:
             raise ValueError('The tensor must have a maximum of 4 dimensions.')
         
+    @classmethod
+    def _from_storage(cls, storage, shape, requires_grad=True):
+        """ Wrap a flat buffer into an array-backed tensor without copying it.
+        :param storage: the row-major buffer of values
+        :param shape: the shape of the tensor
+        :param requires_grad: whether the tensor requires gradient
+        """
+        out = cls.__new__(cls)
+        out._data = None
+        out._shape = tuple(shape)
+        out._strides = _contiguous_strides(out._shape)
+        out._storage = storage
+        out._grad = None
+        out._children_nodes = ()
+        out._backward = lambda: None
+        out.requires_grad = requires_grad
+        return out
+
     @property
     def shape(self):
         """ Return the shape of the tensor. """
         return self._shape
 
+    @property
+    def strides(self):
+        """ Return the strides, in elements, of an array-backed tensor. """
+        return self._strides
+
+    @property
+    def storage(self):
+        """ Return the storage mode of the tensor. """
+        return 'node' if self._storage is None else 'array'
+
+    @property
+    def dtype(self):
+        """ Return the name of the dtype of the values of the tensor, 'float64' for node-backed tensors,
+        whose values are python floats. """
+        if self._storage is None:
+            return 'float64'
+        typecode = kernels.typecode_of(self._storage)
+        return next(name for name, code in kernels.DTYPES.items() if code == typecode)
+
     @property
     def data(self):
         """ Return the data of the tensor. """
+        if self._storage is not None:
+            return self.detach()
         return self._data
 
+    @property
+    def grad(self):
+        """ Return the gradient of an array-backed tensor as nested python lists, or None before backward. """
+        if self._storage is None or self._grad is None:
+            return None
+        return self._nested(self._grad)
+
+    def _grad_buffer(self):
+        """ Return the gradient buffer of an array-backed tensor, allocating it on first use. """
+        if self._grad is None:
+            self._grad = kernels.zeros(len(self._storage), kernels.typecode_of(self._storage))
+        return self._grad
+
     def __repr__(self):
         """ Return a string representation of the tensor. """
         str_ = f'Tensor('
         str_ += f'shape={self._shape}, \n\t'
-        data_str = '\n\t'.join([str(x) for x in self._data])
+        data_str = '\n\t'.join([str(x) for x in self.data])
         str_ += f'data=[{data_str}'
         str_ += ')]'
         str_ += f', requires_grad={self.requires_grad}'
+        str_ += f', storage={self.storage}' if self._storage is not None else ''
         str_ += f')'
         return f'{str_}'
 
+    def __getitem__(self, index):
+        """ Return a single element of the tensor: a Node, or a float for array-backed tensors.
+        :param index: a tuple with one integer index per dimension
+        """
+        index = index if isinstance(index, tuple) else (index,)
+        if len(index) != len(self._shape):
+            raise IndexError(f'Expected {len(self._shape)} indices, but got {len(index)}. self.shape = {self._shape}')
+        for i, n in zip(index, self._shape):
+            if not -n <= i < n:
+                raise IndexError(f'Index {index} is out of bounds for a tensor of shape {self._shape}')
+
+        if self._storage is not None:
+            offset = 0
+            for i, n, stride in zip(index, self._shape, self._strides):
+                offset += (i % n) * stride
+            return self._storage[offset]
+
+        element = self._data
+        for i in index:
+            element = element[i]
+        return element
+
+    def to_array(self):
+        """ Return an array-backed copy of the tensor, detached from the graph of Nodes. """
+        if self._storage is not None:
+            return self
+        return Tensor(self.detach(), requires_grad=self.requires_grad, storage='array')
+
+    def to_nodes(self):
+        """ Return a tensor holding one new Node per element of the tensor. """
+        if self._storage is None:
+            return self
+        return Tensor(self.detach(), requires_grad=self.requires_grad)
+
+    def _fortran_offsets(self):
+        """ Return the buffer offsets of the elements, with the first index varying fastest. 
+        This is the order in which flatten() and items() visit the elements.
+        """
+        offsets = [0]
+        for n, stride in zip(reversed(self._shape), reversed(self._strides)):
+            offsets = [offset + i * stride for offset in offsets for i in range(n)]
+        return offsets
+
+    def _nested(self, buffer, offset=0, axis=0):
+        """ Return a buffer laid out like this array-backed tensor as nested python lists. """
+        n, stride = self._shape[axis], self._strides[axis]
+        if axis == len(self._shape) - 1:
+            return buffer[offset:offset + n].tolist()
+        return [self._nested(buffer, offset + i * stride, axis + 1) for i in range(n)]
+
     def __add__(self, other):
-        """ Add a tensor to another tensor or a scalar. """
+        """ Add a tensor to another tensor or a scalar, broadcasting their shapes. """
+        if _lazy(self, other):
+            return _defer('add', self, other)
+        if self._storage is not None or _is_array(other):
+            a, b = _as_array(self), _as_array(other)
+            shape = _broadcast_shape(a.shape, b.shape)
+            return _record(kernels.add(a._storage, b._storage, _shapes(a.shape, b.shape, shape)), shape, (a, b),
+                           (lambda g, y: g, lambda g, y: g))
         other = other if 'Tensor' in str(type(other)) else Tensor(other)
-        assert self.shape == other.shape or \
-               other.shape == (1,self.shape[0]) or \
-               other.shape == (1,1), \
-                f'The shapes of the tensors must be the same, or one tensor should have the shape: (1, {other.shape[0]}) or (1,). self.shape = {self.shape}, other.shape = {other.shape}'
-        
-        if other.shape == (1,1):
-            # broadcast the scalar to the shape of the tensor
-            other = Tensor([[other.data[0][0] for _ in range(self.shape[1])] \
-                            for _ in range(self.shape[0])])
-
-        if other.shape == (1,self.shape[0]):
-            out = Tensor([[self._data[i][j] + other._data[i][0] \
-                            for j in range(self.shape[1])] \
-                            for i in range(self.shape[0])], \
-                            requires_grad=self.requires_grad)
-        else:
-            out = Tensor([[self._data[i][j] + other._data[i][j] \
-                            for j in range(self.shape[1])] \
-                            for i in range(self.shape[0])], \
-                            requires_grad=self.requires_grad)
-        return out
+        return _broadcast_nodes(self, other, operator.add)
 
     def __radd__(self, other):
         """ Add a tensor to another tensor or a scalar. """
         return self.__add__(other)
 
     def __sub__(self, other):
-        """ Subtract a tensor from another tensor or a scalar. """
+        """ Subtract a tensor or a scalar from a tensor, broadcasting their shapes. """
+        if _lazy(self, other):
+            return _defer('sub', self, other)
+        if self._storage is not None or _is_array(other):
+            a, b = _as_array(self), _as_array(other)
+            shape = _broadcast_shape(a.shape, b.shape)
+            return _record(kernels.sub(a._storage, b._storage, _shapes(a.shape, b.shape, shape)), shape, (a, b),
+                           (lambda g, y: g, lambda g, y: kernels.neg(g)))
         other = other if 'Tensor' in str(type(other)) else Tensor(other)
-        assert self.shape == other.shape or \
-               other.shape == (1,self.shape[0]) or \
-               other.shape == (1,1), \
-                f'The shapes of the tensors must be the same, or one tensor should have the shape: (1, {other.shape[0]}) or (1,1). self.shape = {self.shape}, other.shape = {other.shape}'
-        if other.shape == (1,1):
-            # broadcast the scalar to the shape of the tensor
-            other = Tensor([[other.data[0][0] for _ in range(self.shape[1])] \
-                            for _ in range(self.shape[0])])
-        if other.shape == (1,self.shape[0]):
-            out = Tensor([[self._data[i][j] - other._data[i][0] \
-                            for j in range(self.shape[1])] \
-                            for i in range(self.shape[0])], \
-                            requires_grad=self.requires_grad)
-        else:
-            out = Tensor([[self._data[i][j] - other._data[i][j] \
-                            for j in range(self.shape[1])] \
-                            for i in range(self.shape[0])], \
-                            requires_grad=self.requires_grad)   
-        return out
+        return _broadcast_nodes(self, other, operator.sub)
 
     def __rsub__(self, other):
         """ Subtract a tensor from another tensor or a scalar. """
-        return self.__sub__(other)
+        if _lazy(self, other):
+            return _defer('sub', other, self)
+        if self._storage is not None:
+            return _as_array(other).__sub__(self)
+        other = other if 'Tensor' in str(type(other)) else Tensor(other)
+        return _broadcast_nodes(other, self, operator.sub)
 
     def __mul__(self, other):
-        """ Multiply a tensor with another tensor or a scalar. """
+        """ Multiply a tensor with another tensor or a scalar, broadcasting their shapes. """
+        if _lazy(self, other):
+            return _defer('mul', self, other)
+        if self._storage is not None or _is_array(other):
+            a, b = _as_array(self), _as_array(other)
+            shape = _broadcast_shape(a.shape, b.shape)
+            return _record(kernels.mul(a._storage, b._storage, _shapes(a.shape, b.shape, shape)), shape, (a, b),
+                           (lambda g, y: kernels.mul(g, b._storage, _shapes(shape, b.shape, shape)),
+                            lambda g, y: kernels.mul(g, a._storage, _shapes(shape, a.shape, shape))))
         other = other if 'Tensor' in str(type(other)) else Tensor(other)
-        assert self.shape == other.shape or \
-               other.shape == (1,self.shape[0]) or \
-               other.shape == (1,1), \
-                f'The shapes of the tensors must be the same, or one tensor should have the shape: (1, {other.shape[0]}) or (1,1). self.shape = {self.shape}, other.shape = {other.shape}'
-
-        if other.shape == (1,1):
-            # broadcast the scalar to the shape of the tensor
-            other = Tensor([[other.data[0][0] for _ in range(self.shape[1])] \
-                            for _ in range(self.shape[0])])
-
-        if other.shape == (1,self.shape[0]):
-            out = Tensor([[self._data[i][j] * other._data[i][0] \
-                            for j in range(self.shape[1])] \
-                            for i in range(self.shape[0])], \
-                            requires_grad=self.requires_grad)
-        else:
-            out = Tensor([[self._data[i][j] * other._data[i][j] \
-                            for j in range(self.shape[1])] \
-                            for i in range(self.shape[0])], \
-                            requires_grad=self.requires_grad)
-        return out
+        return _broadcast_nodes(self, other, operator.mul)
 
     def __rmul__(self, other):
         """ Multiply a tensor with another tensor or a scalar. """
         return self.__mul__(other)
 
     def __pow__(self, other):
-        """ Raise a tensor to the power of another tensor or a scalar. """
+        """ Raise a tensor to the power of another tensor or a scalar, broadcasting their shapes. """
+        if _lazy(self, other):
+            return _defer('pow', self, other)
+        if self._storage is not None or _is_array(other):
+            # as for Nodes, the gradient only flows to the base
+            a, p = _as_array(self), _as_array(other)
+            if len(p._storage) == 1:
+                p = p._storage[0]
+                return _record(kernels.power(a._storage, p), a.shape, (a,),
+                               (lambda g, y: kernels.power_grad(g, a._storage, p),))
+            shape = _broadcast_shape(a.shape, p.shape)
+            shapes = _shapes(a.shape, p.shape, shape)
+            return _record(kernels.power(a._storage, p._storage, shapes), shape, (a,),
+                           (lambda g, y: kernels.power_grad(g, a._storage, p._storage, shapes),))
         other = other if 'Tensor' in str(type(other)) else Tensor(other)
-        assert other.shape == (1,self.shape[0]) or \
-               other.shape == (1,1), \
-                f'The shapes of the tensors must be (1, {other.shape[0]}) or (1,1).'
-        if other.shape == (1,1):
-            # broadcast the scalar to the shape of the tensor
-            other = Tensor([[other.data[0][0] for _ in range(self.shape[1])] \
-                            for _ in range(self.shape[0])])
-        out = Tensor([[self._data[i][j] ** other._data[i][0] \
-                        for j in range(self.shape[1])] \
-                        for i in range(self.shape[0])], \
-                        requires_grad=self.requires_grad)
-        return out
+        return _broadcast_nodes(self, other, operator.pow)
 
     def __rpow__(self, other):
-        """ Raise a tensor to the power of another tensor or a scalar. """
-        return self.__pow__(other)
+        """ Raise a tensor or a scalar to the power of a tensor. """
+        if _lazy(self, other):
+            return _defer('pow', other, self)
+        if self._storage is not None:
+            return _as_array(other).__pow__(self)
+        other = other if 'Tensor' in str(type(other)) else Tensor(other)
+        return _broadcast_nodes(other, self, operator.pow)
 
     def __truediv__(self, other):
-        """ Divide a tensor by another tensor or a scalar. """
+        """ Divide a tensor by another tensor or a scalar, broadcasting their shapes. """
+        if _lazy(self, other):
+            return _defer('div', self, other)
+        if self._storage is not None or _is_array(other):
+            a, b = _as_array(self), _as_array(other)
+            shape = _broadcast_shape(a.shape, b.shape)
+            return _record(kernels.div(a._storage, b._storage, _shapes(a.shape, b.shape, shape)), shape, (a, b),
+                           (lambda g, y: kernels.div(g, b._storage, _shapes(shape, b.shape, shape)),
+                            lambda g, y: kernels.div_grad(g, a._storage, b._storage, _shapes(a.shape, b.shape, shape))))
         other = other if 'Tensor' in str(type(other)) else Tensor(other)
-        assert self.shape == other.shape or \
-                other.shape == (1,self.shape[0]) or \
-               other.shape == (1,1), \
-                f'The shapes of the tensors must be the same, or one tensor should have the shape: (1, {other.shape[0]}) or (1,1). self.shape = {self.shape}, other.shape = {other.shape}'
-        if other.shape == (1,1):
-            # broadcast the scalar to the shape of the tensor
-            other = Tensor([[other.data[0][0] for _ in range(self.shape[1])] \
-                            for _ in range(self.shape[0])])
-        if other.shape == (1,self.shape[0]):
-            out = Tensor([[self._data[i][j] * ( other._data[i][0] ** -1 ) \
-                            for j in range(self.shape[1])] \
-                            for i in range(self.shape[0])], \
-                            requires_grad=self.requires_grad)
-        else:
-            out = Tensor([[self._data[i][j] * ( other._data[i][j] ** -1 ) \
-                            for j in range(self.shape[1])] \
-                            for i in range(self.shape[0])], \
-                            requires_grad=self.requires_grad)
-        return out
+        return _broadcast_nodes(self, other, lambda x, y: x * (y ** -1))
 
     def __rtruediv__(self, other):  
         """ Divide a tensor by another tensor or a scalar. """
-        return self.__truediv__(other)
+        if _lazy(self, other):
+            return _defer('div', other, self)
+        if self._storage is not None:
+            return _as_array(other).__truediv__(self)
+        other = other if 'Tensor' in str(type(other)) else Tensor(other)
+        return _broadcast_nodes(other, self, lambda x, y: x * (y ** -1))
 
     def __neg__(self):
         """ Negate a tensor. """
+        if _lazy(self):
+            return _defer('neg', self)
+        if self._storage is not None:
+            return _record(kernels.neg(self._storage), self.shape, (self,),
+                           (lambda g, y: kernels.neg(g),))
         out = Tensor([[-self._data[i][j] \
                         for j in range(self.shape[1])] \
                         for i in range(self.shape[0])], \
@@ -250,6 +561,11 @@ class Tensor:
 
     def __abs__(self):
         """ Return the absolute value of a tensor. """
+        if _lazy(self):
+            return _defer('abs', self)
+        if self._storage is not None:
+            return _record(kernels.absolute(self._storage), self.shape, (self,),
+                           (lambda g, y: kernels.absolute_grad(g, self._storage),))
         out = Tensor([[abs(self._data[i][j]) \
                         for j in range(self.shape[1])] \
                         for i in range(self.shape[0])], \
@@ -258,6 +574,11 @@ class Tensor:
 
     def tanh(self):
         """ Return the hyperbolic tangent of a tensor. """
+        if _lazy(self):
+            return _defer('tanh', self)
+        if self._storage is not None:
+            return _record(kernels.tanh(self._storage), self.shape, (self,),
+                           (lambda g, y: kernels.tanh_grad(g, y),))
         out = Tensor([[self._data[i][j].tanh() \
                         for j in range(self.shape[1])] \
                         for i in range(self.shape[0])], \
@@ -266,6 +587,8 @@ class Tensor:
 
     def exp(self, e):
         """ Calculate the exponential of a tensor. """
+        if _lazy(self) or self._storage is not None:
+            return self ** e
         out = Tensor([[self._data[i][j] ** e \
                         for j in range(self.shape[1])] \
                         for i in range(self.shape[0])], \
@@ -274,6 +597,12 @@ class Tensor:
 
     def log(self):
         """ Calculate the natural logarithm of a tensor. """
+        if _lazy(self):
+            return _defer('log', self)
+        if self._storage is not None:
+            # as for Nodes, the input is clipped to 1e-8 and no gradient flows through the clipped values
+            return _record(kernels.log(self._storage), self.shape, (self,),
+                           (lambda g, y: kernels.log_grad(g, self._storage),))
         out = Tensor([[self._data[i][j].log() \
                         for j in range(self.shape[1])] \
                         for i in range(self.shape[0])], \
@@ -282,6 +611,11 @@ class Tensor:
 
     def sum(self):
         """ Sum the elements of the tensor. """
+        if self._storage is not None:
+            # the sum is accumulated in double, and stored in the dtype of the tensor
+            n, typecode = len(self._storage), kernels.typecode_of(self._storage)
+            return _record(array.array(typecode, [kernels.total(self._storage)]), (1, 1), (self,),
+                           (lambda g, y: kernels.full(n, g[0], typecode),))
         sum_ = Node(0, requires_grad=self.requires_grad)
         for row in self._data:
             for x in row:
@@ -290,8 +624,135 @@ class Tensor:
 
     def mean(self):
         """ Compute the mean of the elements of the tensor. """
+        if self._storage is not None:
+            return self.sum() / len(self._storage)
         return self.sum() / (self.shape[0] * self.shape[1])
 
+    def matmul(self, other):
+        """ Multiply two matrices, or two batches of matrices.
+        A 2D operand is shared by every matrix of a 3D operand.
+        :param other: a (k, n) or (batch, k, n) tensor
+        :return: the (m, n) or (batch, m, n) product
+        """
+        other = other if 'Tensor' in str(type(other)) else Tensor(other)
+        assert len(self.shape) in (2, 3) and len(other.shape) in (2, 3), \
+            f'Both tensors must be 2D or 3D. self.shape = {self.shape}, other.shape = {other.shape}'
+        (m, k), (k_, n) = self.shape[-2:], other.shape[-2:]
+        assert k == k_, f'The inner dimensions must match. self.shape = {self.shape}, other.shape = {other.shape}'
+        batch_a = self.shape[0] if len(self.shape) == 3 else None
+        batch_b = other.shape[0] if len(other.shape) == 3 else None
+        assert batch_a is None or batch_b is None or batch_a == batch_b, \
+            f'The batch sizes must match. self.shape = {self.shape}, other.shape = {other.shape}'
+        batch = batch_a or batch_b
+
+        if self._storage is None and other._storage is None:
+            def product(a, b):
+                out = []
+                for i in range(m):
+                    row = []
+                    for j in range(n):
+                        dot = a[i][0] * b[0][j]
+                        for l in range(1, k):
+                            dot = dot + a[i][l] * b[l][j]
+                        row.append(dot)
+                    out.append(row)
+                return out
+            if batch is None:
+                return Tensor(product(self._data, other._data), requires_grad=self.requires_grad)
+            return Tensor([product(self._data[i] if batch_a else self._data, 
+                                   other._data[i] if batch_b else other._data) for i in range(batch)], 
+                          requires_grad=self.requires_grad)
+
+        a, b = _as_array(self), _as_array(other)
+        if batch is None:
+            return _record(kernels.matmul(a._storage, b._storage, m, k, n), (m, n), (a, b),
+                           (lambda g, y: kernels.matmul(g, kernels.transpose(b._storage, k, n), m, n, k),
+                            lambda g, y: kernels.matmul(kernels.transpose(a._storage, m, k), g, k, m, n)))
+
+        def matrix(buffer, i, rows, cols, batched):
+            """ The i-th matrix of a batch, or the shared matrix of a 2D operand. """
+            size = rows * cols
+            return buffer[i * size:(i + 1) * size] if batched else buffer
+
+        def batched_grad(batched, size, grad_fn):
+            """ Concatenate the per-matrix gradients, or sum them for a shared 2D operand. """
+            grad = array.array(kernels.typecode) if batched else kernels.zeros(size)
+            for i in range(batch):
+                if batched:
+                    grad.extend(grad_fn(i))
+                else:
+                    kernels.accumulate(grad, grad_fn(i))
+            return grad
+
+        storage = array.array(kernels.typecode)
+        for i in range(batch):
+            storage.extend(kernels.matmul(matrix(a._storage, i, m, k, batch_a), 
+                                          matrix(b._storage, i, k, n, batch_b), m, k, n))
+        # dA = dC.B^T and dB = A^T.dC, for every matrix of the batch
+        return _record(storage, (batch, m, n), (a, b),
+                       (lambda g, y: batched_grad(batch_a, m * k, lambda i: kernels.matmul(
+                            matrix(g, i, m, n, True), kernels.transpose(matrix(b._storage, i, k, n, batch_b), k, n), m, n, k)),
+                        lambda g, y: batched_grad(batch_b, k * n, lambda i: kernels.matmul(
+                            kernels.transpose(matrix(a._storage, i, m, k, batch_a), m, k), matrix(g, i, m, n, True), k, m, n))))
+
+    def __matmul__(self, other):
+        """ Multiply a tensor with another tensor. """
+        return self.matmul(other)
+
+    def __rmatmul__(self, other):
+        """ Multiply another tensor with a tensor. """
+        other = other if 'Tensor' in str(type(other)) else Tensor(other)
+        return other.matmul(self)
+
+    def relu(self):
+        """ Return the rectified linear unit of a tensor. """
+        if _lazy(self):
+            return _defer('relu', self)
+        if self._storage is None:
+            return _map_nodes(self, Node.relu)
+        return _record(kernels.relu(self._storage), self.shape, (self,),
+                       (lambda g, y: kernels.relu_grad(g, self._storage),))
+
+    def sigmoid(self):
+        """ Return the sigmoid of a tensor. """
+        if _lazy(self):
+            return _defer('sigmoid', self)
+        if self._storage is None:
+            return _map_nodes(self, Node.sigmoid)
+        return _record(kernels.sigmoid(self._storage), self.shape, (self,),
+                       (lambda g, y: kernels.sigmoid_grad(g, y),))
+
+    def softmax(self, dim=-1):
+        """ Return the softmax of a tensor along a dimension. 
+        The maximum of every line is subtracted before the exponential, for numerical stability.
+        :param dim: the dimension along which the values sum to one
+        """
+        dim = dim % len(self.shape)
+        if self._storage is None:
+            # one softmax per line, built from Node ops
+            nodes = self._data
+            for _ in range(len(self.shape) - 1):
+                nodes = [node for sub in nodes for node in sub]
+            n = self.shape[dim]
+            inner = 1
+            for size in self.shape[dim + 1:]:
+                inner *= size
+            out = [None] * len(nodes)
+            for start in range(0, len(nodes), n * inner):
+                for i in range(start, start + inner):
+                    line = range(i, i + n * inner, inner)
+                    max_value = max(nodes[k].value for k in line)
+                    exps = [(nodes[k] - max_value).exp() for k in line]
+                    total = sum(exps[1:], exps[0])
+                    for k, e in zip(line, exps):
+                        out[k] = e / total
+            return Tensor(_nest(out, self.shape), requires_grad=is_grad_enabled())
+        # the dimension splits the contiguous buffer into (outer, n, inner) blocks
+        n, inner = self._shape[dim], self._strides[dim]
+        outer = len(self._storage) // (n * inner)
+        return _record(kernels.softmax(self._storage, outer, n, inner), self.shape, (self,),
+                       (lambda g, y: kernels.softmax_grad(g, y, outer, n, inner),))
+
     def max(self):
         """ Return the maximum value of the tensor. """
         return max(self.items())
@@ -299,15 +760,24 @@ class Tensor:
     def item(self):
         """ Return the value of the tensor as a python number. """
         assert self.shape == (1,1), f'The shape of the tensor must be (1,1). self.shape = {self.shape}'
+        if self._storage is not None:
+            return self._storage[0]
         return self._data[0][0]._value
 
     def items(self):
         """ Return the value of the tensor as a python list. """
+        if self._storage is not None:
+            storage = self._storage
+            return [storage[offset] for offset in self._fortran_offsets()]
         flattened_tensor = self.flatten()
         return [flattened_tensor._data[0][i]._value for i in range(flattened_tensor.shape[1])]
 
     def flatten(self):
         """ Flatten the tensor. """
+        if self._storage is not None:
+            values = self.items()
+            return Tensor._from_storage(array.array(kernels.typecode_of(self._storage), values), (1, len(values)),
+                                        requires_grad=self.requires_grad)
         if len(self.shape) == 2:
             return Tensor([self._data[i][j] \
                             for j in range(self.shape[1]) \
@@ -328,6 +798,8 @@ class Tensor:
 
     def detach(self):
         """ Detach the tensor from the computational graph. """
+        if self._storage is not None:
+            return self._nested(self._storage)
         if len(self.shape) == 2:
             return [[node.value for node in row] \
                     for row in self._data]
@@ -343,17 +815,92 @@ class Tensor:
         else:
             raise ValueError(f'The shape of the tensor is not supported. self.shape = {self.shape}')
 
-    def backward(self):
-        """ Backpropagate the gradient through the computational graph. """
+    def zero_grad(self):
+        """ Reset the gradient of the elements to zero. """
+        if self._storage is not None:
+            if self._grad is not None:
+                self._grad[:] = kernels.zeros(len(self._grad), kernels.typecode_of(self._grad))
+            return
+        for node in self.flatten()._data[0]:
+            node.zero_grad()
+
+    def backward(self, retain_graph=False):
+        """ Backpropagate the gradient through the computational graph.
+        :param retain_graph: whether to keep the graph after the backward pass, 
+                             by default it is freed and cannot be backpropagated through again
+        """
+        if self._storage is not None:
+            # one tape entry per op: every element of the output is seeded, as for node-backed tensors
+            if self.requires_grad:
+                self._grad = kernels.full(len(self._storage), 1., kernels.typecode_of(self._storage))
+                engine.backward((self,), retain_graph=retain_graph)
+            return
         if self.requires_grad:
             if len(self.shape) == 2:
-                [node.backward() for row in self._data for node in row]
+                nodes = [node for row in self._data for node in row]
             elif len(self.shape) == 3:
-                [node.backward() for i in range(self.shape[0]) \
-                    for row in self._data[i] \
-                    for node in row]
+                nodes = [node for i in range(self.shape[0]) \
+                            for row in self._data[i] \
+                            for node in row]
             elif len(self.shape) == 4:
-                [node.backward() for i in range(self.shape[0]) \
-                    for j in range(self.shape[1]) \
-                    for row in self._data[i][j] \
-                    for node in row]
\ No newline at end of file
+                nodes = [node for i in range(self.shape[0]) \
+                            for j in range(self.shape[1]) \
+                            for row in self._data[i][j] \
+                            for node in row]
+            # seed every element and walk the shared graph once
+            for node in nodes:
+                node._grad = 1.
+            engine.backward(nodes, retain_graph=retain_graph)
+
+
+class _LazyTensor(Tensor):
+    def __init__(self, expr, inputs, shape):
+        """ Initialize an array-backed tensor whose values are deferred, see fusion.py.
+        The chain of elementwise ops that produced it is kept as an expression over its input tensors,
+        and evaluated in a single fused loop, recorded as a single op on the tape, when its buffer is first read.
+        :param expr: the expression of the tensor
+        :param inputs: the array-backed input tensors read by the expression
+        :param shape: the shape of the tensor
+        """
+        self._data = None
+        self._shape = tuple(shape)
+        self._strides = _contiguous_strides(self._shape)
+        self._buffer = None
+        self._expr = expr
+        self._inputs = inputs
+        self._grad = None
+        self._children_nodes = ()
+        self._backward = lambda: None
+        self.requires_grad = is_grad_enabled() and any(x.requires_grad for x in inputs)
+
+    @property
+    def _storage(self):
+        """ Return the buffer of the tensor, evaluating its expression on first use. """
+        if self._expr is not None:
+            self._evaluate()
+        return self._buffer
+
+    @property
+    def storage(self):
+        """ Return the storage mode of the tensor, without evaluating it. """
+        return 'array'
+
+    def _evaluate(self):
+        """ Evaluate the expression of the tensor and record it on the tape. """
+        expr, inputs, shape = self._expr, self._inputs, self._shape
+        buffers, shapes = [x._storage for x in inputs], [x.shape for x in inputs]
+        self._buffer = kernels.elementwise(fusion.source(expr), buffers, shapes, shape)
+        self._expr = self._inputs = None
+        if not self.requires_grad:
+            return
+
+        shared, grads = fusion.gradients(expr, [x.requires_grad for x in inputs])
+        self.requires_grad = len(grads) > 0
+        pre_grad = None
+        if shared is not None:
+            pre_grad = lambda g: kernels.elementwise(shared, [g, self._buffer] + buffers, 
+                                                     [shape, shape] + shapes, shape)
+        grad_fns = [(lambda g, y: g) if source is None else
+                    (lambda g, y, source=source: kernels.elementwise(source, [g] + buffers, [shape] + shapes, shape))
+                    for source in grads.values()]
+        _attach(self, [inputs[i] for i in grads], grad_fns, pre_grad)
@@ -0,0 +1,8 @@
+""" The datasets, the data loader and the shard format of mutorch.
+`import mutorch.data` runs this module, which replaces itself by mutorch.core.data in sys.modules,
+so that mutorch.data is the same module whichever way it is imported, and its classes are defined once.
+"""
+import sys
+from .core import data
+
+sys.modules[__name__] = data
@@ -0,0 +1,8 @@
+""" The loss functions of mutorch.
+`import mutorch.losses` runs this module, which replaces itself by mutorch.core.losses in sys.modules,
+so that mutorch.losses is the same module whichever way it is imported, and its classes are defined once.
+"""
+import sys
+from .core import losses
+
+sys.modules[__name__] = losses
@@ -0,0 +1,8 @@
+""" The layers of mutorch.
+`import mutorch.nn` runs this module, which replaces itself by mutorch.core.nn in sys.modules,
+so that mutorch.nn is the same module whichever way it is imported, and its classes are defined once.
+"""
+import sys
+from .core import nn
+
+sys.modules[__name__] = nn
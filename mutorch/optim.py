@@ -0,0 +1,8 @@
+""" The optimizers of mutorch.
+`import mutorch.optim` runs this module, which replaces itself by mutorch.core.optim in sys.modules,
+so that mutorch.optim is the same module whichever way it is imported, and its classes are defined once.
+"""
+import sys
+from .core import optim
+
+sys.modules[__name__] = optim
@@ -0,0 +1,8 @@
+""" The data parallel training of mutorch.
+`import mutorch.parallel` runs this module, which replaces itself by mutorch.core.parallel in sys.modules,
+so that mutorch.parallel is the same module whichever way it is imported, and its classes are defined once.
+"""
+import sys
+from .core import parallel
+
+sys.modules[__name__] = parallel
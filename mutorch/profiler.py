@@ -0,0 +1,8 @@
+""" The op-level profiler of mutorch.
+`import mutorch.profiler` runs this module, which replaces itself by mutorch.core.profiler in sys.modules,
+so that mutorch.profiler is the same module whichever way it is imported, and its classes are defined once.
+"""
+import sys
+from .core import profiler
+
+sys.modules[__name__] = profiler
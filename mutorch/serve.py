@@ -0,0 +1,8 @@
+""" The micro-batching inference server of mutorch.
+`import mutorch.serve` runs this module, which replaces itself by mutorch.core.serve in sys.modules,
+so that mutorch.serve is the same module whichever way it is imported, and its classes are defined once.
+"""
+import sys
+from .core import serve
+
+sys.modules[__name__] = serve
@@ -0,0 +1,48 @@
+""" The fixtures and helpers shared by the tests. """
+import random
+
+import pytest
+
+import mutorch
+
+@pytest.fixture(params=['python', 'numpy'])
+def backend(request):
+    """ Run a test once per compute backend, skipping the backends whose dependencies are not installed. """
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    mutorch.set_backend(request.param)
+    yield request.param
+    mutorch.set_backend('python')
+
+@pytest.fixture(autouse=True)
+def seed():
+    """ Seed the global random generator, which the layers draw their initial weights from. """
+    random.seed(0)
+
+def flatten(values):
+    """ Return the numbers of nested lists, or of a tensor, as a flat list. """
+    if 'Tensor' in str(type(values)):
+        values = values.detach()
+    if not isinstance(values, list):
+        return [values]
+    return [value for item in values for value in flatten(item)]
+
+def grad(x):
+    """ Return the gradient of a tensor, array-backed or node-backed, or of a Node, as a flat list. """
+    if 'Node' in str(type(x)):
+        return [x.grad]
+    if x.storage == 'array':
+        return flatten(x.grad) if x.grad is not None else [0.] * len(flatten(x))
+    nodes = x._data
+    while isinstance(nodes[0], list):
+        nodes = [node for item in nodes for node in item]
+    return [node.grad for node in nodes]
+
+def random_values(rows, cols, low=-1., high=1.):
+    """ Return a (rows, cols) nested list of uniform random values. """
+    return [[random.uniform(low, high) for _ in range(cols)] for _ in range(rows)]
+
+def assert_close(actual, expected, tol=1e-12):
+    """ Assert that two flat lists of numbers are equal up to a relative and absolute tolerance. """
+    assert len(actual) == len(expected)
+    assert actual == pytest.approx(expected, rel=tol, abs=tol)
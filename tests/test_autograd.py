@@ -0,0 +1,89 @@
+""" Tests of the autograd of the array-backed tensors: every op on the tape gives the values and the gradients
+of the same op on node-backed tensors, backpropagated through their Node graph. """
+import contextlib
+
+import pytest
+
+import mutorch
+from mutorch import nn, losses
+from conftest import flatten, grad, random_values, assert_close
+
+OPS = {'add': lambda a, b, c, d, e, f: a + b,
+       'sub': lambda a, b, c, d, e, f: a - b,
+       'mul': lambda a, b, c, d, e, f: a * b,
+       'div': lambda a, b, c, d, e, f: a / d,
+       'pow': lambda a, b, c, d, e, f: a ** 3,
+       'pow_tensor': lambda a, b, c, d, e, f: d ** b,
+       'neg': lambda a, b, c, d, e, f: -a,
+       'abs': lambda a, b, c, d, e, f: abs(a),
+       'tanh': lambda a, b, c, d, e, f: a.tanh(),
+       'log': lambda a, b, c, d, e, f: d.log(),
+       'exp': lambda a, b, c, d, e, f: d.exp(1.5),
+       'relu': lambda a, b, c, d, e, f: a.relu(),
+       'sigmoid': lambda a, b, c, d, e, f: a.sigmoid(),
+       'softmax_rows': lambda a, b, c, d, e, f: a.softmax(dim=1),
+       'softmax_columns': lambda a, b, c, d, e, f: a.softmax(dim=0),
+       'sum': lambda a, b, c, d, e, f: (a * b).sum(),
+       'mean': lambda a, b, c, d, e, f: (a * b).mean(),
+       'matmul': lambda a, b, c, d, e, f: a @ c,
+       'broadcast_row': lambda a, b, c, d, e, f: a * e + b,
+       'broadcast_column': lambda a, b, c, d, e, f: a / f - b,
+       'rsub': lambda a, b, c, d, e, f: 1 - a,
+       'rtruediv': lambda a, b, c, d, e, f: 2 / d,
+       'rpow': lambda a, b, c, d, e, f: 2 ** a,
+       'mse': lambda a, b, c, d, e, f: losses.MSELoss()(a, b),
+       'cross_entropy': lambda a, b, c, d, e, f: losses.CrossEntropyLoss()(a @ c, [0, 2, 1])}
+
+def run(op, values, storage):
+    """ Return the values of an op on tensors of a storage, and the gradients of its inputs. """
+    tensors = [mutorch.Tensor(v, storage=storage) for v in values]
+    out = OPS[op](*tensors)
+    # a loss depending on every element of the output, whose gradient is not the same for all of them
+    loss = (out * out).sum() if out.shape != (1, 1) and out.shape != () else out * out
+    loss.backward()
+    return flatten(out), [grad(x) for x in tensors]
+
+@pytest.mark.parametrize('op', list(OPS))
+def test_array_matches_nodes(backend, op):
+    values = [random_values(3, 4), random_values(3, 4), random_values(4, 3), random_values(3, 4, 0.5, 2.),
+              random_values(1, 4), random_values(3, 1, 0.5, 2.)]
+    array_values, array_grads = run(op, values, 'array')
+    node_values, node_grads = run(op, values, 'node')
+    assert_close(array_values, node_values)
+    for array_grad, node_grad in zip(array_grads, node_grads):
+        assert_close(array_grad, node_grad)
+
+MIXED = {'add': (lambda x, y: x + y, (3, 4)),
+         'sub': (lambda x, y: x - y, (3, 4)),
+         'mul': (lambda x, y: x * y, (3, 4)),
+         'div': (lambda x, y: x / y, (3, 4)),
+         'pow': (lambda x, y: x ** y, (3, 4)),
+         'broadcast': (lambda x, y: x * y, (1, 4)),
+         'matmul': (lambda x, y: x @ y, (4, 3))}
+
+def run_mixed(op, values, storages):
+    """ Return the values of a binary op on tensors of the given storages, and the gradients of both. """
+    x, y = (mutorch.Tensor(v, storage=storage) for v, storage in zip(values, storages))
+    out = MIXED[op][0](x, y)
+    (out * out).sum().backward()
+    return flatten(out), grad(x), grad(y)
+
+@pytest.mark.parametrize('storages', [('array', 'node'), ('node', 'array')])
+@pytest.mark.parametrize('op', list(MIXED))
+def test_mixed_storages(backend, op, storages):
+    # the gradient of the node-backed operand flows back to its Nodes through the array-backed op
+    values = [random_values(3, 4, 0.5, 2.), random_values(*MIXED[op][1], 0.5, 2.)]
+    for mixed, nodes in zip(run_mixed(op, values, storages), run_mixed(op, values, ('node', 'node'))):
+        assert_close(mixed, nodes)
+
+def test_mixed_storages_lazy(backend):
+    values = [random_values(3, 4), random_values(3, 4), random_values(1, 4)]
+    def run(lazy):
+        x, w = (mutorch.Tensor(v) for v in values[:2])
+        bias = mutorch.Tensor(values[2], storage='array')
+        with mutorch.lazy() if lazy else contextlib.nullcontext():
+            z = nn.Tanh()(((x * w) + bias) / 2.2)
+        z.sum().backward()
+        return grad(x) + grad(w) + grad(bias)
+    assert_close(run(True), run(False))
+    assert any(run(True))
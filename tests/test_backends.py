@@ -0,0 +1,143 @@
+""" Tests of the compute backends: the kernels of every backend give the values and the gradients of the ops,
+and the steps of the optimizers, computed here with plain python, and the backends agree with each other. """
+import math
+import random
+
+import pytest
+
+import mutorch
+from mutorch import nn, losses, optim
+from conftest import flatten, grad, random_values, assert_close
+
+def test_elementwise(backend):
+    a_values, b_values = random_values(3, 4), random_values(3, 4, 0.5, 2.)
+    a = mutorch.Tensor(a_values, storage='array')
+    b = mutorch.Tensor(b_values, storage='array')
+    z = (a * b - b / a + abs(a) ** 2).tanh() + (-a).relu() + a.sigmoid() + b.log() - 3
+    z.sum().backward()
+
+    values, a_grad, b_grad = [], [], []
+    for x, y in zip(flatten(a_values), flatten(b_values)):
+        t = math.tanh(x * y - y / x + abs(x) ** 2)
+        s = 1 / (1 + math.exp(-x))
+        values.append(t + max(0., -x) + s + math.log(y) - 3)
+        a_grad.append((1 - t ** 2) * (y + y / x ** 2 + 2 * x) - (x < 0) + s * (1 - s))
+        b_grad.append((1 - t ** 2) * (x - 1 / x) + 1 / y)
+    assert_close(flatten(z), values)
+    assert_close(grad(a), a_grad)
+    assert_close(grad(b), b_grad)
+
+def test_matmul(backend):
+    a_values, b_values, w_values = random_values(3, 4), random_values(4, 2), random_values(3, 2)
+    a = mutorch.Tensor(a_values, storage='array')
+    b = mutorch.Tensor(b_values, storage='array')
+    z = a @ b
+    (z * mutorch.Tensor(w_values, requires_grad=False, storage='array')).sum().backward()
+
+    assert_close(flatten(z), [sum(a_values[i][l] * b_values[l][j] for l in range(4)) for i in range(3) for j in range(2)])
+    # dA = W.B^T and dB = A^T.W
+    assert_close(grad(a), [sum(w_values[i][j] * b_values[l][j] for j in range(2)) for i in range(3) for l in range(4)])
+    assert_close(grad(b), [sum(a_values[i][l] * w_values[i][j] for i in range(3)) for l in range(4) for j in range(2)])
+
+def test_reductions(backend):
+    values = random_values(3, 4)
+    a = mutorch.Tensor(values, storage='array')
+    total, mean = a.sum(), a.mean()
+    (total + mean * 2).backward()
+
+    assert total.item() == pytest.approx(sum(flatten(values)), abs=1e-12)
+    assert mean.item() == pytest.approx(sum(flatten(values)) / 12, abs=1e-12)
+    assert_close(grad(a), [1 + 2 / 12] * 12)
+
+def test_cross_entropy(backend):
+    values, targets = random_values(4, 3, -3., 3.), [0, 2, 1, 2]
+    logits = mutorch.Tensor(values, storage='array')
+    loss = losses.CrossEntropyLoss()(logits, targets)
+    loss.backward()
+
+    expected, expected_grad = 0., []
+    for row, target in zip(values, targets):
+        log_total = math.log(sum(math.exp(x) for x in row))
+        expected -= (row[target] - log_total) / 4
+        expected_grad += [(math.exp(x - log_total) - (j == target)) / 4 for j, x in enumerate(row)]
+    assert loss.item() == pytest.approx(expected, abs=1e-12)
+    assert_close(grad(logits), expected_grad)
+
+OPTIMIZERS = {'sgd': (optim.SGD, dict(lr=0.1)),
+              'momentum': (optim.SGD, dict(lr=0.1, momentum=0.9)),
+              'weight_decay': (optim.SGD, dict(lr=0.1, momentum=0.9, weight_decay=0.05)),
+              'adam': (optim.Adam, dict(lr=0.01)),
+              'adamw': (optim.AdamW, dict(lr=0.01, weight_decay=0.1))}
+
+def reference_steps(name, values, grads):
+    """ Return the values of parameters after the steps of an optimizer with the given gradients, in plain python. """
+    kwargs = OPTIMIZERS[name][1]
+    lr, weight_decay = kwargs['lr'], kwargs.get('weight_decay', 0.)
+    out = []
+    for i, x in enumerate(values):
+        u = m = v = 0.
+        for t, g in enumerate(grads, 1):
+            g = g[i]
+            if name in ('adam', 'adamw'):
+                m = 0.9 * m + 0.1 * g
+                v = 0.999 * v + 0.001 * g ** 2
+                x = x * (1 - lr * weight_decay) - lr * (m / (1 - 0.9 ** t)) / (math.sqrt(v / (1 - 0.999 ** t)) + 1e-8)
+            else:
+                u = kwargs.get('momentum', 0.) * u + g + weight_decay * x
+                x -= lr * u
+        out.append(x)
+    return out
+
+@pytest.mark.parametrize('name', list(OPTIMIZERS))
+def test_optimizer_step(backend, name):
+    values, grads = random_values(2, 3), [random_values(2, 3) for _ in range(3)]
+    parameter = mutorch.Tensor(values, storage='array')
+    optimizer_class, kwargs = OPTIMIZERS[name]
+    optimizer = optimizer_class([parameter], **kwargs)
+    for g in grads:
+        optimizer.zero_grad()
+        # the gradient of the parameter is g
+        (parameter * mutorch.Tensor(g, requires_grad=False, storage='array')).sum().backward()
+        optimizer.step()
+    assert_close(flatten(parameter), reference_steps(name, flatten(values), [flatten(g) for g in grads]))
+
+def program():
+    """ Run ops, a backward pass and training steps, and return every value and gradient they computed. """
+    a = mutorch.Tensor(random_values(3, 4), storage='array')
+    b = mutorch.Tensor(random_values(3, 4, 0.5, 2.), storage='array')
+    w = mutorch.Tensor(random_values(4, 2), storage='array')
+    z = ((a * b - b / a + abs(a) ** 2).tanh() + (-a).relu() + a.sigmoid() + b.log() - 3 - a) @ w
+    z = (z.tanh() / 2).sum() + (2 / b).mean() + losses.CrossEntropyLoss()(z, [0, 1, 1])
+    z.backward()
+
+    x = mutorch.Tensor(random_values(6, 5), requires_grad=False, storage='array')
+    y = mutorch.Tensor([[float(i % 2)] for i in range(6)], requires_grad=False, storage='array')
+    model = nn.Sequential(nn.Linear(5, 10, activation=nn.Tanh()),
+                          nn.Linear(10, 10, activation=nn.ReLU()),
+                          nn.Linear(10, 1, activation=nn.Sigmoid()))
+    loss_fn = losses.MSELoss()
+    for optimizer in (optim.Adam(model.parameters(), lr=0.01), optim.SGD(model.parameters(), lr=0.1, momentum=0.9),
+                      optim.AdamW(model.parameters(), lr=0.01)):
+        for _ in range(10):
+            optimizer.zero_grad()
+            loss = loss_fn(model(x), y)
+            loss.backward()
+            optimizer.step()
+    return [z.item(), loss.item()] + grad(a) + grad(b) + grad(w) + flatten(model(x))
+
+def test_backends_agree():
+    pytest.importorskip('numpy')
+    results = {}
+    for backend in ('python', 'numpy'):
+        mutorch.set_backend(backend)
+        try:
+            random.seed(0)
+            results[backend] = program()
+        finally:
+            mutorch.set_backend('python')
+    assert_close(results['numpy'], results['python'], tol=1e-14)
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        mutorch.set_backend('cuda')
+    assert mutorch.get_backend() == 'python'
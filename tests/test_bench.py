@@ -0,0 +1,48 @@
+""" Tests of the benchmark suite: the comparison with a baseline flags the cases past the threshold,
+and a run writes results that compare with themselves without regressions. """
+import json
+
+import mutorch
+from mutorch import bench
+
+def results(times, **meta):
+    return {'meta': dict({'python': '3.11.0', 'backend': 'python', 'dtype': 'float64'}, **meta),
+            'results': {name: {'min_s': t, 'median_s': t} for name, t in times.items()}}
+
+def test_compare():
+    baseline = results({'same': 1e-3, 'slower': 1e-3, 'faster': 1e-3, 'removed': 1e-3})
+    now = results({'same': 1.1e-3, 'slower': 1.3e-3, 'faster': 0.5e-3, 'new': 1e-3})
+    lines, regressions = bench.compare(now, baseline, 0.2)
+    assert regressions == ['slower']
+    status = {line.split()[0]: line.split()[-1] for line in lines[1:]}
+    assert status == {'same': 'ok', 'slower': 'REGRESSED', 'faster': 'improved', 'new': 'new'}
+    assert bench.compare(now, baseline, 0.5)[1] == []
+
+def test_compare_meta():
+    lines, regressions = bench.compare(results({'a': 1e-3}, backend='numpy'), results({'a': 1e-3}), 0.2)
+    assert regressions == []
+    assert any(line.startswith('warning') and 'backend' in line for line in lines)
+
+def test_main(tmp_path, capsys):
+    output = tmp_path / 'results.json'
+    argv = ['--filter', 'softmax', '--quick', '--min-time', '0', '--repeat', '2']
+    assert bench.main(argv + ['--output', str(output)]) == 0
+    written = json.loads(output.read_text())
+    assert list(written['results']) == ['softmax.32x100']
+    assert written['meta']['backend'] == mutorch.get_backend()
+    # a baseline ten times faster than this machine
+    for result in written['results'].values():
+        result['min_s'] /= 10
+    output.write_text(json.dumps(written))
+    assert bench.main(argv + ['--baseline', str(output)]) == 1
+    assert 'REGRESSED' in capsys.readouterr().out
+
+def test_helpers():
+    x = bench.random_tensor(3, 4)
+    assert x.shape == (3, 4) and x.storage == 'array' and not x.requires_grad
+    assert all(-1. <= value <= 1. for value in x.items())
+    assert bench.random_tensor(2, 2, storage='node', requires_grad=True).requires_grad
+    result = bench.measure(None, lambda: sum(range(100)), 0., 3)
+    assert result['repeat'] == 3 and 0. < result['min_s'] <= result['median_s']
+    assert bench.timed(lambda: sum(range(100))) > 0.
+    assert bench.peak_memory(lambda: [0.] * 10000) >= 80000
@@ -0,0 +1,74 @@
+""" Tests of the checkpoints: state dicts, binary checkpoints saved and loaded whole or by shards,
+and the pickled checkpoints of former versions of Sequential.save. """
+import pickle
+import random
+
+import pytest
+
+import mutorch
+from mutorch import nn
+from conftest import flatten, random_values, assert_close
+
+def mlp(seed):
+    random.seed(seed)
+    return nn.Sequential(nn.Linear(5, 10, activation=nn.Tanh()),
+                         nn.Linear(10, 10, activation=nn.ReLU()),
+                         nn.Linear(10, 1, activation=nn.Sigmoid()))
+
+def outputs(model):
+    return flatten(model([[0.01 * (i + 3 * j) for j in range(5)] for i in range(4)]))
+
+def test_state_dict():
+    state = mlp(0).state_dict()
+    assert list(state) == [f'layers.{i}.{name}' for i in range(3) for name in ('weight', 'bias')]
+    assert state['layers.0.weight'].shape == (5, 10)
+    assert state['layers.1.bias'].shape == (1, 10)
+
+def test_save_load(tmp_path):
+    model, other = mlp(0), mlp(1)
+    assert outputs(other) != outputs(model)
+    model.save(tmp_path / 'model.ckpt')
+    other.load(tmp_path / 'model.ckpt')
+    assert outputs(other) == outputs(model)
+
+def test_load_checkpoint(tmp_path):
+    model = mlp(0)
+    mutorch.save(model.state_dict(), tmp_path / 'model.ckpt')
+    with mutorch.load(tmp_path / 'model.ckpt') as checkpoint:
+        assert 'layers.2.bias' in checkpoint
+        assert checkpoint.shape('layers.0.weight') == (5, 10)
+        assert_close(flatten(checkpoint['layers.0.weight']), flatten(model.layers[0].weight), tol=0.)
+
+def test_load_shards(tmp_path):
+    model, other = mlp(0), mlp(1)
+    state = model.state_dict()
+    mutorch.save({k: v for k, v in state.items() if k.startswith('layers.0')}, tmp_path / 'a.ckpt')
+    mutorch.save({k: v for k, v in state.items() if not k.startswith('layers.0')}, tmp_path / 'b.ckpt')
+    with mutorch.load([tmp_path / 'a.ckpt', tmp_path / 'b.ckpt']) as checkpoint:
+        other.load_state_dict(checkpoint)
+    assert outputs(other) == outputs(model)
+
+def test_load_state_dict_strict():
+    model, other = mlp(0), mlp(1)
+    state = model.state_dict()
+    partial = {k: v for k, v in state.items() if k.startswith('layers.0')}
+    with pytest.raises(KeyError):
+        other.load_state_dict(partial)
+    other.load_state_dict(partial, strict=False)
+    assert flatten(other.layers[0].weight) == flatten(model.layers[0].weight)
+    assert flatten(other.layers[1].weight) != flatten(model.layers[1].weight)
+    with pytest.raises(ValueError):
+        other.load_state_dict(dict(state, **{'layers.0.bias': [[1., 2.]]}))
+
+def test_load_legacy_pickle(tmp_path):
+    model, other = mlp(0), mlp(1)
+    # former versions of Sequential.save pickled a flat list of floats, output by output,
+    # the weights of an output followed by its bias
+    values = []
+    for layer in model.layers:
+        weight, bias = layer.weight.detach(), flatten(layer.bias)
+        values += [value for j in range(layer.output_size) for value in [row[j] for row in weight] + [bias[j]]]
+    with open(tmp_path / 'model.pkl', 'wb') as f:
+        pickle.dump({'parameters': values}, f)
+    other.load(tmp_path / 'model.pkl')
+    assert outputs(other) == outputs(model)
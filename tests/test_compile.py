@@ -0,0 +1,59 @@
+""" Tests of mutorch.compile: the compiled training steps of a Sequential give the losses, the gradients
+and the parameters of the eager steps. """
+import random
+
+import pytest
+
+import mutorch
+from mutorch import nn, losses, optim
+from conftest import flatten, grad, random_values, assert_close
+
+ACTIVATIONS = {'sigmoid': nn.Sigmoid, 'none': lambda: None, 'softmax': lambda: nn.Softmax(dim=1),
+               'softmax_columns': lambda: nn.Softmax(dim=0)}
+
+def train(loss, activation, storage, compiled):
+    """ Return the losses and input gradients of a few Adam steps, and the final parameters. """
+    random.seed(0)
+    outputs = 3 if loss == 'cross_entropy' else 2
+    model = nn.Sequential(nn.Linear(5, 7, activation=nn.Tanh()), nn.Linear(7, 6),
+                          nn.Linear(6, outputs, activation=ACTIVATIONS[activation]()))
+    loss_fn = losses.CrossEntropyLoss() if loss == 'cross_entropy' else losses.MSELoss()
+    optimizer = optim.Adam(model.parameters(), lr=0.05)
+    step = mutorch.compile(model, loss_fn) if compiled else None
+    results = []
+    for i in range(8):
+        # one step changes the batch size
+        batch = 5 if i == 5 else 8
+        x = random_values(batch, 5)
+        if loss == 'cross_entropy':
+            y = [random.randrange(3) for _ in range(batch)]
+        else:
+            y = mutorch.Tensor(random_values(batch, 2, 0., 1.), requires_grad=False, storage='array')
+        if storage is not None:
+            x = mutorch.Tensor(x, storage=storage)
+        optimizer.zero_grad()
+        if compiled:
+            value = step(x, y)
+            assert step.source is not None
+        else:
+            value = loss_fn(model(x), y)
+            value.backward()
+        optimizer.step()
+        results.append(value.item())
+        if storage == 'array':
+            results += grad(x)
+    return results + [value for p in model.parameters() for value in flatten(p)]
+
+@pytest.mark.parametrize('storage', [None, 'node', 'array'])
+@pytest.mark.parametrize('loss, activation', [('mse', 'sigmoid'), ('mse', 'none'), ('mse', 'softmax'),
+                                              ('mse', 'softmax_columns'), ('cross_entropy', 'none')])
+def test_compiled_matches_eager(backend, loss, activation, storage):
+    assert_close(train(loss, activation, storage, True), train(loss, activation, storage, False))
+
+def test_source():
+    model = nn.Sequential(nn.Linear(3, 4, activation=nn.ReLU()), nn.Linear(4, 1))
+    step = mutorch.compile(model, losses.MSELoss())
+    assert step.source is None
+    # compiled for the shapes of the first batch
+    step(random_values(4, 3), [[0.5] for _ in range(4)])
+    assert step.source.startswith('def step(x, y):')
@@ -0,0 +1,83 @@
+""" Tests of the DataLoader: batches in order or shuffled, built ahead by background workers, from datasets
+read sample by sample or batch by batch. """
+import time
+import random
+import threading
+
+import pytest
+
+import mutorch
+from mutorch import data
+from conftest import flatten
+
+class Squares(data.Dataset):
+    """ A dataset read sample by sample, recording the indices it was read at. """
+    def __init__(self, size):
+        super().__init__()
+        self.size = size
+        self.reads = []
+        self.lock = threading.Lock()
+
+    def __getitem__(self, index):
+        with self.lock:
+            self.reads.append(index)
+        return float(index), [float(index * index), 1.]
+
+    def __len__(self):
+        return self.size
+
+def indices(batches):
+    """ Return the indices of the samples of every batch of Squares. """
+    return [[int(value) for value in flatten(x)] for x, _ in batches]
+
+@pytest.mark.parametrize('num_workers', [0, 1, 3])
+def test_order(num_workers):
+    loader = data.DataLoader(Squares(10), batch_size=3, num_workers=num_workers)
+    batches = list(loader)
+    assert len(loader) == len(batches) == 4
+    assert indices(batches) == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    x, y = batches[1]
+    assert x.shape == (3, 1) and y.shape == (3, 2)
+    assert y.detach() == [[9., 1.], [16., 1.], [25., 1.]]
+    assert not x.requires_grad and x.storage == 'array'
+
+@pytest.mark.parametrize('num_workers', [0, 2])
+def test_shuffle(num_workers):
+    loader = data.DataLoader(Squares(10), batch_size=4, shuffle=True, drop_last=True, num_workers=num_workers)
+    random.seed(1)
+    first = indices(loader)
+    random.seed(1)
+    assert indices(loader) == first
+    assert len(loader) == len(first) == 2
+    assert all(len(batch) == 4 for batch in first)
+    assert len(set(sum(first, []))) == 8
+    assert indices(loader) != first
+
+def test_prefetch():
+    dataset = Squares(40)
+    loader = data.DataLoader(dataset, batch_size=2, num_workers=2, prefetch=3)
+    batches = iter(loader)
+    next(batches)
+    # the workers build the batches ahead, up to num_workers * prefetch of them in flight
+    deadline = time.perf_counter() + 5.
+    while len(dataset.reads) < 2 * (2 * 3 + 1) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    assert len(dataset.reads) == 2 * (2 * 3 + 1)
+    assert indices(batches) == [[i, i + 1] for i in range(2, 40, 2)]
+
+def test_tensor_dataset():
+    x = mutorch.Tensor([[float(i), -float(i)] for i in range(5)], storage='array')
+    dataset = data.TensorDataset(x, [0, 1, 0, 1, 1])
+    assert len(dataset) == 5
+    assert dataset[3] == ([3., -3.], [1.])
+    inputs, targets = next(iter(data.DataLoader(dataset, batch_size=2, num_workers=1)))
+    assert inputs.detach() == [[0., -0.], [1., -1.]] and targets.detach() == [[0.], [1.]]
+    with pytest.raises(ValueError):
+        data.TensorDataset(x, [0, 1])
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        data.DataLoader(Squares(4), batch_size=0)
+    with pytest.raises(ValueError):
+        data.DataLoader(Squares(4), prefetch=0)
@@ -0,0 +1,91 @@
+""" Tests of the float32 dtype: parameters, gradients and outputs keep the default dtype they were created with,
+and training in float32 stays close to training in double. """
+import random
+
+import pytest
+
+import mutorch
+from mutorch import nn, losses, optim
+from conftest import flatten, random_values, assert_close
+
+@pytest.fixture
+def float32():
+    mutorch.set_default_dtype('float32')
+    yield
+    mutorch.set_default_dtype('float64')
+
+def train(dtype, optimizer, flat, compiled, steps=20):
+    """ Return the parameters and outputs of a model trained in a dtype. """
+    mutorch.set_default_dtype(dtype)
+    try:
+        random.seed(0)
+        model = nn.Sequential(nn.Linear(5, 10, activation=nn.Tanh()),
+                              nn.Linear(10, 10, activation=nn.ReLU()),
+                              nn.Linear(10, 1, activation=nn.Sigmoid()))
+        if flat:
+            model.flatten_parameters()
+        x = mutorch.Tensor(random_values(12, 5), requires_grad=False, storage='array')
+        y = mutorch.Tensor([[float(random.random() > 0.5)] for _ in range(12)], requires_grad=False, storage='array')
+        loss_fn = losses.MSELoss()
+        if optimizer == 'adam':
+            optimizer = optim.Adam(model.parameters(), lr=0.01)
+        else:
+            optimizer = optim.SGD(model.parameters(), lr=0.1, momentum=0.9)
+        step = mutorch.compile(model, loss_fn) if compiled else None
+        for _ in range(steps):
+            optimizer.zero_grad()
+            if compiled:
+                step(x, y)
+            else:
+                loss_fn(model(x), y).backward()
+            optimizer.step()
+        out = model(x)
+        assert out.dtype == dtype
+        assert all(p.dtype == dtype for p in model.parameters())
+        return [value for p in model.parameters() for value in flatten(p)] + flatten(out)
+    finally:
+        mutorch.set_default_dtype('float64')
+
+@pytest.mark.parametrize('compiled', [False, True])
+@pytest.mark.parametrize('flat', [False, True])
+@pytest.mark.parametrize('optimizer', ['adam', 'sgd'])
+def test_float32_training(backend, optimizer, flat, compiled):
+    assert_close(train('float32', optimizer, flat, compiled), train('float64', optimizer, flat, compiled), tol=1e-5)
+
+def test_ops(backend, float32):
+    a = mutorch.Tensor(random_values(3, 4), storage='array')
+    b = mutorch.Tensor(random_values(4, 2), storage='array')
+    z = (a * 2 - 1).tanh() @ b
+    loss = losses.CrossEntropyLoss()(z, [0, 1, 1])
+    loss.backward()
+    assert a.dtype == b.dtype == z.dtype == 'float32'
+    assert type(loss.item()) is float
+
+def test_sum_keeps_dtype(backend, float32):
+    a = mutorch.Tensor(random_values(3, 4), storage='array')
+    mutorch.set_default_dtype('float64')
+    # a tensor created before the default dtype changed keeps its own
+    total = a.sum()
+    total.backward()
+    assert total.dtype == a.dtype == 'float32'
+    assert total.item() == pytest.approx(sum(flatten(a)), rel=1e-6)
+    assert flatten(a.grad) == [1.] * 12
+
+def test_checkpoint(tmp_path, float32):
+    random.seed(0)
+    model = nn.Sequential(nn.Linear(5, 3, activation=nn.Tanh()), nn.Linear(3, 1))
+    model.save(tmp_path / 'model.ckpt')
+    other = nn.Sequential(nn.Linear(5, 3, activation=nn.Tanh()), nn.Linear(3, 1))
+    other.load(tmp_path / 'model.ckpt')
+    assert [flatten(p) for p in other.parameters()] == [flatten(p) for p in model.parameters()]
+    # loaded into a model in double, the values are widened exactly
+    mutorch.set_default_dtype('float64')
+    wide = nn.Sequential(nn.Linear(5, 3, activation=nn.Tanh()), nn.Linear(3, 1))
+    wide.load(tmp_path / 'model.ckpt')
+    assert wide.layers[0].weight.dtype == 'float64'
+    assert [flatten(p) for p in wide.parameters()] == [flatten(p) for p in model.parameters()]
+
+def test_unknown_dtype():
+    with pytest.raises(ValueError):
+        mutorch.set_default_dtype('float16')
+    assert mutorch.get_default_dtype() == 'float64'
@@ -0,0 +1,47 @@
+""" Tests of the exports of mutorch: importing the package imports none of its modules, every name is read from
+its module on first use, and the subpackages are the same modules whichever name they are imported under. """
+import os
+import sys
+import subprocess
+
+import pytest
+
+import mutorch
+
+def run(statement):
+    """ Run a statement in a fresh interpreter, and return what it printed. """
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(mutorch.__file__))))
+    return subprocess.run([sys.executable, '-c', statement], env=env, check=True, capture_output=True, text=True).stdout.strip()
+
+def test_import_is_lazy():
+    modules = 'sorted(m for m in sys.modules if m.startswith("mutorch."))'
+    assert run(f'import sys, mutorch; print({modules})') == "['mutorch.core', 'mutorch.core.exports']"
+    assert run(f'import sys, mutorch; mutorch.Tensor; print("mutorch.core.nn" in sys.modules)') == 'False'
+
+def test_exports():
+    for name in mutorch._EXPORTS:
+        assert getattr(mutorch, name) is not None
+    assert set(mutorch._EXPORTS) <= set(dir(mutorch))
+    assert mutorch.Linear is mutorch.nn.Linear is mutorch.nn.linear.Linear
+    assert mutorch.SGD is mutorch.optim.SGD
+    with pytest.raises(AttributeError):
+        mutorch.Conv2d
+
+@pytest.mark.parametrize('name', ['nn', 'optim', 'losses', 'data', 'parallel', 'serve', 'profiler'])
+def test_import_submodule(name):
+    statement = (f'import mutorch.{name}, mutorch.core.{name}, mutorch; '
+                 f'print(mutorch.{name} is mutorch.core.{name} is __import__("sys").modules["mutorch.{name}"])')
+    assert run(statement) == 'True'
+    # imported after the package exported the module
+    assert run(f'import mutorch; m = mutorch.{name}; import mutorch.{name}; print(mutorch.{name} is m)') == 'True'
+
+def test_from_import():
+    from mutorch.nn import Linear
+    from mutorch.profiler import profile
+    assert Linear is mutorch.Linear and profile is mutorch.profile
+
+def test_star_import():
+    namespace = {}
+    exec('from mutorch import *', namespace)
+    assert 'Tensor' in namespace and 'nn' in namespace
+    assert not {'compile', 'save', 'load'} & set(namespace)
@@ -0,0 +1,55 @@
+""" Tests of flat parameters: the steps of the optimizers on the contiguous buffers of a model give the parameters
+of the steps on its separate parameters. """
+import random
+
+import pytest
+
+import mutorch
+from mutorch import nn, losses, optim
+from conftest import flatten, random_values
+
+OPTIMIZERS = {'sgd': lambda p: optim.SGD(p, lr=0.1),
+              'momentum': lambda p: optim.SGD(p, lr=0.1, momentum=0.9),
+              'weight_decay': lambda p: optim.SGD(p, lr=0.1, momentum=0.9, weight_decay=0.05),
+              'adam': lambda p: optim.Adam(p, lr=0.01),
+              'adamw': lambda p: optim.AdamW(p, lr=0.01, weight_decay=0.1)}
+
+def mlp():
+    random.seed(0)
+    return nn.Sequential(nn.Linear(5, 10, activation=nn.Tanh()),
+                         nn.Linear(10, 10, activation=nn.ReLU()),
+                         nn.Linear(10, 1, activation=nn.Sigmoid()))
+
+def train(optimizer, flat, compiled, steps=10):
+    random.seed(1)
+    x = mutorch.Tensor(random_values(12, 5), requires_grad=False, storage='array')
+    y = mutorch.Tensor([[float(random.random() > 0.5)] for _ in range(12)], requires_grad=False, storage='array')
+    model, loss_fn = mlp(), losses.MSELoss()
+    if flat:
+        model.flatten_parameters()
+    optimizer = OPTIMIZERS[optimizer](model.parameters())
+    # a single step over the buffers of the model
+    assert (optimizer._flat is not None) == flat
+    step = mutorch.compile(model, loss_fn) if compiled else None
+    for _ in range(steps):
+        optimizer.zero_grad()
+        if compiled:
+            step(x, y)
+        else:
+            loss_fn(model(x), y).backward()
+        optimizer.step()
+    return model
+
+@pytest.mark.parametrize('compiled', [False, True])
+@pytest.mark.parametrize('optimizer', list(OPTIMIZERS))
+def test_flat_matches_separate(backend, optimizer, compiled):
+    separate, flat = train(optimizer, False, compiled), train(optimizer, True, compiled)
+    assert [flatten(p) for p in flat.parameters()] == [flatten(p) for p in separate.parameters()]
+
+def test_checkpoint(tmp_path):
+    model = train('adam', True, False)
+    model.save(tmp_path / 'model.ckpt')
+    other = mlp()
+    other.flatten_parameters()
+    other.load(tmp_path / 'model.ckpt')
+    assert [flatten(p) for p in other.parameters()] == [flatten(p) for p in model.parameters()]
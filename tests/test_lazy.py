@@ -0,0 +1,54 @@
+""" Tests of lazy mode: chains of elementwise ops evaluated on demand give the values and the gradients
+of the same ops run eagerly, and fuse into a single tape entry. """
+import pytest
+
+import mutorch
+from mutorch import nn
+from conftest import flatten, grad, random_values, assert_close
+
+EXPRESSIONS = {'linear_tanh': lambda x, w, b: nn.Tanh()(((x * w) + b) / 2.2),
+               'sigmoid_abs': lambda x, w, b: (x * w - b).sigmoid() * 3 + abs(x),
+               'pow_relu': lambda x, w, b: ((x - w) ** 2).relu() / (b * b + 1.),
+               'reflected': lambda x, w, b: 2. - x / (1.5 + w * w) + (-b),
+               'log_exp': lambda x, w, b: (x * x + 2).log() * w + b.tanh() - x.exp(3),
+               'shared': lambda x, w, b: (x * w).relu() + (x * w).relu() * b}
+
+def run(expression, values, lazy):
+    """ Return the values of an expression and the gradients of its inputs, run lazily or eagerly. """
+    x = mutorch.Tensor(values[0], requires_grad=False, storage='array')
+    w, b = (mutorch.Tensor(v, storage='array') for v in values[1:])
+    if lazy:
+        with mutorch.lazy():
+            y = EXPRESSIONS[expression](x, w, b)
+            assert type(y).__name__ == '_LazyTensor'
+            loss = (y * y).sum()
+    else:
+        y = EXPRESSIONS[expression](x, w, b)
+        loss = (y * y).sum()
+    loss.backward()
+    assert x.grad is None
+    return flatten(y), grad(w), grad(b)
+
+@pytest.mark.parametrize('b_shape', [(4, 5), (1, 5), (4, 1), (1, 1)])
+@pytest.mark.parametrize('expression', list(EXPRESSIONS))
+def test_lazy_matches_eager(backend, expression, b_shape):
+    values = [random_values(4, 5), random_values(4, 5), random_values(*b_shape)]
+    for lazy_result, eager_result in zip(run(expression, values, True), run(expression, values, False)):
+        assert_close(lazy_result, eager_result)
+
+def test_chain_fuses():
+    x = mutorch.Tensor(random_values(3, 3), storage='array')
+    w = mutorch.Tensor(random_values(3, 3), storage='array')
+    with mutorch.lazy():
+        y = nn.Tanh()(((x * w) + 1.) / 2.2)
+    assert_close(flatten(y), flatten(nn.Tanh()(((x * w) + 1.) / 2.2)))
+    # evaluated as a single tape entry, whose inputs are the leaves
+    assert y._children_nodes == (x, w)
+
+def test_no_grad():
+    x = mutorch.Tensor(random_values(3, 3), storage='array')
+    with mutorch.no_grad(), mutorch.lazy():
+        y = x * 2
+    assert not y.requires_grad
+    assert y._children_nodes == ()
+    assert_close(flatten(y), [2 * a for a in flatten(x)])
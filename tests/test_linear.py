@@ -0,0 +1,39 @@
+""" Tests of the Linear layer: the matrix-form layer gives the values and the gradients of the same layer
+made of Neurons, and backpropagates into inputs of either storage. """
+import random
+
+import pytest
+
+import mutorch
+from mutorch import nn, losses
+from conftest import flatten, grad, random_values, assert_close
+
+ACTIVATIONS = {'none': lambda: None, 'relu': nn.ReLU, 'tanh': nn.Tanh, 'sigmoid': nn.Sigmoid}
+
+@pytest.mark.parametrize('storage', ['array', 'node'])
+@pytest.mark.parametrize('activation', list(ACTIVATIONS))
+def test_input_gradient(backend, activation, storage):
+    random.seed(0)
+    layer = nn.Linear(4, 3, activation=ACTIVATIONS[activation]())
+    values, targets = random_values(5, 4), random_values(5, 3)
+    def run(storage):
+        layer.zero_grad()
+        x = mutorch.Tensor(values, storage=storage)
+        losses.MSELoss()(layer(x), mutorch.Tensor(targets, requires_grad=False, storage='array')).backward()
+        return grad(x) + [g for p in layer.parameters() for g in grad(p)]
+    result = run(storage)
+    assert any(result[:20])
+    assert_close(result, run('array'))
+
+def test_upstream_nodes(backend):
+    # the gradient reaches the graph of Nodes the inputs of the layer were computed from
+    random.seed(0)
+    neurons = [nn.Neuron(4) for _ in range(3)]
+    layer = nn.Linear(3, 1, activation=nn.Sigmoid())
+    x = mutorch.Tensor(random_values(5, 4))
+    hidden = mutorch.Tensor([[nn.Tanh()(n.forward(row)) for n in neurons] for row in x.data])
+    out = layer(hidden)
+    out.sum().backward()
+    weight = flatten(layer.weight)
+    assert_close(grad(hidden), [y * (1 - y) * w for y in flatten(out) for w in weight])
+    assert all(p.grad != 0. for n in neurons for p in n.parameters())
@@ -0,0 +1,97 @@
+""" Tests of DataParallel: the gradients of a batch split across worker processes are the gradients of the batch
+in a single process, the shared memory is freed by close() and by garbage collection, and a worker that dies
+fails the step instead of blocking it. """
+import os
+import gc
+import time
+import signal
+import random
+from multiprocessing import shared_memory
+
+import pytest
+
+import mutorch
+from mutorch import nn, losses, parallel
+from conftest import grad, random_values, assert_close
+
+def mlp():
+    random.seed(0)
+    return nn.Sequential(nn.Linear(5, 8, activation=nn.Tanh()), nn.Linear(8, 2, activation=nn.Sigmoid()))
+
+def batch(rows):
+    return random_values(rows, 5), random_values(rows, 2, 0., 1.)
+
+def unlinked(names):
+    """ Return whether none of the shared memory blocks of the given names exist. """
+    for name in names:
+        try:
+            shared_memory.SharedMemory(name=name).close()
+            return False
+        except FileNotFoundError:
+            pass
+    return True
+
+@pytest.mark.parametrize('num_workers', [1, 3])
+def test_gradients_match_single_process(backend, num_workers):
+    x, y = batch(10)
+    model, loss_fn = mlp(), losses.MSELoss()
+    loss = loss_fn(model(x), mutorch.Tensor(y, requires_grad=False, storage='array'))
+    model.backward(loss)
+    expected = [g for p in model.parameters() for g in grad(p)]
+
+    model = mlp()
+    with parallel.DataParallel(model, num_workers) as data_parallel:
+        parallel_loss = data_parallel.accumulate(x, y, loss_fn)
+    assert parallel_loss == pytest.approx(loss.item(), abs=1e-12)
+    assert_close([g for p in model.parameters() for g in grad(p)], expected)
+
+def test_close_unlinks_shared_memory():
+    data_parallel = parallel.DataParallel(mlp(), 2)
+    data_parallel.accumulate(*batch(4), losses.MSELoss())
+    names = [memory.name for memory in data_parallel._memories]
+    processes = [process for process, _ in data_parallel._workers]
+    assert not unlinked(names)
+    data_parallel.close()
+    assert unlinked(names)
+    assert not any(process.is_alive() for process in processes)
+
+def test_garbage_collection_unlinks_shared_memory():
+    data_parallel = parallel.DataParallel(mlp(), 2)
+    data_parallel.accumulate(*batch(4), losses.MSELoss())
+    names = [memory.name for memory in data_parallel._memories]
+    del data_parallel
+    gc.collect()
+    assert unlinked(names)
+
+class DyingLoss:
+    """ The MSE loss, killing the worker process of a given pid when computed in it. """
+    def __init__(self, pid):
+        self.pid = pid
+
+    def __call__(self, outputs, targets):
+        if os.getpid() == self.pid:
+            os.kill(self.pid, signal.SIGKILL)
+        return losses.MSELoss()(outputs, targets)
+
+@pytest.mark.parametrize('during_step', [False, True])
+def test_dead_worker(during_step):
+    model, loss_fn = mlp(), losses.MSELoss()
+    data_parallel = parallel.DataParallel(model, 2, timeout=5.)
+    data_parallel.accumulate(*batch(4), loss_fn)
+    names = [memory.name for memory in data_parallel._memories]
+    process = data_parallel._workers[1][0]
+    if during_step:
+        # the worker dies in the middle of the forward pass, the other one waits for it at the all-reduce
+        loss_fn = DyingLoss(process.pid)
+    else:
+        os.kill(process.pid, signal.SIGKILL)
+        process.join()
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError):
+        data_parallel.accumulate(*batch(4), loss_fn)
+    assert time.perf_counter() - start < 5.
+    assert unlinked(names)
+    # the next step restarts the workers
+    model.zero_grad()
+    data_parallel.accumulate(*batch(4), losses.MSELoss())
+    data_parallel.close()
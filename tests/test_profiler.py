@@ -0,0 +1,62 @@
+""" Tests of the profiler: the calls of the ops, the modules and the optimizers run under a profile are counted,
+with the nodes they construct, and the methods are restored when it exits. """
+import json
+import random
+
+import pytest
+
+import mutorch
+from mutorch import nn, losses, optim, profiler, Node
+from mutorch.profiler import profile
+
+def test_node_ops():
+    with profile(memory=False) as prof:
+        x = Node(0.5)
+        y = (x * 2 + 1).tanh().relu() + x.sigmoid() - x.exp()
+        y.backward()
+    for op in ('__mul__', '__add__', '__sub__', 'tanh', 'relu', 'sigmoid', 'exp', 'backward'):
+        assert prof.stats[f'Node.{op}'][0] >= 1, op
+    # relu is called once, and constructs its output node
+    assert prof.stats['Node.relu'][0] == 1 and prof.stats['Node.relu'][3] == 1
+    assert all(op in profiler.NODE_OPS for op in Node._OP_BACKWARD if op.isidentifier())
+
+def test_training_step(tmp_path):
+    random.seed(0)
+    model = nn.Sequential(nn.Linear(3, 4, activation=nn.Tanh()), nn.Linear(4, 1))
+    optimizer = optim.SGD(model.parameters(), lr=0.1)
+    x = mutorch.Tensor([[0.1, 0.2, 0.3]] * 5, requires_grad=False, storage='array')
+    with profile() as prof:
+        for _ in range(3):
+            optimizer.zero_grad()
+            losses.MSELoss()(model(x), [[0.5]] * 5).backward()
+            optimizer.step()
+    assert prof.stats['Sequential.__call__'][0] == 3
+    assert prof.stats['Linear.forward'][0] == 6
+    assert prof.stats['SGD.step'][0] == 3
+    assert prof.stats['Tensor.backward'][0] == 3
+    calls, total, self_time, nodes, allocated = prof.stats['Sequential.__call__']
+    assert 0. <= self_time <= total and allocated is not None
+    assert prof.table(sort_by='calls', limit=3).count('\n') == 3
+    with pytest.raises(ValueError):
+        prof.table(sort_by='name')
+    prof.export_chrome_trace(tmp_path / 'trace.json')
+    events = json.loads((tmp_path / 'trace.json').read_text())['traceEvents']
+    assert len(events) == len(prof.events) == sum(stat[0] for stat in prof.stats.values())
+
+def test_methods_restored():
+    methods = {(cls, name): cls.__dict__[name] for cls, names in ((Node, profiler.NODE_OPS + ('__init__',)),
+                                                                  (mutorch.Tensor, profiler.TENSOR_OPS),
+                                                                  (nn.Linear, ('forward',)), (optim.SGD, ('step',)))
+               for name in names if name in cls.__dict__}
+    with pytest.raises(KeyError):
+        with profile(memory=False):
+            assert Node.__dict__['relu'] is not methods[Node, 'relu']
+            raise KeyError
+    assert all(cls.__dict__[name] is fn for (cls, name), fn in methods.items())
+    assert profiler._active is None
+
+def test_nested_profiles():
+    with profile(memory=False):
+        with pytest.raises(RuntimeError):
+            with profile(memory=False):
+                pass
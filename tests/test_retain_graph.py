@@ -0,0 +1,46 @@
+""" Tests of the graph freed by the backward pass: a second backward raises unless the first retained the graph. """
+import pytest
+
+import mutorch
+from mutorch import nn, Node
+from conftest import grad, random_values, assert_close
+
+def test_node_second_backward_raises():
+    x = Node(2.)
+    z = nn.Tanh()(x * x + 1) * 3
+    z.backward()
+    with pytest.raises(RuntimeError):
+        z.backward()
+
+@pytest.mark.parametrize('storage', ['array', 'node'])
+def test_tensor_second_backward_raises(backend, storage):
+    x = mutorch.Tensor(random_values(2, 3), storage=storage)
+    loss = (x * x).tanh().sum()
+    loss.backward()
+    with pytest.raises(RuntimeError):
+        loss.backward()
+
+def test_node_retain_graph():
+    x = Node(2.)
+    z = nn.Tanh()(x * x + 1) * 3
+    z.backward(retain_graph=True)
+    first = x.grad
+    z.backward()
+    assert x.grad == pytest.approx(2 * first, abs=1e-12)
+
+@pytest.mark.parametrize('storage', ['array', 'node'])
+def test_tensor_retain_graph(backend, storage):
+    x = mutorch.Tensor(random_values(2, 3), storage=storage)
+    loss = (x * x).tanh().sum()
+    loss.backward(retain_graph=True)
+    first = grad(x)
+    loss.backward()
+    # the gradients of the second pass accumulate on the first
+    assert_close(grad(x), [2 * g for g in first])
+
+def test_leaf_shared_by_graphs():
+    # freeing a graph does not free the leaves it shares with other graphs
+    w = Node(3.)
+    (w * 2).backward()
+    (w * 3).backward()
+    assert w.grad == 5.
@@ -0,0 +1,64 @@
+""" Tests of the BatchingServer: concurrent requests are answered by batched forward passes, with the predictions
+of the model for their own sample, and a malformed request fails only its caller. """
+import random
+import asyncio
+
+import pytest
+
+from mutorch import nn, serve
+from conftest import random_values, assert_close
+
+def mlp():
+    random.seed(0)
+    return nn.Sequential(nn.Linear(3, 5, activation=nn.Tanh()), nn.Linear(5, 2))
+
+def test_batching():
+    model, samples = mlp(), random_values(10, 3)
+    async def main():
+        async with serve.BatchingServer(model, max_batch_size=4, max_latency_ms=50.) as server:
+            rows = await asyncio.gather(*(server.predict(sample) for sample in samples))
+        return rows, server.metrics()
+    rows, metrics = asyncio.run(main())
+    for row, expected in zip(rows, model(samples).detach()):
+        assert_close(row, expected)
+    assert metrics['requests'] == 10 and metrics['batches'] == 3
+    assert metrics['max_batch_size'] == 4 and metrics['mean_batch_size'] == pytest.approx(10 / 3)
+    assert 0. <= metrics['p50_ms'] <= metrics['p99_ms']
+
+def test_max_latency():
+    async def main():
+        async with serve.BatchingServer(mlp(), max_batch_size=8, max_latency_ms=20.) as server:
+            first = await server.predict([0.1, 0.2, 0.3])
+            # a lone request is answered once it has waited max_latency_ms, in a batch of its own
+            second = await server.predict([0.1, 0.2, 0.3])
+        return first, second, server.metrics()
+    first, second, metrics = asyncio.run(main())
+    assert first == second
+    assert metrics['batches'] == 2 and metrics['max_batch_size'] == 1
+    assert metrics['p50_ms'] >= 20.
+
+def test_malformed_sample():
+    model, samples = mlp(), random_values(4, 3)
+    async def main():
+        async with serve.BatchingServer(model, max_batch_size=8, max_latency_ms=20.) as server:
+            return await asyncio.gather(server.predict(samples[0]), server.predict([1., 2.]),
+                                        server.predict(samples[1]), return_exceptions=True)
+    first, malformed, second = asyncio.run(main())
+    assert isinstance(malformed, ValueError)
+    assert_close(first + second, [v for row in model(samples[:2]).detach() for v in row])
+
+def test_unknown_input_size():
+    # a model without a first layer to read the number of features from: the first sample sets it
+    model = mlp()
+    async def main():
+        async with serve.BatchingServer(lambda x: model(x), max_latency_ms=1.) as server:
+            await server.predict([0.1, 0.2, 0.3])
+            with pytest.raises(ValueError):
+                await server.predict([0.1, 0.2])
+    asyncio.run(main())
+
+def test_not_started():
+    with pytest.raises(RuntimeError):
+        asyncio.run(serve.BatchingServer(mlp()).predict([0.1, 0.2, 0.3]))
+    with pytest.raises(ValueError):
+        serve.BatchingServer(mlp(), max_batch_size=0)
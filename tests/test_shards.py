@@ -0,0 +1,65 @@
+""" Tests of the shard format: tensors written to shards read back exactly, whole or split across shards,
+in either dtype. """
+import random
+
+import pytest
+
+import mutorch
+from mutorch import data
+from conftest import flatten, random_values
+
+@pytest.mark.parametrize('typecode', ['d', 'f'])
+def test_round_trip(tmp_path, typecode):
+    values = random_values(7, 3)
+    data.write_shard(tmp_path / 'x.shard', values, typecode)
+    shard = data.Shard(tmp_path / 'x.shard')
+    assert shard.shape == (7, 3) and shard.typecode == typecode and len(shard) == 7
+    read = list(shard.read(2, 5))
+    if typecode == 'd':
+        assert read == flatten(values[2:5])
+    else:
+        assert read == pytest.approx(flatten(values[2:5]), rel=1e-7)
+    shard.close()
+
+def test_writer(tmp_path):
+    x = mutorch.Tensor(random_values(4, 2), storage='array')
+    with data.ShardWriter(tmp_path / 'x.shard', (2,)) as writer:
+        writer.write(x)
+        writer.write([[1., 2.]])
+        with pytest.raises(ValueError):
+            writer.write([[1., 2., 3.]])
+    dataset = data.ShardDataset(tmp_path / 'x.shard')
+    assert len(dataset) == 5
+    assert dataset[4] == ([1., 2.],)
+    assert dataset.__getitems__([0, 1, 2, 3])[0].detach() == x.detach()
+    dataset.close()
+
+def test_dataset_across_shards(tmp_path):
+    x, y = random_values(10, 3), [float(i % 2) for i in range(10)]
+    data.write_shard(tmp_path / 'x0.shard', x[:4])
+    data.write_shard(tmp_path / 'x1.shard', x[4:])
+    data.write_shard(str(tmp_path / 'y.shard'), y)
+    dataset = data.ShardDataset([tmp_path / 'x0.shard', tmp_path / 'x1.shard'], str(tmp_path / 'y.shard'))
+    assert len(dataset) == 10
+    assert dataset[-1] == (x[9], [y[9]])
+    # runs of consecutive rows, within a shard and across two shards, and rows out of order
+    indices = [2, 3, 4, 5, 9, 0, 7]
+    inputs, targets = dataset.__getitems__(indices)
+    assert inputs.shape == (7, 3) and not inputs.requires_grad
+    assert inputs.detach() == [x[i] for i in indices]
+    assert targets.detach() == [[y[i]] for i in indices]
+    random.seed(0)
+    batches = list(data.DataLoader(dataset, batch_size=4, shuffle=True))
+    assert sorted(row for inputs, _ in batches for row in inputs.detach()) == sorted(x)
+    with pytest.raises(IndexError):
+        dataset[10]
+    dataset.close()
+
+def test_invalid_shards(tmp_path):
+    data.write_shard(tmp_path / 'x.shard', random_values(4, 3))
+    data.write_shard(tmp_path / 'y.shard', random_values(5, 3))
+    with pytest.raises(ValueError):
+        data.ShardDataset(tmp_path / 'x.shard', tmp_path / 'y.shard')
+    (tmp_path / 'z.shard').write_bytes(b'not a shard'.ljust(128, b'\0'))
+    with pytest.raises(ValueError):
+        data.Shard(tmp_path / 'z.shard')